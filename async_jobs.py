@@ -0,0 +1,419 @@
+import time
+import signal
+import asyncio
+from typing import Dict, Optional
+
+from db.async_mongo_interface import AsyncMongoInterface
+from db.write_buffer import MongoWriteBuffer
+from db.abi_registry import AbiRegistry
+from db.price_feed import StalePriceError
+from web3.exceptions import TimeExhausted
+
+from eth.provider.async_provider import AsyncProvider
+from eth.provider.provider import TransactionDeliveryError
+from eth.event_interfaces import (EventDeployer, get_function_abis, get_contract_info_getters, decode_getter_results,
+                                  build_contract_info)
+from eth.multicall import MULTICALL3_ADDRESS, MULTICALL3_ABI, MULTICALL_FALLBACK_ERRORS
+from eth.fee_oracle import FeeOracle, FeeCapExceededError, GasLimitCache
+from eth.simulation import DeploySimulationError, is_retryable_error
+from job_registry import get_job_definition_by_collection
+from jobs import EventDeployerJobs, EXPIRED_EVENT_PROJECTION
+from utils.metrics import metrics
+
+# Sends failing with a retryable error are retried like EventDeployer.send_deploy_txn's @retry
+SEND_ATTEMPTS = 5
+SEND_RETRY_WAIT = 1.0
+
+
+class AsyncEventContractReader:
+    """
+    Reads event contract info on AsyncWeb3. Getters are batched into a single Multicall3 eth_call like
+    EventContractInterface, falling back to concurrent eth_calls one per getter.
+    """
+
+    def __init__(self, provider: AsyncProvider):
+        self.provider = provider
+        self.multicall = provider.w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+
+    async def get_event_contract_info(self, contract_address, contract_abi, fields=None) -> Dict:
+        """
+        :param contract_address:
+        :param contract_abi:
+        :param fields: contract info fields to read, all fields if None
+        :return: contract info dict, getters missing from the ABI are reported as None
+        """
+        contract = self.provider.w3.eth.contract(address=contract_address, abi=contract_abi)
+        function_abis = get_function_abis(contract_abi)
+        getters = get_contract_info_getters(function_abis, fields=fields)
+
+        try:
+            results = await self.multicall.functions.aggregate3(
+                [(contract.address, True, contract.encode_abi(abi_element_identifier=function_name))
+                 for _, function_name, _ in getters]).call()
+            values = decode_getter_results(self.provider.w3.codec, function_abis, getters, results)
+        except MULTICALL_FALLBACK_ERRORS as e:
+            print(f"Multicall read failed for {contract.address}, reading getters concurrently: {e}")
+            values = await asyncio.gather(*[contract.functions[function_name]().call()
+                                            for _, function_name, _ in getters])
+
+        return build_contract_info(contract.address, contract_abi, getters, values)
+
+
+class AsyncEventDeployerJobs:
+    """
+    asyncio engine with the job semantics of EventDeployerJobs. Each (collection, asset) of a pass runs as
+    its own task in a TaskGroup, so status reads, compiles, sends, receipt waits and mongo round-trips of
+    all series overlap on one event loop instead of running back to back.
+    Ongoing event sync and bettor log indexing run on a worker thread with the sync engine during the pass,
+    settlement runs after it.
+    Deploys already broadcast are always finished and recorded, even when the pass is cancelled, and the
+    queued writes are flushed on the way out.
+    """
+
+    def __init__(self, sync_jobs: EventDeployerJobs, provider_handler: AsyncProvider):
+        if sync_jobs.factory_job_types or sync_jobs.dry_run:
+            raise Exception("Factory deploys and dry runs are only supported by the sync engine")
+        self.sync_jobs = sync_jobs
+        self.provider_handler = provider_handler
+        self.mongo_handler = sync_jobs.mongo_handler
+        self.async_mongo_handler = AsyncMongoInterface(mongo_handler=sync_jobs.mongo_handler)
+        self.contract_reader = AsyncEventContractReader(provider=provider_handler)
+        self.fee_oracle = FeeOracle.for_provider(provider_handler)
+        self.rpc_semaphore = asyncio.Semaphore(max(1, sync_jobs.rpc_concurrency))
+        self.stop_requested = False
+        self._inflight_deploys = set()
+
+    def stop(self):
+        """
+        Ask the job runner to exit after the current pass
+        :return:
+        """
+        self.stop_requested = True
+        self.sync_jobs.stop()
+
+    async def run(self, is_test=False):
+        """
+        Run the job runner until stopped, SIGTERM and SIGINT stop it after the current pass
+        :param is_test:
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self.stop)
+        try:
+            await self.job_runner(is_test=is_test)
+        finally:
+            # releases a runner sleeping on its worker thread, so the loop can shut down
+            self.sync_jobs.scheduler.wake()
+            await self.provider_handler.close()
+
+    async def job_runner(self, is_test):
+        while not self.stop_requested:
+            job_configs = self.sync_jobs.get_active_job_configs(is_test=is_test)
+            try:
+                await self.run_jobs_pass(job_configs=job_configs)
+            except Exception as e:
+                print(e)
+                print("Error in async job runner...")
+                print("Exiting job runner...")
+                return
+
+            if is_test or self.stop_requested:
+                return
+
+            try:
+                await asyncio.to_thread(self.sync_jobs.schedule_event_deadlines, job_configs=job_configs)
+            except Exception as e:
+                print(f"Unable to schedule event deadlines: {e}")
+                self.sync_jobs.scheduler.clear()
+
+            next_deadline = self.sync_jobs.scheduler.next_deadline()
+            sleep_seconds = self.sync_jobs.scheduler.get_sleep_seconds()
+            if next_deadline is not None:
+                print(f"Job runner sleeping for {sleep_seconds:.0f}s until {next_deadline[1]}...")
+            else:
+                print(f"Job runner sleeping for {sleep_seconds:.0f}s...")
+            await asyncio.to_thread(self.sync_jobs.scheduler.sleep_until_next)
+
+    async def run_jobs_pass(self, job_configs):
+        """
+        Run every (collection, asset) of the job configs concurrently and flush all record writes together
+        :param job_configs:
+        :return:
+        """
+        rpc_calls_before = metrics.get_counter_by_label("rpc_requests_total", "method")
+        pass_start = time.perf_counter()
+        write_buffer = MongoWriteBuffer(mongo_handler=self.mongo_handler)
+        asset_tasks = []
+        try:
+            async with asyncio.TaskGroup() as task_group:
+                task_group.create_task(asyncio.to_thread(self.run_sync_stages, job_configs=job_configs))
+                for job_config in job_configs:
+                    for asset in job_config["params"].keys():
+                        asset_tasks.append(task_group.create_task(
+                            self.run_asset_job(job_config=job_config, asset=asset, write_buffer=write_buffer)))
+        finally:
+            if self._inflight_deploys:
+                await asyncio.shield(asyncio.gather(*self._inflight_deploys, return_exceptions=True))
+            await asyncio.shield(asyncio.to_thread(write_buffer.flush))
+            self.sync_jobs.record_pass_metrics(job_configs=job_configs,
+                                               rpc_calls_before=rpc_calls_before,
+                                               pass_seconds=time.perf_counter() - pass_start,
+                                               deploy_count=sum(task.result() for task in asset_tasks
+                                                                if task.done() and not task.cancelled()
+                                                                and task.exception() is None))
+
+        if self.sync_jobs.settle_events and not self.stop_requested:
+            await asyncio.to_thread(self.run_settlement, job_configs=job_configs)
+
+    def run_sync_stages(self, job_configs):
+        """
+        Sync the ongoing event records and index the bettor logs with the sync engine, on a worker thread
+        :param job_configs:
+        :return:
+        """
+        write_buffer = MongoWriteBuffer(mongo_handler=self.mongo_handler)
+        try:
+            if self.sync_jobs.sync_ongoing_events:
+                self.sync_jobs.sync_ongoing_event_records(job_configs=job_configs, write_buffer=write_buffer)
+            if self.sync_jobs.log_indexer is not None:
+                self.sync_jobs.index_bettor_logs(job_configs=job_configs)
+        finally:
+            write_buffer.flush()
+
+    def run_settlement(self, job_configs):
+        """
+        Settle the expired events with the sync engine. Its wallet nonces come from the sync provider,
+        so both allocators are resynced around it instead of racing the async deploys.
+        :param job_configs:
+        :return:
+        """
+        write_buffer = MongoWriteBuffer(mongo_handler=self.mongo_handler)
+        self.sync_jobs.provider_handler.resync_nonce()
+        try:
+            self.sync_jobs.settle_expired_events(job_configs=job_configs, write_buffer=write_buffer)
+        finally:
+            write_buffer.flush()
+            self.provider_handler.resync_nonce()
+
+    async def run_asset_job(self, job_config, asset, write_buffer: MongoWriteBuffer) -> int:
+        """
+        Write the record updates for the expired events of an asset and deploy its next events.
+        The deploys are planned by EventDeployerJobs.plan_event_job, so like the sync engine every closed out
+        event gets its replacement, the close-outs are written before the deploys and a failed close-out
+        skips its replacement.
+        :param job_config:
+        :param asset:
+        :param write_buffer:
+        :return: number of deploys made
+        """
+        collection_name = job_config['params'][asset]["collection_name"]
+        expired_event_records = await self.async_mongo_handler.find(
+            collection=collection_name,
+            query=EventDeployerJobs.build_expired_event_query(asset_symbol=asset),
+            projection=EXPIRED_EVENT_PROJECTION
+        )
+        async with asyncio.TaskGroup() as task_group:
+            status_tasks = [task_group.create_task(self.check_contract_status(collection_name=collection_name,
+                                                                              event_record=event_record))
+                            for event_record in expired_event_records]
+        expired_event_statuses = {(collection_name, asset): [status_task.result() for status_task in status_tasks]}
+
+        close_out_buffer = MongoWriteBuffer(mongo_handler=self.mongo_handler)
+        deploy_requests = await asyncio.to_thread(EventDeployerJobs.plan_event_job,
+                                                  job_config={**job_config,
+                                                              "params": {asset: job_config["params"][asset]}},
+                                                  mongo_handler=self.mongo_handler,
+                                                  expired_event_statuses=expired_event_statuses,
+                                                  write_buffer=close_out_buffer)
+        flush_results = await asyncio.shield(asyncio.to_thread(close_out_buffer.flush))
+        deploy_requests = EventDeployerJobs.drop_unrecorded_close_outs(deploy_requests=deploy_requests,
+                                                                       expired_event_statuses=expired_event_statuses,
+                                                                       flush_results=flush_results)
+
+        deploy_count = 0
+        for _ in deploy_requests:
+            if await self.deploy_and_record_event(asset_symbol=asset, collection_name=collection_name,
+                                                  write_buffer=write_buffer):
+                deploy_count += 1
+        if deploy_count < len(deploy_requests):
+            raise Exception(f"Failed to deploy {len(deploy_requests) - deploy_count} of {len(deploy_requests)} "
+                            f"{asset} {collection_name} contracts")
+
+        return deploy_count
+
+    async def check_contract_status(self, collection_name, event_record) -> Dict:
+        contract_abi = event_record.get("contract_abi")
+        if contract_abi is None and event_record.get("abi_id") is not None:
+            abi_registry = AbiRegistry.for_mongo_handler(mongo_handler=self.mongo_handler)
+            contract_abi = await asyncio.to_thread(abi_registry.get, event_record["abi_id"])
+
+        fields = EventDeployerJobs.get_status_read_fields(contract_abi,
+                                                          indexed_bettors=self.sync_jobs.log_indexer is not None)
+        async with self.rpc_semaphore:
+            current_contract_info = await self.contract_reader.get_event_contract_info(
+                contract_address=event_record["contract_address"], contract_abi=contract_abi, fields=fields)
+        print(f"Checked event {collection_name} {current_contract_info['asset_symbol']} status")
+
+        return current_contract_info
+
+    async def deploy_and_record_event(self, asset_symbol, collection_name, write_buffer: MongoWriteBuffer) -> bool:
+        """
+        Deploy the next event contract of an asset and queue its record insert
+        :param asset_symbol:
+        :param collection_name:
+        :param write_buffer:
+        :return: False if the deploy was refused
+        """
+        job_definition = get_job_definition_by_collection(collection_name)
+        if job_definition is None:
+            return False
+        event_deployer = EventDeployerJobs.build_event_deployer(provider_handler=self.provider_handler,
+                                                                hr_duration=job_definition["hr_duration"],
+                                                                is_test=job_definition["is_test"],
+                                                                job_definition=job_definition)
+        try:
+            price_mark = await asyncio.to_thread(EventDeployerJobs.get_price_mark,
+                                                 mongo_handler=self.mongo_handler,
+                                                 asset_symbol=asset_symbol.upper(),
+                                                 price_cache=self.sync_jobs.price_cache)
+            if price_mark is None:
+                return False
+            compiled_contract_info = await asyncio.to_thread(event_deployer.compile_contract,
+                                                             contract_source_path=event_deployer.contract_source_path)
+            event_deployer.contract_abi = compiled_contract_info["compiled_abi"]
+            sent_txn = await self.send_deploy_txn(
+                event_deployer=event_deployer,
+                compiled_contract_info=compiled_contract_info,
+                constructor_args=EventDeployer.build_constructor_args(price_mark=price_mark,
+                                                                      asset_symbol=asset_symbol))
+        except (StalePriceError, FeeCapExceededError, DeploySimulationError) as e:
+            print(f"Refusing to deploy {asset_symbol} {collection_name} contract: {e}")
+            return False
+
+        # once broadcast the deploy is finished and recorded even if this task is cancelled
+        finish_task = asyncio.ensure_future(self.finish_deploy_and_record(event_deployer=event_deployer,
+                                                                          sent_txn=sent_txn,
+                                                                          asset_symbol=asset_symbol,
+                                                                          collection_name=collection_name,
+                                                                          write_buffer=write_buffer))
+        self._inflight_deploys.add(finish_task)
+        finish_task.add_done_callback(self._inflight_deploys.discard)
+
+        return await asyncio.shield(finish_task)
+
+    async def simulate_deploy_txn(self, event_deployer: EventDeployer, constructor, gas_key,
+                                  asset_symbol) -> Optional[int]:
+        """
+        EventDeployer.simulate_deploy_txn on AsyncWeb3, sharing its simulation cache
+        :param event_deployer:
+        :param constructor: async contract constructor
+        :param gas_key: gas limit cache key of the bytecode
+        :param asset_symbol:
+        :return: gas estimate, None when a gas limit was learned for the bytecode
+        """
+        simulation_key = event_deployer.get_simulation_key(gas_key, asset_symbol)
+        simulation_result = event_deployer.simulation_cache.get(simulation_key)
+
+        if simulation_result is None:
+            txn = {"from": self.provider_handler.get_wallet_address(), "data": constructor.data_in_transaction}
+            try:
+                await self.provider_handler.w3.eth.call(txn, "pending")
+                gas_estimate = None
+                if event_deployer.gas_limit_cache.get(gas_key) is None:
+                    gas_estimate = await self.provider_handler.w3.eth.estimate_gas(txn, "pending")
+            except Exception as e:
+                simulation_result = event_deployer.record_simulation(simulation_key, error=e)
+            else:
+                simulation_result = event_deployer.record_simulation(simulation_key, gas_estimate=gas_estimate)
+
+        return event_deployer.check_simulation_result(simulation_result)["gas_estimate"]
+
+    async def send_deploy_txn(self, event_deployer: EventDeployer, compiled_contract_info: Dict,
+                              constructor_args: Dict) -> Dict:
+        """
+        Simulate, sign and broadcast a deploy txn with a nonce from the async provider's allocator.
+        Like EventDeployer.send_deploy_txn, nonce conflicts and errors before the broadcast are retried with a
+        freshly signed txn after resyncing the allocator, while transport errors of the broadcast resend the
+        same signed txn and a txn whose delivery stays unconfirmed is waited on as sent.
+        :param event_deployer:
+        :param compiled_contract_info: compiled abi and bytecode
+        :param constructor_args: arguments for contract constructor
+        :return: {"txn_hash": ..., "nonce": ..., "gas_key": ...}
+        """
+        w3 = self.provider_handler.w3
+        constructor = w3.eth.contract(abi=compiled_contract_info["compiled_abi"],
+                                      bytecode=compiled_contract_info["compiled_bytecode"]
+                                      ).constructor(**constructor_args)
+        gas_key = GasLimitCache.make_key(compiled_contract_info["compiled_bytecode"])
+
+        gas_estimate = None
+        if event_deployer.simulate_deploys:
+            gas_estimate = await self.simulate_deploy_txn(event_deployer=event_deployer, constructor=constructor,
+                                                          gas_key=gas_key,
+                                                          asset_symbol=constructor_args["_assetSymbol"])
+
+        for attempt in range(SEND_ATTEMPTS):
+            try:
+                fee_params = await self.fee_oracle.get_fee_params_async()
+            except FeeCapExceededError:
+                raise
+            except Exception as e:
+                # ex. a chain without EIP-1559, web3 fills in the gas price
+                print(f"Unable to get fees from the fee oracle: {e}")
+                fee_params = None
+            txn = event_deployer.build_deploy_txn_params(chain_id=await self.provider_handler.get_chain_id(),
+                                                         fee_params=fee_params, gas_key=gas_key,
+                                                         gas_estimate=gas_estimate)
+
+            nonce = await self.provider_handler.allocate_nonce()
+            try:
+                txn["nonce"] = nonce
+                signed_txn = w3.eth.account.sign_transaction(await constructor.build_transaction(txn),
+                                                             private_key=self.provider_handler.get_wallet_private_key())
+                with metrics.timer("send_transaction_seconds"):
+                    txn_hash = await self.provider_handler.send_signed_transaction(signed_txn)
+
+                return {"txn_hash": txn_hash, "nonce": nonce, "gas_key": gas_key}
+            except TransactionDeliveryError as e:
+                print(f"Deploy txn with nonce {nonce} may be pending: {e}")
+                return {"txn_hash": e.txn_hash, "nonce": nonce, "gas_key": gas_key}
+            except Exception as e:
+                print(f"Deploy txn with nonce {nonce} failed, resyncing nonce: {e}")
+                self.provider_handler.resync_nonce()
+                if not is_retryable_error(e) or attempt == SEND_ATTEMPTS - 1:
+                    raise e
+            await asyncio.sleep(SEND_RETRY_WAIT)
+
+    async def finish_deploy_and_record(self, event_deployer: EventDeployer, sent_txn: Dict, asset_symbol,
+                                       collection_name, write_buffer: MongoWriteBuffer, timeout=120) -> bool:
+        """
+        Wait for the receipt of a deploy txn, read the new contract and queue its record insert
+        :return: True
+        """
+        try:
+            with metrics.timer("receipt_wait_seconds"):
+                txn_receipt = await self.provider_handler.w3.eth.wait_for_transaction_receipt(sent_txn["txn_hash"],
+                                                                                              timeout=timeout)
+        except TimeExhausted:
+            # the txn may never have been delivered, the allocator re-reads the nonce from the node
+            self.provider_handler.resync_nonce()
+            raise
+        finally:
+            self.provider_handler.release_nonce(sent_txn["nonce"])
+
+        if txn_receipt['status'] == 0:
+            raise Exception('Transaction failed')
+        event_deployer.gas_limit_cache.record(sent_txn["gas_key"], txn_receipt['gasUsed'])
+
+        async with self.rpc_semaphore:
+            contract_info = await self.contract_reader.get_event_contract_info(
+                contract_address=txn_receipt['contractAddress'], contract_abi=event_deployer.contract_abi)
+        contract_record = await asyncio.to_thread(EventDeployerJobs.build_contract_record,
+                                                  mongo_handler=self.mongo_handler,
+                                                  contract_info=contract_info)
+        write_buffer.insert(collection=collection_name, document=contract_record,
+                            description=f"insert {contract_info['contract_address']}")
+        print(f"Event {asset_symbol} {collection_name} record queued")
+
+        return True
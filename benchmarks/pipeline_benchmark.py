@@ -0,0 +1,158 @@
+"""
+Run the event job pipeline end to end against a local dev chain and an in-memory Mongo, seeded with a
+synthetic backlog of expired events, and report cycle time, RPC requests and Mongo operations.
+
+    anvil &
+    python -m benchmarks.pipeline_benchmark --backlog 20 --cycles 3
+
+The chain is any local dev node exposing evm_increaseTime/evm_mine (anvil, hardhat, ganache); the default
+key is the first anvil dev account. Mongo is mongomock unless --mongo-url is given.
+"""
+import time
+import argparse
+from datetime import datetime
+
+from eth.provider.provider import Provider
+from db.mongo_interface import MongoInterface
+from db.indexes import ensure_indexes
+from db.price_feed import DEFAULT_PRICE_COLLECTIONS
+from job_registry import JOB_REGISTRY, build_job_config
+from jobs import EventDeployerJobs
+from utils.metrics import metrics
+
+ANVIL_DEV_ADDRESS = "0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266"
+ANVIL_DEV_PRIVATE_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
+
+SEED_PRICES = {"BTC": 43000.0, "ETH": 2300.0}
+
+
+def build_mongo_handler(mongo_url, db_name):
+    if mongo_url:
+        return MongoInterface(db_name=db_name, connection_url=mongo_url)
+
+    try:
+        import mongomock
+    except ImportError:
+        raise Exception("mongomock is not installed, pip install mongomock or pass --mongo-url")
+
+    return MongoInterface(db_name=db_name, client=mongomock.MongoClient())
+
+
+def seed_prices(mongo_handler):
+    for asset_symbol, collection_name in DEFAULT_PRICE_COLLECTIONS.items():
+        mongo_handler.insert(collection=collection_name,
+                             document={"price": SEED_PRICES[asset_symbol], "timestamp": datetime.now().timestamp()})
+
+
+def advance_chain_time(provider, seconds):
+    provider.w3.provider.make_request("evm_increaseTime", [int(seconds)])
+    provider.w3.provider.make_request("evm_mine", [])
+
+
+def seed_backlog(provider, mongo_handler, job_configs, backlog_size):
+    """
+    Deploy backlog_size events per asset of every job and expire them, on chain by moving the chain
+    clock past their payout close and in mongo by moving their event_close into the past
+    :param provider:
+    :param mongo_handler:
+    :param job_configs:
+    :param backlog_size: events per asset and job
+    :return: number of expired events awaiting the next pass
+    """
+    deploy_requests = [(asset, params["collection_name"])
+                       for job_config in job_configs
+                       for asset, params in job_config["params"].items()
+                       for _ in range(backlog_size)]
+
+    EventDeployerJobs.deploy_and_record_events(provider_handler=provider,
+                                               mongo_handler=mongo_handler,
+                                               deploy_requests=deploy_requests,
+                                               is_test=False)
+
+    max_duration = max(JOB_REGISTRY[job_config["job_type"]]["hr_duration"] for job_config in job_configs)
+    advance_chain_time(provider, 2 * max_duration * 3600 + 60)
+
+    # events deployed by earlier cycles are expired along with the new backlog
+    expired_close = datetime.now().timestamp() - 1
+    expired_count = 0
+    for collection_name in {params["collection_name"] for job_config in job_configs
+                            for params in job_config["params"].values()}:
+        mongo_handler.db[collection_name].update_many({"is_event_over": False},
+                                                      {"$set": {"event_close": expired_close}})
+        expired_count += mongo_handler.count(collection=collection_name, query={"is_event_over": False})
+
+    return expired_count
+
+
+def run_cycle(event_deployer_jobs, job_configs):
+    metrics.reset()
+    start = time.perf_counter()
+    event_deployer_jobs.run_jobs_pass(job_configs=job_configs)
+
+    return {
+        "cycle_seconds": time.perf_counter() - start,
+        "rpc_requests": metrics.get_counter_by_label("rpc_requests_total", "method"),
+        "mongo_operations": metrics.get_histogram_count_by_label("mongo_operation_seconds", "operation"),
+    }
+
+
+def print_report(cycle_index, report, contract_count):
+    rpc_total = sum(report["rpc_requests"].values())
+    mongo_total = sum(report["mongo_operations"].values())
+    per_contract = max(1, contract_count)
+
+    print(f"cycle {cycle_index}: {report['cycle_seconds']:.2f}s for {contract_count} contracts "
+          f"({report['cycle_seconds'] / per_contract * 1000:.1f}ms/contract)")
+    print(f"  rpc requests: {rpc_total} ({rpc_total / per_contract:.1f}/contract)")
+    for method, count in sorted(report["rpc_requests"].items(), key=lambda item: -item[1]):
+        print(f"    {method}: {count}")
+    print(f"  mongo operations: {mongo_total} ({mongo_total / per_contract:.1f}/contract)")
+    for operation, count in sorted(report["mongo_operations"].items(), key=lambda item: -item[1]):
+        print(f"    {operation}: {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the event job pipeline offline")
+    parser.add_argument("--rpc-url", default="http://127.0.0.1:8545")
+    parser.add_argument("--wallet-address", default=ANVIL_DEV_ADDRESS)
+    parser.add_argument("--private-key", default=ANVIL_DEV_PRIVATE_KEY)
+    parser.add_argument("--mongo-url", default=None, help="real mongo to use instead of mongomock")
+    parser.add_argument("--db-name", default="over_under_benchmark")
+    parser.add_argument("--job-types", nargs="*",
+                        default=[job_type for job_type, job_definition in JOB_REGISTRY.items()
+                                 if not job_definition["is_test"]])
+    parser.add_argument("--backlog", type=int, default=10, help="expired events per asset and job")
+    parser.add_argument("--cycles", type=int, default=1)
+    parser.add_argument("--rpc-concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    metrics.log_events = False
+    provider = Provider(provider_url=args.rpc_url,
+                        wallet_address=args.wallet_address,
+                        wallet_private_key=args.private_key)
+    if not provider.get_is_connected():
+        raise Exception(f"Unable to connect to a local chain at {args.rpc_url}")
+
+    mongo_handler = build_mongo_handler(args.mongo_url, args.db_name)
+    job_configs = [build_job_config(job_type) for job_type in args.job_types]
+    ensure_indexes(mongo_handler=mongo_handler,
+                   event_collections=[params["collection_name"]
+                                      for job_config in job_configs for params in job_config["params"].values()],
+                   price_collections=DEFAULT_PRICE_COLLECTIONS.values())
+    seed_prices(mongo_handler)
+
+    event_deployer_jobs = EventDeployerJobs(job_configs=job_configs,
+                                            provider_handler=provider,
+                                            mongo_handler=mongo_handler,
+                                            rpc_concurrency=args.rpc_concurrency)
+
+    for cycle_index in range(args.cycles):
+        seed_start = time.perf_counter()
+        expired_count = seed_backlog(provider, mongo_handler, job_configs, args.backlog)
+        print(f"Seeded backlog, {expired_count} expired events in {time.perf_counter() - seed_start:.2f}s")
+
+        print_report(cycle_index, run_cycle(event_deployer_jobs, job_configs), expired_count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Compare ContractInfoModel validation with the trusted fast-path serializer on event records
+with large bettor lists.
+
+    python -m benchmarks.serializer_benchmark --bettors 5000 --iterations 200
+"""
+import os
+import time
+import argparse
+from web3 import Web3
+
+from db.schemas.event_schemas import ContractInfoModel
+from db.schemas.event_serializers import serialize_contract_info
+
+
+def build_contract_info(bettor_count):
+    addresses = [Web3.to_checksum_address(os.urandom(20)) for _ in range(bettor_count)]
+    return {
+        "contract_name": "OverUnder6Hour",
+        "contract_address": Web3.to_checksum_address(os.urandom(20)),
+        "contract_abi": [{"type": "function", "name": f"f{i}", "inputs": [], "outputs": []} for i in range(40)],
+        "price_mark": Web3.from_wei(43125_170000000000000000, 'ether'),
+        "asset_symbol": "BTC",
+        "betting_close": 1700000000,
+        "payout_close": 1700021600,
+        "event_close": 1700010800,
+        "contract_balance": Web3.from_wei(12_345678901234567890, 'ether'),
+        "over_betters_balance": Web3.from_wei(7_000000000000000001, 'ether'),
+        "under_betters_balance": Web3.from_wei(5_345678901234567889, 'ether'),
+        "over_betting_payout_modifier": 176,
+        "under_betting_payout_modifier": 230,
+        "over_betters_addresses": addresses[:bettor_count // 2],
+        "under_betters_addresses": addresses[bettor_count // 2:],
+        "is_event_over": False,
+        "is_payout_period_over": False,
+    }
+
+
+def time_per_call(function, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark event record serialization")
+    parser.add_argument("--bettors", type=int, nargs="*", default=[100, 1000, 5000])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    for bettor_count in args.bettors:
+        contract_info = build_contract_info(bettor_count)
+
+        model_time = time_per_call(lambda: ContractInfoModel(**{**contract_info, "abi_id": "abi"}).dict(
+            exclude={"contract_abi"}), args.iterations)
+        fast_time = time_per_call(lambda: serialize_contract_info(contract_info, abi_id="abi"), args.iterations)
+
+        fast_record = serialize_contract_info(contract_info, abi_id="abi")
+        model_record = ContractInfoModel(**{**contract_info, "abi_id": "abi"}).dict(exclude={"contract_abi"})
+        print(f"{bettor_count} bettors: model {model_time * 1e6:.1f}us, fast path {fast_time * 1e6:.1f}us "
+              f"({model_time / fast_time:.1f}x) | contract_balance model={model_record['contract_balance']!r} "
+              f"fast={fast_record['contract_balance']}")
+
+
+if __name__ == '__main__':
+    main()
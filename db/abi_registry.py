@@ -0,0 +1,84 @@
+from typing import Dict, List, Optional
+import json
+import hashlib
+import threading
+import weakref
+
+from .mongo_interface import MongoInterface
+
+
+class AbiRegistry:
+    """
+    Stores each distinct contract ABI once in the contract_abis collection, keyed by its hash,
+    so event contract records only need to carry the abi_id.
+    """
+
+    _registries = weakref.WeakKeyDictionary()
+
+    def __init__(self, mongo_handler: MongoInterface, collection="contract_abis"):
+        self.mongo_handler = mongo_handler
+        self.collection = collection
+        self._abis: Dict[str, List] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_mongo_handler(cls, mongo_handler: MongoInterface) -> "AbiRegistry":
+        """
+        Get the shared registry of a mongo handler, so its ABI cache lives as long as the handler
+        :param mongo_handler:
+        :return: AbiRegistry
+        """
+        registry = cls._registries.get(mongo_handler)
+        if registry is None:
+            registry = cls(mongo_handler=mongo_handler)
+            cls._registries[mongo_handler] = registry
+
+        return registry
+
+    @staticmethod
+    def hash_abi(abi: List) -> str:
+        """
+        Get the content hash of an ABI
+        :param abi: contract ABI
+        :return: hex sha256 digest of the canonical ABI json
+        """
+        return hashlib.sha256(json.dumps(abi, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+    def register(self, abi: List) -> str:
+        """
+        Store an ABI if it is not already registered
+        :param abi: contract ABI
+        :return: abi_id
+        """
+        abi_id = self.hash_abi(abi)
+        with self._lock:
+            if abi_id in self._abis:
+                return abi_id
+
+        self.mongo_handler.update(collection=self.collection,
+                                  query={"_id": abi_id},
+                                  document={"$setOnInsert": {"abi": abi}},
+                                  upsert=True)
+        with self._lock:
+            self._abis[abi_id] = abi
+
+        return abi_id
+
+    def get(self, abi_id: str) -> Optional[List]:
+        """
+        Get a registered ABI
+        :param abi_id:
+        :return: contract ABI or None
+        """
+        with self._lock:
+            if abi_id in self._abis:
+                return self._abis[abi_id]
+
+        abi_record = self.mongo_handler.find_one(collection=self.collection, query={"_id": abi_id})
+        if abi_record is None:
+            return None
+
+        with self._lock:
+            self._abis[abi_id] = abi_record["abi"]
+
+        return abi_record["abi"]
@@ -0,0 +1,37 @@
+import asyncio
+
+from .mongo_interface import MongoInterface
+
+
+class AsyncMongoInterface:
+    """
+    Awaitable wrapper around MongoInterface for the async job engine. Every operation runs on a worker
+    thread with the blocking driver, so mongo round-trips overlap with RPC requests on the event loop.
+    Cursors are read to the end on the worker thread.
+    """
+
+    def __init__(self, mongo_handler: MongoInterface):
+        self.mongo_handler = mongo_handler
+
+    async def find(self, collection, query, projection=None, sort=None) -> list:
+        return await asyncio.to_thread(
+            lambda: list(self.mongo_handler.find(collection=collection, query=query, projection=projection,
+                                                 sort=sort)))
+
+    async def find_one(self, collection, query, projection=None, sort=None):
+        return await asyncio.to_thread(self.mongo_handler.find_one, collection=collection, query=query,
+                                       projection=projection, sort=sort)
+
+    async def exists(self, collection, query, projection=None) -> bool:
+        return await asyncio.to_thread(self.mongo_handler.exists, collection=collection, query=query,
+                                       projection=projection)
+
+    async def insert(self, collection, document):
+        return await asyncio.to_thread(self.mongo_handler.insert, collection=collection, document=document)
+
+    async def update(self, collection, query, document, upsert=False):
+        return await asyncio.to_thread(self.mongo_handler.update, collection=collection, query=query,
+                                       document=document, upsert=upsert)
+
+    async def delete(self, collection, query):
+        return await asyncio.to_thread(self.mongo_handler.delete, collection=collection, query=query)
@@ -0,0 +1,73 @@
+from typing import Dict, Iterable
+import time
+import threading
+from pymongo.errors import PyMongoError
+
+from utils.scheduler import DeadlineScheduler
+from .mongo_interface import MongoInterface
+
+# Event record deadlines the job runner wakes up for
+EVENT_DEADLINE_FIELDS = ["betting_close", "event_close"]
+
+
+class EventInsertFeed:
+    """
+    Schedules the deadlines of event records as they are inserted, fed by a change stream on each
+    event_contracts_* collection, so events recorded by another process (ex. reconcile.py) shorten the
+    job runner's sleep. Without change streams (standalone servers) they are scheduled after the next pass.
+    """
+
+    def __init__(self, mongo_handler: MongoInterface, scheduler: DeadlineScheduler, event_collections: Iterable[str],
+                 retry_interval=60.0):
+        self.mongo_handler = mongo_handler
+        self.scheduler = scheduler
+        self.event_collections = sorted(set(event_collections))
+        self.retry_interval = retry_interval
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for collection_name in self.event_collections:
+            feed_thread = threading.Thread(target=self._feed, args=(collection_name,),
+                                           name=f"event-feed-{collection_name}", daemon=True)
+            feed_thread.start()
+            self._threads.append(feed_thread)
+
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+
+    def schedule_event_record(self, collection_name, event_record: Dict, now=None):
+        """
+        Schedule the upcoming deadlines of an open event record
+        :param collection_name:
+        :param event_record:
+        :param now: unix timestamp, defaults to current time
+        :return:
+        """
+        if event_record.get("is_event_over"):
+            return
+        now = time.time() if now is None else now
+        for deadline_field in EVENT_DEADLINE_FIELDS:
+            deadline = event_record.get(deadline_field)
+            if deadline is not None and deadline > now:
+                self.scheduler.add_deadline(timestamp=deadline,
+                                            label=f"{event_record.get('asset_symbol')} {collection_name} "
+                                                  f"{deadline_field}")
+
+    def _feed(self, collection_name):
+        while not self._stop_event.is_set():
+            try:
+                with self.mongo_handler.watch(collection=collection_name,
+                                              pipeline=[{"$match": {"operationType": "insert"}}]) as stream:
+                    print(f"Watching {collection_name} for new events...")
+                    while not self._stop_event.is_set():
+                        change = stream.try_next()
+                        if change is not None:
+                            self.schedule_event_record(collection_name, change["fullDocument"])
+                        else:
+                            self._stop_event.wait(0.5)
+            except PyMongoError as e:
+                print(f"Change stream on {collection_name} unavailable, retrying in {self.retry_interval:.0f}s: {e}")
+                self._stop_event.wait(self.retry_interval)
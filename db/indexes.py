@@ -0,0 +1,66 @@
+from typing import Iterable
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
+
+from .mongo_interface import MongoInterface
+
+# Equality fields first, range field last, so the job queries on
+# {asset_symbol, is_event_over, event_close} are served (and covered) by one index,
+# and the scheduler's next betting_close lookup by another
+EVENT_CONTRACT_INDEXES = [
+    ([("asset_symbol", ASCENDING), ("is_event_over", ASCENDING), ("event_close", ASCENDING)],
+     {"name": "asset_symbol_is_event_over_event_close"}),
+    ([("asset_symbol", ASCENDING), ("is_event_over", ASCENDING), ("betting_close", ASCENDING)],
+     {"name": "asset_symbol_is_event_over_betting_close"}),
+    ([("contract_address", ASCENDING)],
+     {"name": "contract_address_unique", "unique": True}),
+    # one index per branch of the bettor log indexer's $or over the live records
+    ([("is_event_over", ASCENDING), ("event_close", ASCENDING)],
+     {"name": "is_event_over_event_close"}),
+    ([("payout_close", ASCENDING)],
+     {"name": "payout_close"}),
+    ([("event_close", ASCENDING)],
+     {"name": "event_close"}),
+    # settlement's unsettled closed out records, settled ones are skipped in the index
+    ([("is_event_over", ASCENDING), ("settlement_status", ASCENDING), ("event_close", ASCENDING)],
+     {"name": "is_event_over_settlement_status_event_close"}),
+    # pending factory events, only the few records still pending are kept in the index
+    ([("deploy_status", ASCENDING)],
+     {"name": "deploy_status_pending", "partialFilterExpression": {"deploy_status": "pending"}}),
+]
+
+LIVE_PRICE_INDEXES = [
+    ([("timestamp", DESCENDING)],
+     {"name": "timestamp_desc"}),
+]
+
+# One document per bettor of a contract in the bettor index maintained from contract logs
+BETTOR_INDEXES = [
+    ([("contract_address", ASCENDING), ("bettor_address", ASCENDING)],
+     {"name": "contract_address_bettor_address_unique", "unique": True}),
+]
+
+# Projection for "is anything ongoing?" checks that can be answered from the compound index alone
+EVENT_STATUS_COVERED_PROJECTION = {"_id": 0, "asset_symbol": 1, "is_event_over": 1, "event_close": 1}
+
+
+def ensure_indexes(mongo_handler: MongoInterface, event_collections: Iterable[str], price_collections: Iterable[str],
+                   bettor_collections: Iterable[str] = ()):
+    """
+    Create the indexes the job queries rely on. create_index is a no-op for existing indexes.
+    :param mongo_handler:
+    :param event_collections: event_contracts_* collection names
+    :param price_collections: *_live_price collection names
+    :param bettor_collections: bettor index collection names
+    :return:
+    """
+    index_specs = [(collection, EVENT_CONTRACT_INDEXES) for collection in sorted(set(event_collections))]
+    index_specs += [(collection, LIVE_PRICE_INDEXES) for collection in sorted(set(price_collections))]
+    index_specs += [(collection, BETTOR_INDEXES) for collection in sorted(set(bettor_collections))]
+
+    for collection, indexes in index_specs:
+        for keys, options in indexes:
+            try:
+                mongo_handler.create_index(collection=collection, keys=keys, **options)
+            except PyMongoError as e:
+                print(f"Unable to create index {options['name']} on {collection}: {e}")
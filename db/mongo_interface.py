@@ -1,65 +1,121 @@
+import functools
 from pymongo import MongoClient
 
+from utils.metrics import metrics
+
+
+def instrumented(function):
+    # times each call by operation and collection; cursor returning calls are timed up to cursor creation
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        collection = kwargs.get("collection", args[0] if args else None)
+        with metrics.timer("mongo_operation_seconds", labels={"operation": function.__name__,
+                                                              "collection": collection}):
+            return function(self, *args, **kwargs)
+    return wrapper
+
 
 class MongoInterface:
-    def __init__(self, db_name, host=None, port=None, connection_url=None):
-        if connection_url:
+    def __init__(self, db_name, host=None, port=None, connection_url=None, client=None):
+        # an existing client (ex. mongomock.MongoClient for offline benchmarks) takes precedence
+        self.client = client
+        if client is None and connection_url:
             self.client = MongoClient(connection_url)
-        if host and port:
+        if client is None and host and port:
             self.client = MongoClient(host, port)
 
         self.db = self.client[db_name]
 
+    @instrumented
     def insert(self, collection, document):
         return self.db[collection].insert_one(document)
 
-    def find(self, collection, query):
-        return self.db[collection].find(query)
+    @instrumented
+    def find(self, collection, query, projection=None, sort=None, batch_size=0):
+        return self.db[collection].find(query, projection=projection, sort=sort, batch_size=batch_size)
+
+    @instrumented
+    def find_one(self, collection, query, projection=None, sort=None):
+        return self.db[collection].find_one(query, projection=projection, sort=sort)
 
-    def find_one(self, collection, query):
-        return self.db[collection].find_one(query)
+    @instrumented
+    def count(self, collection, query, limit=None):
+        if limit is not None:
+            return self.db[collection].count_documents(query, limit=limit)
+        return self.db[collection].count_documents(query)
 
+    @instrumented
+    def exists(self, collection, query, projection=None):
+        return self.db[collection].find_one(query, projection=projection or {"_id": 1}) is not None
+
+    @instrumented
     def find_one_sorted(self, collection, query):
         return self.db[collection].find_one(sort=query)
 
-    def update(self, collection, query, document):
-        return self.db[collection].update_one(query, document)
+    @instrumented
+    def update(self, collection, query, document, upsert=False):
+        return self.db[collection].update_one(query, document, upsert=upsert)
+
+    @instrumented
+    def bulk_write(self, collection, operations, ordered=False):
+        return self.db[collection].bulk_write(operations, ordered=ordered)
 
+    @instrumented
     def delete(self, collection, query):
         return self.db[collection].delete_one(query)
 
+    @instrumented
     def delete_many(self, collection, query):
         return self.db[collection].delete_many(query)
 
+    @instrumented
+    def watch(self, collection, pipeline=None, **kwargs):
+        return self.db[collection].watch(pipeline, **kwargs)
+
+    @instrumented
+    def create_index(self, collection, keys, **kwargs):
+        return self.db[collection].create_index(keys, **kwargs)
+
+    @instrumented
     def drop(self, collection):
         return self.db[collection].drop()
 
+    @instrumented
     def get_all(self, collection):
         return self.db[collection].find()
 
+    @instrumented
     def get_all_sorted(self, collection, sort_key, sort_order):
         return self.db[collection].find().sort(sort_key, sort_order)
 
+    @instrumented
     def get_all_sorted_limit(self, collection, sort_key, sort_order, limit):
         return self.db[collection].find().sort(sort_key, sort_order).limit(limit)
 
+    @instrumented
     def get_all_sorted_limit_skip(self, collection, sort_key, sort_order, limit, skip):
         return self.db[collection].find().sort(sort_key, sort_order).limit(limit).skip(skip)
 
+    @instrumented
     def get_all_limit(self, collection, limit):
         return self.db[collection].find().limit(limit)
 
+    @instrumented
     def get_all_limit_skip(self, collection, limit, skip):
         return self.db[collection].find().limit(limit).skip(skip)
 
+    @instrumented
     def get_all_skip(self, collection, skip):
         return self.db[collection].find().skip(skip)
 
+    @instrumented
     def get_all_sorted_limit_skip_projection(self, collection, sort_key, sort_order, limit, skip, projection):
         return self.db[collection].find(projection=projection).sort(sort_key, sort_order).limit(limit).skip(skip)
 
+    @instrumented
     def get_all_sorted_limit_projection(self, collection, sort_key, sort_order, limit, projection):
         return self.db[collection].find(projection=projection).sort(sort_key, sort_order).limit(limit)
 
+    @instrumented
     def get_all_sorted_projection(self, collection, sort_key, sort_order, projection):
         return self.db[collection].find(projection=projection).sort(sort_key, sort_order)
\ No newline at end of file
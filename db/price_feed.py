@@ -0,0 +1,199 @@
+from typing import Dict, Optional
+import time
+import threading
+from datetime import datetime
+from pymongo.errors import PyMongoError
+
+from utils.time_conversions import convert_iso_to_timestamp
+from .mongo_interface import MongoInterface
+
+DEFAULT_PRICE_COLLECTIONS = {
+    "BTC": "btc_live_price",
+    "ETH": "eth_live_price"
+}
+
+
+class StalePriceError(Exception):
+    pass
+
+
+def parse_price_collections(price_collections_config: Optional[str]) -> Dict[str, str]:
+    """
+    Parse a symbol to collection map from config (ex. 'BTC:btc_live_price,ETH:eth_live_price')
+    :param price_collections_config:
+    :return: {symbol: collection_name}
+    """
+    if not price_collections_config:
+        return dict(DEFAULT_PRICE_COLLECTIONS)
+
+    price_collections = {}
+    for entry in price_collections_config.split(","):
+        symbol, collection_name = entry.split(":")
+        price_collections[symbol.strip().upper()] = collection_name.strip()
+
+    return price_collections
+
+
+def get_price_timestamp(price_record) -> Optional[float]:
+    """
+    Get the unix timestamp of a live price record
+    :param price_record:
+    :return: timestamp in seconds or None if the record has no usable timestamp
+    """
+    timestamp = price_record.get("timestamp")
+    try:
+        if isinstance(timestamp, datetime):
+            return timestamp.timestamp()
+        if isinstance(timestamp, str):
+            return convert_iso_to_timestamp(timestamp)
+        if isinstance(timestamp, (int, float)):
+            # millisecond timestamps
+            return timestamp / 1000 if timestamp > 1e12 else float(timestamp)
+    except ValueError:
+        return None
+
+    return None
+
+
+def get_prices_at_close(mongo_handler: MongoInterface, collection_name, close_times, max_gap=900) -> Dict:
+    """
+    Look up the last price at or before each close time with a single newest-first scan of a price collection
+    :param mongo_handler:
+    :param collection_name: *_live_price collection
+    :param close_times: close timestamps in seconds
+    :param max_gap: max seconds between a close time and the price used for it
+    :return: {close_time: price} for the close times a price was found for
+    """
+    pending_close_times = sorted(set(close_times), reverse=True)
+    prices = {}
+    if not pending_close_times:
+        return prices
+
+    price_records = mongo_handler.find(collection=collection_name, query={},
+                                       projection={"_id": 0, "price": 1, "timestamp": 1},
+                                       sort=[("timestamp", -1)], batch_size=500)
+    for price_record in price_records:
+        price_timestamp = get_price_timestamp(price_record)
+        if price_timestamp is None:
+            continue
+        while pending_close_times and price_timestamp <= pending_close_times[0]:
+            close_time = pending_close_times.pop(0)
+            if close_time - price_timestamp <= max_gap:
+                prices[close_time] = price_record["price"]
+        if not pending_close_times:
+            break
+
+    return prices
+
+
+class LatestPriceCache:
+    """
+    In-process cache of the latest price per asset symbol, fed by a change stream on each
+    *_live_price collection, or by polling when change streams are unavailable (standalone servers).
+    """
+
+    def __init__(self, mongo_handler: MongoInterface, price_collections: Optional[Dict[str, str]] = None,
+                 max_age=300.0, poll_interval=10.0):
+        self.mongo_handler = mongo_handler
+        self.price_collections = price_collections or dict(DEFAULT_PRICE_COLLECTIONS)
+        self.max_age = max_age
+        self.poll_interval = poll_interval
+        self._prices: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for symbol, collection_name in self.price_collections.items():
+            self.refresh(symbol)
+            feed_thread = threading.Thread(target=self._feed, args=(symbol, collection_name),
+                                           name=f"price-feed-{symbol}", daemon=True)
+            feed_thread.start()
+            self._threads.append(feed_thread)
+
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+
+    def refresh(self, symbol):
+        """
+        Load the latest price record of a symbol from its collection
+        :param symbol:
+        :return:
+        """
+        price_record = self.mongo_handler.find_one_sorted(collection=self.price_collections[symbol],
+                                                          query=[("timestamp", -1)])
+        if price_record is not None:
+            self._set_price(symbol, price_record)
+
+    def _set_price(self, symbol, price_record):
+        received_at = time.time()
+        price_timestamp = get_price_timestamp(price_record)
+        with self._lock:
+            current = self._prices.get(symbol)
+            if current is not None and price_timestamp is not None and current["timestamp"] is not None \
+                    and price_timestamp < current["timestamp"]:
+                return
+            self._prices[symbol] = {"price": price_record["price"],
+                                    "timestamp": price_timestamp,
+                                    "received_at": received_at}
+
+    def _feed(self, symbol, collection_name):
+        while not self._stop_event.is_set():
+            try:
+                with self.mongo_handler.watch(collection=collection_name,
+                                              pipeline=[{"$match": {"operationType": "insert"}}]) as stream:
+                    print(f"Watching {collection_name} for {symbol} prices...")
+                    while not self._stop_event.is_set():
+                        change = stream.try_next()
+                        if change is not None:
+                            self._set_price(symbol, change["fullDocument"])
+                        else:
+                            self._stop_event.wait(0.5)
+            except PyMongoError as e:
+                print(f"Change stream on {collection_name} unavailable, polling instead: {e}")
+                self._poll(symbol)
+
+    def _poll(self, symbol):
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.refresh(symbol)
+            except PyMongoError as e:
+                print(f"Unable to poll {symbol} price: {e}")
+
+    def get_age(self, symbol) -> Optional[float]:
+        """
+        Age in seconds of the cached price, measured from the price timestamp when available
+        :param symbol:
+        :return: seconds or None if no price is cached
+        """
+        with self._lock:
+            latest = self._prices.get(symbol)
+        if latest is None:
+            return None
+
+        observed_at = latest["timestamp"] if latest["timestamp"] is not None else latest["received_at"]
+
+        return max(0.0, time.time() - observed_at)
+
+    def is_fresh(self, symbol, max_age=None) -> bool:
+        age = self.get_age(symbol)
+        return age is not None and age <= (self.max_age if max_age is None else max_age)
+
+    def get_price(self, symbol, max_age=None) -> float:
+        """
+        Get the latest price of a symbol, refusing stale prices
+        :param symbol:
+        :param max_age: max accepted price age in seconds, defaults to the cache max_age
+        :return: price
+        """
+        symbol = symbol.upper()
+        if symbol not in self.price_collections:
+            raise Exception(f"No price collection configured for {symbol}")
+
+        if not self.is_fresh(symbol, max_age=max_age):
+            raise StalePriceError(f"Latest {symbol} price is stale (age: {self.get_age(symbol)}s)")
+
+        with self._lock:
+            return self._prices[symbol]["price"]
@@ -5,7 +5,8 @@ from pydantic import BaseModel, Field
 class ContractInfoModel(BaseModel):
     contract_name: Optional[str] = Field(..., description="Name of the contract")
     contract_address: Optional[str] = Field(..., description="Address of the contract")
-    contract_abi: Optional[List] = Field(..., description="ABI of the contract")
+    contract_abi: Optional[List] = Field(None, description="ABI of the contract")
+    abi_id: Optional[str] = Field(None, description="Id of the contract ABI in the ABI registry")
     price_mark: Optional[float] = Field(..., description="Price mark of the contract")
     asset_symbol: Optional[str] = Field(..., description="Symbol of the asset")
     betting_close: Optional[int] = Field(..., description="Timestamp of the betting close")
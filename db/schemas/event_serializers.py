@@ -0,0 +1,71 @@
+from typing import Dict, Optional
+from decimal import Decimal
+from bson.decimal128 import Decimal128
+
+# Largest integer mongo stores as a native int64
+MAX_INT64 = 2 ** 63 - 1
+# Decimal128 limits for the direct BID encoding: 34 digit coefficient, biased exponent
+MAX_DECIMAL128_COEFFICIENT = 10 ** 34 - 1
+DECIMAL128_EXPONENT_BIAS = 6176
+DECIMAL128_MAX_EXPONENT = 6111
+LOW_64_MASK = 2 ** 64 - 1
+
+# Ether amounts (Web3.from_wei Decimals), stored exactly as Decimal128
+ETHER_FIELDS = ["price_mark", "contract_balance", "over_betters_balance", "under_betters_balance"]
+# Raw uint values, stored as int64 or Decimal128 when they do not fit
+UINT_FIELDS = ["betting_close", "payout_close", "event_close",
+               "over_betting_payout_modifier", "under_betting_payout_modifier"]
+BOOL_FIELDS = ["is_event_over", "is_payout_period_over"]
+# Passed through as-is, lists are not copied
+PASSTHROUGH_FIELDS = ["contract_name", "contract_address", "asset_symbol",
+                      "over_betters_addresses", "under_betters_addresses"]
+
+
+def to_decimal128(value) -> Optional[Decimal128]:
+    if value is None or isinstance(value, Decimal128):
+        return value
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value)) if isinstance(value, float) else Decimal(value)
+
+    # encode the BID halves directly, Decimal128(Decimal) is several times slower
+    sign, _, exponent = value.as_tuple()
+    if not isinstance(exponent, int) or not -DECIMAL128_EXPONENT_BIAS <= exponent <= DECIMAL128_MAX_EXPONENT:
+        return Decimal128(value)
+    coefficient = abs(int(value.scaleb(-exponent)))
+    if coefficient > MAX_DECIMAL128_COEFFICIENT:
+        return Decimal128(value)
+
+    high = (sign << 63) | ((exponent + DECIMAL128_EXPONENT_BIAS) << 49) | (coefficient >> 64)
+
+    return Decimal128((high, coefficient & LOW_64_MASK))
+
+
+def to_uint_record(value):
+    if value is None:
+        return None
+    value = int(value)
+
+    return value if value <= MAX_INT64 else Decimal128(Decimal(value))
+
+
+def serialize_contract_info(contract_info: Dict, abi_id=None) -> Dict:
+    """
+    Build an event contract record from trusted contract info without pydantic validation.
+    Use for data straight from EventContractInterface.get_event_contract_info; the contract ABI
+    is never embedded, it is referenced by abi_id
+    :param contract_info: contract info from EventContractInterface.get_event_contract_info
+    :param abi_id: id of the contract ABI in the ABI registry
+    :return: record document
+    """
+    get = contract_info.get
+    record = {field: get(field) for field in PASSTHROUGH_FIELDS}
+    record["abi_id"] = abi_id if abi_id is not None else get("abi_id")
+    for field in ETHER_FIELDS:
+        record[field] = to_decimal128(get(field))
+    for field in UINT_FIELDS:
+        record[field] = to_uint_record(get(field))
+    for field in BOOL_FIELDS:
+        value = get(field)
+        record[field] = bool(value) if value is not None else None
+
+    return record
@@ -0,0 +1,95 @@
+from typing import Dict, List
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from utils.metrics import metrics
+from .mongo_interface import MongoInterface
+
+
+class MongoWriteBuffer:
+    """
+    Collects insert/update operations per collection over a job cycle and flushes each
+    collection in a single unordered bulk_write.
+    """
+
+    def __init__(self, mongo_handler: MongoInterface):
+        self.mongo_handler = mongo_handler
+        self.operations: Dict[str, List] = {}
+        self.descriptions: Dict[str, List[str]] = {}
+        self.queries: Dict[str, List] = {}
+
+    def insert(self, collection, document, description=None):
+        self._add(collection, InsertOne(document), description or "insert", None)
+
+    def update(self, collection, query, document, upsert=False, description=None):
+        self._add(collection, UpdateOne(query, document, upsert=upsert), description or f"update {query}", query)
+
+    def _add(self, collection, operation, description, query):
+        self.operations.setdefault(collection, []).append(operation)
+        self.descriptions.setdefault(collection, []).append(description)
+        self.queries.setdefault(collection, []).append(query)
+
+    def __len__(self):
+        return sum(len(operations) for operations in self.operations.values())
+
+    def flush(self) -> Dict:
+        """
+        Write all buffered operations, one bulk_write per collection. Failed operations are logged, counted
+        in mongo_write_errors_total and reported with their description and update query.
+        The buffer is emptied even if the flush raises.
+        :return: {collection: {"inserted": n, "matched": n, "modified": n, "upserted": n,
+                               "errors": [{"op": ..., "query": ..., "code": ..., "message": ...}, ...]}}
+        """
+        flush_results = {}
+        try:
+            for collection, operations in self.operations.items():
+                descriptions = self.descriptions[collection]
+                queries = self.queries[collection]
+                try:
+                    bulk_result = self.mongo_handler.bulk_write(collection=collection, operations=operations,
+                                                                ordered=False)
+                    result = {"inserted": bulk_result.inserted_count,
+                              "matched": bulk_result.matched_count,
+                              "modified": bulk_result.modified_count,
+                              "upserted": bulk_result.upserted_count,
+                              "errors": []}
+                except BulkWriteError as e:
+                    details = e.details
+                    result = {"inserted": details.get("nInserted", 0),
+                              "matched": details.get("nMatched", 0),
+                              "modified": details.get("nModified", 0),
+                              "upserted": details.get("nUpserted", 0),
+                              "errors": [{"op": descriptions[write_error["index"]],
+                                          "query": queries[write_error["index"]],
+                                          "code": write_error.get("code"),
+                                          "message": write_error.get("errmsg")}
+                                         for write_error in details.get("writeErrors", [])]}
+
+                print(f"Flushed {len(operations)} {collection} writes: {result['inserted']} inserted, "
+                      f"{result['modified']} modified, {len(result['errors'])} failed")
+                for error in result["errors"]:
+                    print(f"{collection} write failed ({error['op']}): {error['message']}")
+                if result["errors"]:
+                    metrics.increment("mongo_write_errors_total", value=len(result["errors"]),
+                                      labels={"collection": collection})
+
+                flush_results[collection] = result
+        finally:
+            # the operations are dropped even when a flush raises, so a failed flush is never replayed
+            # on top of the writes it already made
+            self.operations = {}
+            self.descriptions = {}
+            self.queries = {}
+
+        return flush_results
+
+    @staticmethod
+    def get_failed_queries(flush_results: Dict, collection) -> List[Dict]:
+        """
+        Queries of the updates of a collection that failed in a flush
+        :param flush_results: result of flush
+        :param collection:
+        :return: [query, ...]
+        """
+        return [error["query"] for error in flush_results.get(collection, {}).get("errors", [])
+                if error.get("query") is not None]
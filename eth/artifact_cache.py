@@ -0,0 +1,132 @@
+from typing import Dict, Optional
+import os
+import re
+import json
+import hashlib
+import threading
+
+DEFAULT_ARTIFACT_DIR = os.path.join(os.path.dirname(__file__), "contracts/artifacts")
+
+
+class ArtifactCache:
+    """
+    Content-addressed store of compiled contract artifacts (abi + bytecode).
+    Artifacts are keyed by source hash, solc version and contract name, kept in memory
+    and mirrored to disk so that process restarts skip the compiler entirely.
+    """
+
+    def __init__(self, artifact_dir: str = DEFAULT_ARTIFACT_DIR):
+        self.artifact_dir = artifact_dir
+        self._artifacts = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def hash_source(contract_source_path) -> str:
+        """
+        Hash the contents of a contract source file
+        :param contract_source_path: path to contract source file
+        :return: hex sha256 digest of the source
+        """
+        with open(contract_source_path, "rb") as source_file:
+            return hashlib.sha256(source_file.read()).hexdigest()
+
+    @staticmethod
+    def make_key(source_hash, solc_version, contract_name) -> str:
+        """
+        Build the artifact key
+        :param source_hash: sha256 digest of the contract source
+        :param solc_version: version of solc used to compile the source
+        :param contract_name: name of the contract within the source file
+        :return: artifact key
+        """
+        return f"{contract_name.lstrip(':')}-{solc_version}-{source_hash}"
+
+    def get(self, source_hash, solc_version, contract_name) -> Optional[Dict]:
+        """
+        Get a compiled artifact from memory, falling back to the on-disk store
+        :param source_hash: sha256 digest of the contract source
+        :param solc_version: version of solc used to compile the source
+        :param contract_name: name of the contract within the source file
+        :return: {"compiled_bytecode": ..., "compiled_abi": ...} or None
+        """
+        key = self.make_key(source_hash, solc_version, contract_name)
+        with self._lock:
+            artifact = self._artifacts.get(key)
+            if artifact is not None:
+                return artifact
+
+            artifact_path = os.path.join(self.artifact_dir, f"{key}.json")
+            if not os.path.isfile(artifact_path):
+                return None
+
+            try:
+                with open(artifact_path, "r") as artifact_file:
+                    artifact = json.load(artifact_file)
+            except (OSError, ValueError) as e:
+                print(f"Unable to read contract artifact {artifact_path}: {e}")
+                return None
+
+            self._artifacts[key] = artifact
+            return artifact
+
+    def find(self, source_hash, contract_name, version_filter) -> Optional[Dict]:
+        """
+        Find an artifact for the source compiled by any solc version accepted by version_filter
+        :param source_hash: sha256 digest of the contract source
+        :param contract_name: name of the contract within the source file
+        :param version_filter: callable taking a solc version string and returning bool
+        :return: {"compiled_bytecode": ..., "compiled_abi": ...} or None
+        """
+        prefix = f"{contract_name.lstrip(':')}-"
+        suffix = f"-{source_hash}"
+
+        # put writes _artifacts from deploy threads, take a snapshot of its keys under the lock
+        with self._lock:
+            keys = set(self._artifacts.keys())
+        if os.path.isdir(self.artifact_dir):
+            keys.update(file_name[:-len(".json")] for file_name in os.listdir(self.artifact_dir)
+                        if file_name.endswith(".json"))
+
+        solc_versions = [key[len(prefix):-len(suffix)] for key in keys
+                         if key.startswith(prefix) and key.endswith(suffix)]
+        solc_versions = [solc_version for solc_version in solc_versions if version_filter(solc_version)]
+        if not solc_versions:
+            return None
+
+        newest_version = max(solc_versions,
+                             key=lambda version: [int(part) for part in re.findall(r"\d+", version)[:3]])
+
+        return self.get(source_hash, newest_version, contract_name)
+
+    def put(self, source_hash, solc_version, contract_name, artifact: Dict) -> Dict:
+        """
+        Store a compiled artifact in memory and on disk
+        :param source_hash: sha256 digest of the contract source
+        :param solc_version: version of solc used to compile the source
+        :param contract_name: name of the contract within the source file
+        :param artifact: {"compiled_bytecode": ..., "compiled_abi": ...}
+        :return: artifact
+        """
+        key = self.make_key(source_hash, solc_version, contract_name)
+        with self._lock:
+            self._artifacts[key] = artifact
+
+            try:
+                os.makedirs(self.artifact_dir, exist_ok=True)
+                artifact_path = os.path.join(self.artifact_dir, f"{key}.json")
+                tmp_path = f"{artifact_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w") as artifact_file:
+                    json.dump(artifact, artifact_file)
+                os.replace(tmp_path, artifact_path)
+            except OSError as e:
+                print(f"Unable to write contract artifact {key}: {e}")
+
+        return artifact
+
+    def clear(self):
+        with self._lock:
+            self._artifacts.clear()
+
+
+# shared cache, run_jobs points it at CONTRACT_ARTIFACT_DIR from the .env config
+artifact_cache = ArtifactCache()
@@ -0,0 +1,45 @@
+from collections import OrderedDict
+import threading
+
+
+class ContractFactoryCache:
+    """
+    LRU of web3 contract factories keyed by (w3 instance, abi_id), so contract handles for
+    known ABIs are built without re-processing the ABI.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._factories = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, w3, abi_id, abi_loader):
+        """
+        Get the contract factory for an ABI, building it on a miss
+        :param w3: Web3 instance the factory is bound to
+        :param abi_id: ABI registry id
+        :param abi_loader: callable returning the ABI for abi_id
+        :return: web3 contract factory
+        """
+        key = (id(w3), abi_id)
+        with self._lock:
+            cached = self._factories.get(key)
+            if cached is not None and cached[0] is w3:
+                self._factories.move_to_end(key)
+                return cached[1]
+
+        abi = abi_loader(abi_id)
+        if abi is None:
+            raise Exception(f"ABI {abi_id} not found")
+        contract_factory = w3.eth.contract(abi=abi)
+
+        with self._lock:
+            self._factories[key] = (w3, contract_factory)
+            self._factories.move_to_end(key)
+            while len(self._factories) > self.maxsize:
+                self._factories.popitem(last=False)
+
+        return contract_factory
+
+
+contract_factory_cache = ContractFactoryCache()
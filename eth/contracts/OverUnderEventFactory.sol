@@ -0,0 +1,90 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.18;
+
+interface IOverUnderCloneable {
+    function initialize(address _manager, uint256 _priceMark, string calldata _assetSymbol) external;
+
+    function getBettingClose() external view returns (uint256);
+
+    function getEventClose() external view returns (uint256);
+
+    function payoutClose() external view returns (uint256);
+}
+
+// Creates betting events as EIP-1167 minimal proxies of a cloneable event implementation.
+// Clones are created with CREATE2, so their addresses are known before the creation txn is mined.
+contract OverUnderEventFactory {
+    // owner creates the events and is the manager of every clone
+    address public immutable owner;
+    // cloneable event contract every event delegates to
+    address public immutable implementation;
+
+    // Emitted for every event, with the closes set by initialize
+    event EventCreated(
+        address indexed eventContract,
+        bytes32 indexed salt,
+        uint256 priceMark,
+        uint256 bettingClose,
+        uint256 eventClose,
+        uint256 payoutClose
+    );
+
+    constructor(address _implementation) {
+        owner = msg.sender;
+        implementation = _implementation;
+    }
+
+    /*
+        Clone the implementation at the CREATE2 address of salt and initialize it
+        @param: salt: CREATE2 salt, one per event
+        @param: _priceMark: The price mark that betters will bet above or below
+        @param: _assetSymbol: Name of the asset that betters are betting on
+    */
+    function createEvent(bytes32 salt, uint256 _priceMark, string calldata _assetSymbol)
+        external
+        restricted
+        returns (address eventContract)
+    {
+        eventContract = cloneDeterministic(salt);
+        IOverUnderCloneable(eventContract).initialize(msg.sender, _priceMark, _assetSymbol);
+
+        emit EventCreated(
+            eventContract,
+            salt,
+            _priceMark,
+            IOverUnderCloneable(eventContract).getBettingClose(),
+            IOverUnderCloneable(eventContract).getEventClose(),
+            IOverUnderCloneable(eventContract).payoutClose()
+        );
+    }
+
+    // Address the event of salt is (or will be) created at
+    function predictAddress(bytes32 salt) external view returns (address) {
+        bytes32 initCodeHash = keccak256(
+            abi.encodePacked(
+                hex"3d602d80600a3d3981f3363d3d373d3d3d363d73",
+                implementation,
+                hex"5af43d82803e903d91602b57fd5bf3"
+            )
+        );
+
+        return address(uint160(uint256(keccak256(abi.encodePacked(bytes1(0xff), address(this), salt, initCodeHash)))));
+    }
+
+    function cloneDeterministic(bytes32 salt) private returns (address instance) {
+        address target = implementation;
+        assembly {
+            let ptr := mload(0x40)
+            mstore(ptr, 0x3d602d80600a3d3981f3363d3d373d3d3d363d73000000000000000000000000)
+            mstore(add(ptr, 0x14), shl(0x60, target))
+            mstore(add(ptr, 0x28), 0x5af43d82803e903d91602b57fd5bf30000000000000000000000000000000000)
+            instance := create2(0, ptr, 0x37, salt)
+        }
+        require(instance != address(0), "Clone creation failed");
+    }
+
+    modifier restricted() {
+        require(msg.sender == owner);
+        _;
+    }
+}
@@ -57,6 +57,13 @@ contract OverUnderSixHour {
     // Price of asset at the end of the event
     uint256 public priceAtClose;
 
+    // Emitted for every bet, amount is the bet value after the fee
+    event BetPlaced(address indexed better, bool indexed isOverBet, uint256 amount, uint256 fee);
+    // Emitted once the winning side is settled
+    event WinnersSet(uint256 priceAtClose, uint256 winnerCount);
+    // Emitted for every payout transfer to a winner
+    event Withdrawn(address indexed better, uint256 amount);
+
 
     /*
         Input values to the contract
@@ -204,6 +211,7 @@ contract OverUnderSixHour {
         underBets[msg.sender].withdrawBalance += (betValue * underBettingPayoutModifier) * 1 ether;
         // add fee to fee pool balance
         feePoolBalance += BETTING_FEE;
+        emit BetPlaced(msg.sender, false, betValue, BETTING_FEE);
         // calculate payout modifier for under bet payouts
         underBettingPayoutModifier = (overBettersBalance + underBettersBalance + feePoolBalance) / underBettersBalance;
 
@@ -242,6 +250,7 @@ contract OverUnderSixHour {
         overBets[msg.sender].withdrawBalance += (betValue * overBettingPayoutModifier) * 1 ether;
         // add fee to fee pool balance
         feePoolBalance += BETTING_FEE;
+        emit BetPlaced(msg.sender, true, betValue, BETTING_FEE);
         // calculate payout modifier for over bet payouts
         overBettingPayoutModifier = (overBettersBalance + underBettersBalance + feePoolBalance) / overBettersBalance;
 
@@ -267,6 +276,7 @@ contract OverUnderSixHour {
         if (priceAtClose < priceMark) {
             populateWinners(underBetters);
         }
+        emit WinnersSet(priceAtClose, winningBetters.length);
     }
 
     // Function to be called by winning betters.
@@ -276,11 +286,13 @@ contract OverUnderSixHour {
         if (priceAtClose > priceMark) {
             require(overBets[msg.sender].payoutComplete == false);
             payable(msg.sender).transfer(overBets[msg.sender].withdrawBalance);
+            emit Withdrawn(msg.sender, overBets[msg.sender].withdrawBalance);
             overBets[msg.sender].payoutComplete = true;
         }
         if (priceAtClose < priceMark) {
             require(underBets[msg.sender].payoutComplete == false);
             payable(msg.sender).transfer(underBets[msg.sender].withdrawBalance);
+            emit Withdrawn(msg.sender, underBets[msg.sender].withdrawBalance);
             underBets[msg.sender].payoutComplete = true;
         }
     }
@@ -297,11 +309,13 @@ contract OverUnderSixHour {
             if (priceAtClose > priceMark) {
                 if (overBets[winningBetters[i]].payoutComplete == false) {
                     payable(winningBetters[i]).transfer(overBets[winningBetters[i]].withdrawBalance);
+                    emit Withdrawn(winningBetters[i], overBets[winningBetters[i]].withdrawBalance);
                 }
             }
             if (priceAtClose < priceMark) {
                 if (underBets[winningBetters[i]].payoutComplete == false) {
                     payable(winningBetters[i]).transfer(underBets[winningBetters[i]].withdrawBalance);
+                    emit Withdrawn(winningBetters[i], underBets[winningBetters[i]].withdrawBalance);
                 }
             }
         }
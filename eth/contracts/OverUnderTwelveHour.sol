@@ -46,6 +46,13 @@ contract OverUnderTwelveHour {
     // Price of asset at the end of the event
     uint256 public priceAtClose;
 
+    // Emitted for every bet, amount is the bet value after the fee
+    event BetPlaced(address indexed better, bool indexed isOverBet, uint256 amount, uint256 fee);
+    // Emitted once the winning side is settled
+    event WinnersSet(uint256 priceAtClose, uint256 winnerCount);
+    // Emitted for every payout transfer to a winner
+    event Withdrawn(address indexed better, uint256 amount);
+
     // Flag that indicates if winners have received their payout
     bool public payoutComplete = false;
 
@@ -218,6 +225,7 @@ contract OverUnderTwelveHour {
         underBets[msg.sender] += betValue;
         // add fee to fee pool balance
         feePoolBalance += BETTING_FEE;
+        emit BetPlaced(msg.sender, false, betValue, BETTING_FEE);
         // calculate payout modifier for under bet payouts
         underBettingPayoutModifier = (overBettersBalance + underBettersBalance + feePoolBalance) / underBettersBalance;
 
@@ -255,6 +263,7 @@ contract OverUnderTwelveHour {
         overBets[msg.sender] += betValue;
         // add fee to fee pool balance
         feePoolBalance += BETTING_FEE;
+        emit BetPlaced(msg.sender, true, betValue, BETTING_FEE);
         // calculate payout modifier for over bet payouts
         overBettingPayoutModifier = (overBettersBalance + underBettersBalance + feePoolBalance) / overBettersBalance;
 
@@ -276,9 +285,11 @@ contract OverUnderTwelveHour {
 
         if (priceAtClose > priceMark) {
             payOverBetters();
+            emit WinnersSet(priceAtClose, overBetters.length);
         }
         if (priceAtClose < priceMark) {
             payUnderBetters();
+            emit WinnersSet(priceAtClose, underBetters.length);
         }
     }
 
@@ -295,6 +306,7 @@ contract OverUnderTwelveHour {
             winnerBetValue = overBets[winnerAddress];
             payoutValue = winnerBetValue * overBettingPayoutModifier;
             payable(winnerAddress).transfer(payoutValue);
+            emit Withdrawn(winnerAddress, payoutValue);
         }
     }
 
@@ -311,6 +323,7 @@ contract OverUnderTwelveHour {
             winnerBetValue = underBets[winnerAddress];
             payoutValue = winnerBetValue * underBettingPayoutModifier;
             payable(winnerAddress).transfer(payoutValue);
+            emit Withdrawn(winnerAddress, payoutValue);
         }
     }
 
@@ -58,6 +58,13 @@ contract OverUnderTest {
     // Price of asset at the end of the event
     uint256 public priceAtClose;
 
+    // Emitted for every bet, amount is the bet value after the fee
+    event BetPlaced(address indexed better, bool indexed isOverBet, uint256 amount, uint256 fee);
+    // Emitted once the winning side is settled
+    event WinnersSet(uint256 priceAtClose, uint256 winnerCount);
+    // Emitted for every payout transfer to a winner
+    event Withdrawn(address indexed better, uint256 amount);
+
 
     /*
         Input values to the contract
@@ -234,6 +241,7 @@ contract OverUnderTest {
         underBets[msg.sender].withdrawBalance += betValue;//(betValue * underBettingPayoutModifier);
         // add fee to fee pool balance
         feePoolBalance += BETTING_FEE;
+        emit BetPlaced(msg.sender, false, betValue, BETTING_FEE);
         // calculate payout modifier for under bet payouts
         fractionOfTotalBetPool = underBettersBalance / (overBettersBalance + underBettersBalance);
         underBettingPayoutModifier = payoutModifierCeiling - fractionOfTotalBetPool;
@@ -281,6 +289,7 @@ contract OverUnderTest {
         overBets[msg.sender].withdrawBalance += betValue;//(betValue * overBettingPayoutModifier);
         // add fee to fee pool balance
         feePoolBalance += BETTING_FEE;
+        emit BetPlaced(msg.sender, true, betValue, BETTING_FEE);
         // calculate payout modifier for over bet payouts
         fractionOfTotalBetPool = overBettersBalance / (overBettersBalance + underBettersBalance);
         overBettingPayoutModifier = payoutModifierCeiling - (2 * fractionOfTotalBetPool);
@@ -314,6 +323,7 @@ contract OverUnderTest {
         if (priceAtClose < priceMark) {
             populateWinners(underBetters);
         }
+        emit WinnersSet(priceAtClose, winningBetters.length);
     }
 
     // Function to be called by winning betters.
@@ -325,6 +335,7 @@ contract OverUnderTest {
             "You have already withdrawn your winnings");
 
             payable(msg.sender).transfer(overBets[msg.sender].withdrawBalance);
+            emit Withdrawn(msg.sender, overBets[msg.sender].withdrawBalance);
             overBets[msg.sender].payoutComplete = true;
         }
         else if (priceAtClose < priceMark) {
@@ -332,6 +343,7 @@ contract OverUnderTest {
             "You have already withdrawn your winnings");
 
             payable(msg.sender).transfer(underBets[msg.sender].withdrawBalance);
+            emit Withdrawn(msg.sender, underBets[msg.sender].withdrawBalance);
             underBets[msg.sender].payoutComplete = true;
         }
     }
@@ -348,11 +360,13 @@ contract OverUnderTest {
             if (priceAtClose > priceMark) {
                 if (overBets[winningBetters[i]].payoutComplete == false) {
                     payable(winningBetters[i]).transfer(overBets[winningBetters[i]].withdrawBalance);
+                    emit Withdrawn(winningBetters[i], overBets[winningBetters[i]].withdrawBalance);
                 }
             }
             if (priceAtClose < priceMark) {
                 if (underBets[winningBetters[i]].payoutComplete == false) {
                     payable(winningBetters[i]).transfer(underBets[winningBetters[i]].withdrawBalance);
+                    emit Withdrawn(winningBetters[i], underBets[winningBetters[i]].withdrawBalance);
                 }
             }
         }
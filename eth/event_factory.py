@@ -0,0 +1,351 @@
+from typing import Dict, List, Optional
+import time
+import threading
+import weakref
+
+from web3 import Web3
+from retrying import retry
+
+from job_registry import FACTORY_SOURCE_PATH, FACTORY_CONTRACT_NAME
+from utils.metrics import metrics
+
+from .provider.provider import Provider, TransactionDeliveryError
+from .artifact_cache import ArtifactCache
+from .event_interfaces import EventDeployer
+from .fee_oracle import FeeOracle, FeeCapExceededError, GasLimitCache, gas_limit_cache
+from .log_indexer import normalize_topic, decode_words, topic_to_address
+from .simulation import is_retryable_error
+
+FACTORY_COLLECTION = "event_factories"
+
+# EIP-1167 minimal proxy creation code around the 20 byte implementation address
+EIP1167_PREFIX = bytes.fromhex("3d602d80600a3d3981f3363d3d373d3d3d363d73")
+EIP1167_SUFFIX = bytes.fromhex("5af43d82803e903d91602b57fd5bf3")
+
+EVENT_CREATED_TOPIC = normalize_topic(
+    Web3.keccak(text="EventCreated(address,bytes32,uint256,uint256,uint256,uint256)"))
+
+# Payout period of the cloneable contracts, after their event close
+PAYOUT_PERIOD = 72 * 3600
+
+# Fee bump of a cancel txn over the txn it replaces; nodes require at least 10%
+CANCEL_FEE_BUMP = 1.125
+CANCEL_GAS = 21000
+
+
+def build_clone_init_code(implementation_address) -> bytes:
+    return EIP1167_PREFIX + bytes.fromhex(Web3.to_checksum_address(implementation_address)[2:]) + EIP1167_SUFFIX
+
+
+def get_create2_address(deployer_address, salt: bytes, init_code: bytes) -> str:
+    """
+    EIP-1014 address of a contract created with CREATE2
+    :param deployer_address: address of the creating contract
+    :param salt: 32 byte salt
+    :param init_code: creation code
+    :return: checksum address
+    """
+    address_hash = Web3.keccak(b"\xff" + bytes.fromhex(Web3.to_checksum_address(deployer_address)[2:]) +
+                               salt + Web3.keccak(init_code))
+
+    return Web3.to_checksum_address(address_hash[12:])
+
+
+def predict_clone_address(factory_address, salt: bytes, implementation_address) -> str:
+    """
+    CREATE2 address of the clone a factory creates for a salt, the same as the factory's predictAddress
+    :param factory_address:
+    :param salt: 32 byte salt
+    :param implementation_address:
+    :return: checksum address
+    """
+    return get_create2_address(deployer_address=factory_address, salt=salt,
+                               init_code=build_clone_init_code(implementation_address))
+
+
+def make_event_salt(wallet_address, collection_name, asset_symbol, nonce) -> bytes:
+    # the wallet nonce of the creation txn makes every salt unique
+    return bytes(Web3.solidity_keccak(["address", "string", "string", "uint256"],
+                                      [Web3.to_checksum_address(wallet_address), collection_name, asset_symbol,
+                                       nonce]))
+
+
+def parse_event_created_logs(logs: List) -> Dict[str, Dict]:
+    """
+    Closes of the events created in a receipt, from the factory's EventCreated logs
+    :param logs: receipt logs
+    :return: {event contract address: {"price_mark_wei": ..., "betting_close": ..., ...}}
+    """
+    created_events = {}
+    for log in logs:
+        if not log["topics"] or normalize_topic(log["topics"][0]) != EVENT_CREATED_TOPIC:
+            continue
+        price_mark_wei, betting_close, event_close, payout_close = decode_words(log["data"])
+        created_events[topic_to_address(log["topics"][1])] = {"price_mark_wei": price_mark_wei,
+                                                               "betting_close": betting_close,
+                                                               "event_close": event_close,
+                                                               "payout_close": payout_close}
+
+    return created_events
+
+
+class EventFactory:
+    """
+    Creates the events of a series as EIP-1167 clones of its cloneable contract through an
+    OverUnderEventFactory, instead of deploying the full contract bytecode for every event.
+    The implementation and the factory are deployed once per wallet and chain and recorded in mongo.
+    Clone addresses are CREATE2 addresses computed locally, so an event is known before its txn is mined.
+    """
+
+    _factories = weakref.WeakKeyDictionary()
+    _factories_lock = threading.Lock()
+
+    def __init__(self, provider: Provider, mongo_handler, job_definition: Dict, fee_oracle=None,
+                 create_gas_limit_cache=gas_limit_cache):
+        if job_definition.get("clone_source_path") is None:
+            raise Exception(f"No cloneable contract registered for {job_definition['collection_name']}")
+
+        self.provider = provider
+        self.mongo_handler = mongo_handler
+        self.job_definition = job_definition
+        self.fee_oracle = fee_oracle if fee_oracle is not None else FeeOracle.for_provider(provider)
+        self.gas_limit_cache = create_gas_limit_cache
+
+        self.implementation_deployer = EventDeployer(provider=provider,
+                                                     contract_source_path=job_definition["clone_source_path"],
+                                                     event_contract_name=job_definition["clone_contract_name"],
+                                                     simulate_deploys=False)
+        self.factory_deployer = EventDeployer(provider=provider,
+                                              contract_source_path=FACTORY_SOURCE_PATH,
+                                              event_contract_name=FACTORY_CONTRACT_NAME,
+                                              simulate_deploys=False)
+
+        self.factory_address = None
+        self.implementation_address = None
+        self.factory_contract = None
+        self.clone_abi = None
+        self.clone_contract_name = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_job(cls, provider: Provider, mongo_handler, job_definition: Dict) -> "EventFactory":
+        """
+        Get the shared event factory of a series for a provider
+        :param provider:
+        :param mongo_handler:
+        :param job_definition: job registry entry with clone_source_path and clone_contract_name
+        :return: EventFactory
+        """
+        with cls._factories_lock:
+            provider_factories = cls._factories.setdefault(provider, {})
+            event_factory = provider_factories.get(job_definition["collection_name"])
+            if event_factory is None:
+                event_factory = cls(provider=provider, mongo_handler=mongo_handler, job_definition=job_definition)
+                provider_factories[job_definition["collection_name"]] = event_factory
+
+        return event_factory
+
+    def get_factory_id(self) -> str:
+        return ":".join([str(self.provider.get_chain_id()),
+                         self.provider.get_wallet_address(),
+                         self.job_definition["clone_contract_name"].lstrip(":"),
+                         ArtifactCache.hash_source(self.job_definition["clone_source_path"]),
+                         ArtifactCache.hash_source(FACTORY_SOURCE_PATH)])
+
+    def ensure_deployed(self):
+        """
+        Load the factory of the series from mongo, deploying the implementation and the factory first
+        if this wallet has none on the chain for the current contract sources
+        :return:
+        """
+        with self._lock:
+            if self.factory_address is not None:
+                return
+
+            clone_artifact = self.implementation_deployer.compile_contract(
+                contract_source_path=self.job_definition["clone_source_path"])
+            factory_artifact = self.factory_deployer.compile_contract(contract_source_path=FACTORY_SOURCE_PATH)
+
+            factory_id = self.get_factory_id()
+            factory_record = self.mongo_handler.find_one(collection=FACTORY_COLLECTION, query={"_id": factory_id})
+            if factory_record is not None and len(self.provider.w3.eth.get_code(factory_record["factory_address"])) > 0:
+                factory_address = factory_record["factory_address"]
+                implementation_address = factory_record["implementation_address"]
+            else:
+                print(f"Deploying event factory for {self.job_definition['collection_name']}...")
+                implementation_address = self.implementation_deployer.deploy_contract()
+                factory_address = self.factory_deployer.deploy_contract(
+                    constructor_args={"_implementation": implementation_address})
+                self.mongo_handler.update(collection=FACTORY_COLLECTION,
+                                          query={"_id": factory_id},
+                                          document={"$set": {"factory_address": factory_address,
+                                                             "implementation_address": implementation_address,
+                                                             "created_at": time.time()}},
+                                          upsert=True)
+                print(f"Event factory {factory_address} deployed with implementation {implementation_address}")
+
+            self.clone_abi = clone_artifact["compiled_abi"]
+            # getContractName() of the clones, read once from the implementation
+            self.clone_contract_name = self.provider.w3.eth.contract(
+                address=Web3.to_checksum_address(implementation_address),
+                abi=self.clone_abi).functions.getContractName().call()
+            self.factory_contract = self.provider.w3.eth.contract(address=Web3.to_checksum_address(factory_address),
+                                                                  abi=factory_artifact["compiled_abi"])
+            self.implementation_address = Web3.to_checksum_address(implementation_address)
+            self.factory_address = Web3.to_checksum_address(factory_address)
+
+    @metrics.timed("create_event_txn_seconds")
+    @retry(stop_max_attempt_number=5, wait_fixed=1000, retry_on_exception=is_retryable_error)
+    def create_event(self, price_mark, asset_symbol) -> Dict:
+        """
+        Sign and broadcast a createEvent txn without waiting for the receipt. The salt is derived from the
+        nonce, so only nonce conflicts and errors before the broadcast sign again; transport errors resend
+        the same signed txn, and a txn whose delivery stays unconfirmed is returned as sent.
+        :param price_mark:
+        :param asset_symbol:
+        :return: {"contract_address": predicted clone address, "salt": ..., "txn_hash": ..., "nonce": ...,
+                  "price_mark_wei": ..., "asset_symbol": ...}
+        """
+        self.ensure_deployed()
+        constructor_args = EventDeployer.build_constructor_args(price_mark=price_mark, asset_symbol=asset_symbol)
+
+        txn = {"from": self.provider.get_wallet_address(),
+               "chainId": self.provider.get_chain_id(),
+               **self.fee_oracle.get_fee_params()}
+        gas_limit = self.gas_limit_cache.get(self.get_gas_key())
+        if gas_limit is not None:
+            txn["gas"] = gas_limit
+
+        nonce = self.provider.allocate_nonce()
+        try:
+            txn["nonce"] = nonce
+            salt = make_event_salt(wallet_address=self.provider.get_wallet_address(),
+                                   collection_name=self.job_definition["collection_name"],
+                                   asset_symbol=constructor_args["_assetSymbol"],
+                                   nonce=nonce)
+            create_txn = self.factory_contract.functions.createEvent(
+                salt, constructor_args["_priceMark"], constructor_args["_assetSymbol"]).build_transaction(txn)
+            signed_txn = self.provider.w3.eth.account.sign_transaction(
+                create_txn, private_key=self.provider.get_wallet_private_key())
+            txn_hash = self.provider.send_signed_transaction(signed_txn)
+        except TransactionDeliveryError as e:
+            print(f"Create event txn with nonce {nonce} may be pending: {e}")
+            txn_hash = e.txn_hash
+        except Exception as e:
+            print(f"Create event txn with nonce {nonce} failed, resyncing nonce: {e}")
+            self.provider.resync_nonce()
+            raise e
+
+        return {"contract_address": predict_clone_address(factory_address=self.factory_address,
+                                                          salt=salt,
+                                                          implementation_address=self.implementation_address),
+                "salt": salt,
+                "txn_hash": txn_hash,
+                "nonce": nonce,
+                "price_mark_wei": constructor_args["_priceMark"],
+                "asset_symbol": constructor_args["_assetSymbol"]}
+
+    def read_event_closes(self, contract_address) -> Dict:
+        """
+        Closes of a created event read from the clone, for events whose EventCreated log is not at hand
+        :param contract_address:
+        :return: {"betting_close": ..., "event_close": ..., "payout_close": ...}
+        """
+        self.ensure_deployed()
+        clone_contract = self.provider.w3.eth.contract(address=Web3.to_checksum_address(contract_address),
+                                                       abi=self.clone_abi)
+
+        return {"betting_close": clone_contract.functions.getBettingClose().call(),
+                "event_close": clone_contract.functions.getEventClose().call(),
+                "payout_close": clone_contract.functions.payoutClose().call()}
+
+    def cancel_create_event(self, txn_hash, nonce):
+        """
+        Replace a stuck createEvent txn with a zero value transfer to the wallet at the same nonce,
+        with fees bumped over both the stuck txn and the current fees
+        :param txn_hash: hash of the stuck createEvent txn
+        :param nonce: its nonce
+        :return: hash of the cancel txn
+        """
+        stuck_txn = self.provider.w3.eth.get_transaction(txn_hash)
+        try:
+            fee_params = self.fee_oracle.get_fee_params()
+        except FeeCapExceededError:
+            # the bump over the stuck txn is enough to replace it
+            fee_params = {}
+        cancel_txn = {"from": self.provider.get_wallet_address(),
+                      "to": self.provider.get_wallet_address(),
+                      "value": 0,
+                      "gas": CANCEL_GAS,
+                      "nonce": nonce,
+                      "chainId": self.provider.get_chain_id()}
+        if "maxFeePerGas" in stuck_txn:
+            cancel_txn["maxFeePerGas"] = max(fee_params.get("maxFeePerGas", 0),
+                                             int(stuck_txn["maxFeePerGas"] * CANCEL_FEE_BUMP))
+            cancel_txn["maxPriorityFeePerGas"] = max(fee_params.get("maxPriorityFeePerGas", 0),
+                                                     int(stuck_txn["maxPriorityFeePerGas"] * CANCEL_FEE_BUMP))
+        else:
+            cancel_txn["gasPrice"] = max(self.provider.w3.eth.gas_price, int(stuck_txn["gasPrice"] * CANCEL_FEE_BUMP))
+
+        signed_txn = self.provider.w3.eth.account.sign_transaction(
+            cancel_txn, private_key=self.provider.get_wallet_private_key())
+
+        return self.provider.send_signed_transaction(signed_txn)
+
+    def get_gas_key(self) -> str:
+        return GasLimitCache.make_key(f"createEvent:{self.factory_address}")
+
+    def build_pending_contract_info(self, created_event: Dict) -> Dict:
+        """
+        Contract info of a freshly created event, before its txn is mined. The closes are estimated from
+        the local clock and corrected from the EventCreated log once the receipt arrives.
+        :param created_event: result of create_event
+        :return: contract info
+        """
+        betting_close = int(time.time()) + self.job_definition["hr_duration"] * 3600
+        event_close = betting_close + self.job_definition["hr_duration"] * 3600
+
+        return {
+            "contract_name": self.clone_contract_name,
+            "contract_address": created_event["contract_address"],
+            "contract_abi": self.clone_abi,
+            "price_mark": Web3.from_wei(created_event["price_mark_wei"], 'ether'),
+            "asset_symbol": created_event["asset_symbol"],
+            "betting_close": betting_close,
+            "event_close": event_close,
+            "payout_close": event_close + PAYOUT_PERIOD,
+            "contract_balance": 0,
+            "over_betters_balance": 0,
+            "under_betters_balance": 0,
+            "over_betting_payout_modifier": Web3.to_wei(2, 'ether'),
+            "under_betting_payout_modifier": Web3.to_wei(2, 'ether'),
+            "over_betters_addresses": [],
+            "under_betters_addresses": [],
+            "is_event_over": False,
+            "is_payout_period_over": False,
+        }
+
+    def wait_for_event(self, created_event: Dict, timeout=120) -> Optional[Dict]:
+        """
+        Wait for the receipt of a createEvent txn
+        :param created_event: result of create_event
+        :param timeout: seconds to wait for the receipt
+        :return: closes of the created event from its EventCreated log, None if the txn failed
+        """
+        try:
+            with metrics.timer("receipt_wait_seconds"):
+                txn_receipt = self.provider.w3.eth.wait_for_transaction_receipt(created_event["txn_hash"],
+                                                                                timeout=timeout)
+        finally:
+            self.provider.release_nonce(created_event["nonce"])
+
+        if txn_receipt["status"] != 1:
+            return None
+        self.gas_limit_cache.record(self.get_gas_key(), txn_receipt["gasUsed"])
+
+        created_events = parse_event_created_logs(txn_receipt["logs"])
+        if created_event["contract_address"] not in created_events:
+            raise Exception(f"No EventCreated log for {created_event['contract_address']} in the receipt, "
+                            f"the factory and the predicted address disagree")
+
+        return created_events[created_event["contract_address"]]
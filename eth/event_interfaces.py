@@ -1,39 +1,51 @@
-from typing import Optional, Dict
-import os
+from typing import Optional, Dict, List
+import math
 from web3 import Web3
+from web3.exceptions import TimeExhausted
 from retrying import retry
-from solcx import compile_files, install_solc
+from solcx import compile_files
 
-from .provider.provider import Provider
+from utils.metrics import metrics
 
-install_solc(version='latest')
+from .provider.provider import Provider, TransactionDeliveryError
+from .multicall import Multicall, MulticallError, MULTICALL_FALLBACK_ERRORS
+from .contract_factories import contract_factory_cache
+from .artifact_cache import ArtifactCache, artifact_cache
+from .toolchain import solc_toolchain, read_pragma
+from .fee_oracle import FeeOracle, FeeCapExceededError, GasLimitCache, gas_limit_cache
+from .simulation import DeploySimulationError, simulation_cache, is_retryable_error
 
 
 class EventDeployer:
-    def __init__(self, provider: Provider, hr_duration=6, is_test=False):
+    def __init__(self, provider: Provider, job_definition: Optional[Dict] = None,
+                 contract_artifact_cache=artifact_cache, toolchain=solc_toolchain, contract_source_path=None,
+                 event_contract_name=None, fee_oracle=None, deploy_gas_limit_cache=gas_limit_cache,
+                 simulate_deploys=True, deploy_simulation_cache=simulation_cache):
         self.provider = provider
-        if is_test:
-            self.contract_source_path = os.path.join(os.path.dirname(__file__),
-                                                     "contracts/test_contracts/OverUnderTest.sol")
-            self.event_contract_name = ":OverUnderTest"
-        else:
-            if hr_duration == 6:
-                self.contract_source_path = os.path.join(os.path.dirname(__file__),
-                                                         "contracts/OverUnderSixHour.sol")
-                self.event_contract_name = ":OverUnderSixHour"
-            elif hr_duration == 12:
-                self.contract_source_path = os.path.join(os.path.dirname(__file__),
-                                                         "contracts/OverUnderTwelveHour.sol")
-                self.event_contract_name = ":OverUnderTwelveHour"
-            elif hr_duration == 24:
-                self.contract_source_path = os.path.join(os.path.dirname(__file__),
-                                                         "contracts/OverUnderTwentyFourHour.sol")
-                self.event_contract_name = ":OverUnderTwentyFourHour"
+        self.simulate_deploys = simulate_deploys
+        self.simulation_cache = deploy_simulation_cache
+        self.artifact_cache = contract_artifact_cache
+        self.toolchain = toolchain
+        self.fee_oracle = fee_oracle if fee_oracle is not None else FeeOracle.for_provider(provider)
+        self.gas_limit_cache = deploy_gas_limit_cache
+        # the job registry entry of the series, or an explicit contract for factories and implementations
+        if job_definition is not None:
+            contract_source_path = job_definition["contract_source_path"]
+            event_contract_name = job_definition["contract_name"]
+        if contract_source_path is None or event_contract_name is None:
+            raise Exception("EventDeployer needs a job definition or a contract source path and name")
+
+        self.contract_source_path = contract_source_path
+        self.event_contract_name = event_contract_name
 
         self.w3_contract_handle = None
         self.contract_address = None
         self.contract_abi = None
         self.deploy_status = False
+        self.deploy_txn_hash = None
+        self.deploy_txn_nonce = None
+        self.deploy_gas_key = None
+        self.simulated_gas_estimate = None
 
     def deploy_event_contract(self, price_mark, asset_symbol="BTC"):
         """
@@ -41,36 +53,217 @@ class EventDeployer:
         :param price_mark:
         :return:
         """
-        constructor_args = {
+        self.start_deploy(price_mark=price_mark, asset_symbol=asset_symbol)
+
+        return self.finish_deploy()
+
+    def deploy_contract(self, constructor_args: Optional[Dict] = None):
+        """
+        Compile and deploy the contract with arbitrary constructor args, ex. an event factory or a
+        cloneable implementation, and wait for the receipt
+        :param constructor_args: arguments for contract constructor
+        :return: contract address
+        """
+        compiled_contract_info = self.compile_contract(contract_source_path=self.contract_source_path)
+        self.contract_abi = compiled_contract_info["compiled_abi"]
+        self.deploy_txn_hash = self.send_deploy_txn(compiled_abi=compiled_contract_info["compiled_abi"],
+                                                    compiled_bytecode=compiled_contract_info["compiled_bytecode"],
+                                                    constructor_args=constructor_args or {})
+        self.finish_deploy()
+
+        return self.contract_address
+
+    @staticmethod
+    def build_constructor_args(price_mark, asset_symbol) -> Dict:
+        return {
             "_priceMark": Web3.to_wei(price_mark, 'ether'),
             "_assetSymbol": asset_symbol.upper()
         }
 
+    @metrics.timed("start_deploy_seconds")
+    def start_deploy(self, price_mark, asset_symbol="BTC"):
+        """
+        Compile, sign and broadcast the deploy txn without waiting for the receipt.
+        With simulate_deploys the constructor is run with eth_call first and a reverting deploy raises
+        DeploySimulationError before anything is signed.
+        :param asset_symbol:
+        :param price_mark:
+        :return: txn hash
+        """
+        constructor_args = self.build_constructor_args(price_mark=price_mark, asset_symbol=asset_symbol)
+
+        compiled_contract_info = self.compile_contract(contract_source_path=self.contract_source_path)
+        self.contract_abi = compiled_contract_info["compiled_abi"]
+
+        if self.simulate_deploys:
+            self.simulated_gas_estimate = self.simulate_deploy_txn(
+                compiled_abi=compiled_contract_info["compiled_abi"],
+                compiled_bytecode=compiled_contract_info["compiled_bytecode"],
+                constructor_args=constructor_args)["gas_estimate"]
+
+        self.deploy_txn_hash = self.send_deploy_txn(compiled_abi=compiled_contract_info["compiled_abi"],
+                                                    compiled_bytecode=compiled_contract_info["compiled_bytecode"],
+                                                    constructor_args=constructor_args)
+
+        return self.deploy_txn_hash
+
+    def simulate_deploy(self, price_mark, asset_symbol="BTC") -> Dict:
+        """
+        Compile and simulate the deploy of an event contract without signing or sending anything
+        :param price_mark:
+        :param asset_symbol:
+        :return: simulation result {"gas_estimate": ..., "error": ..., "simulated_at": ...}
+        """
         compiled_contract_info = self.compile_contract(contract_source_path=self.contract_source_path)
-        compiled_abi = compiled_contract_info["compiled_abi"]
-        compiled_bytecode = compiled_contract_info["compiled_bytecode"]
+        self.contract_abi = compiled_contract_info["compiled_abi"]
+        try:
+            return self.simulate_deploy_txn(compiled_abi=compiled_contract_info["compiled_abi"],
+                                            compiled_bytecode=compiled_contract_info["compiled_bytecode"],
+                                            constructor_args=self.build_constructor_args(price_mark=price_mark,
+                                                                                         asset_symbol=asset_symbol))
+        except DeploySimulationError as e:
+            return {"gas_estimate": None, "error": str(e), "is_retryable": e.is_retryable}
 
-        txn_receipt_json = self.create_and_send_deploy_txn(compiled_abi=compiled_abi,
-                                                           compiled_bytecode=compiled_bytecode,
-                                                           constructor_args=constructor_args)
+    @metrics.timed("simulate_deploy_txn_seconds")
+    def simulate_deploy_txn(self, compiled_abi, compiled_bytecode, constructor_args) -> Dict:
+        """
+        Run the constructor with eth_call against the pending block, and eth_estimateGas when no gas limit
+        has been learned for the bytecode yet. Results are cached per bytecode, asset and sender.
+        :param compiled_abi: compliled json interface for contract
+        :param compiled_bytecode: compiled bytecode for contract
+        :param constructor_args: arguments for contract constructor
+        :return: simulation result
+        """
+        gas_key = GasLimitCache.make_key(compiled_bytecode)
+        simulation_key = self.get_simulation_key(gas_key, constructor_args["_assetSymbol"])
+        simulation_result = self.simulation_cache.get(simulation_key)
+
+        if simulation_result is None:
+            contract = self.provider.w3.eth.contract(abi=compiled_abi, bytecode=compiled_bytecode)
+            txn = {"from": self.provider.get_wallet_address(),
+                   "data": contract.constructor(**constructor_args).data_in_transaction}
+            try:
+                self.provider.w3.eth.call(txn, "pending")
+                gas_estimate = None
+                if self.gas_limit_cache.get(gas_key) is None:
+                    gas_estimate = self.provider.w3.eth.estimate_gas(txn, "pending")
+            except Exception as e:
+                simulation_result = self.record_simulation(simulation_key, error=e)
+            else:
+                simulation_result = self.record_simulation(simulation_key, gas_estimate=gas_estimate)
+
+        return self.check_simulation_result(simulation_result)
+
+    def get_simulation_key(self, gas_key, asset_symbol) -> tuple:
+        return gas_key, asset_symbol, self.provider.get_wallet_address()
+
+    def record_simulation(self, simulation_key, gas_estimate=None, error: Optional[Exception] = None) -> Dict:
+        """
+        Cache the outcome of a deploy simulation
+        :param simulation_key: result of get_simulation_key
+        :param gas_estimate: eth_estimateGas result of a clean simulation
+        :param error: error of a failed simulation
+        :return: simulation result
+        """
+        if error is None:
+            return self.simulation_cache.record(simulation_key, gas_estimate=gas_estimate)
+        if is_retryable_error(error):
+            # a node or transport failure says nothing about the deploy, so it is not cached
+            raise DeploySimulationError(f"Deploy simulation failed: {error}", is_retryable=True)
+
+        return self.simulation_cache.record(simulation_key, error=getattr(error, "message", None) or str(error))
+
+    def check_simulation_result(self, simulation_result: Dict) -> Dict:
+        """
+        Raise DeploySimulationError for a simulation result of a reverting deploy
+        :param simulation_result:
+        :return: simulation result
+        """
+        if simulation_result["error"] is not None:
+            metrics.increment("deploy_simulation_reverts_total", labels={"contract": self.event_contract_name})
+            raise DeploySimulationError(f"{self.event_contract_name} deploy reverts in simulation: "
+                                        f"{simulation_result['error']}")
+
+        return simulation_result
+
+    def build_deploy_txn_params(self, chain_id, fee_params: Optional[Dict], gas_key, gas_estimate=None) -> Dict:
+        """
+        Fields of a deploy txn other than its nonce. The gas limit is the one learned from receipts of the
+        bytecode, or the simulated gas estimate with the cache margin before the first receipt.
+        :param chain_id:
+        :param fee_params: fee oracle fields, None lets web3 fill in the gas price
+        :param gas_key: gas limit cache key of the bytecode
+        :param gas_estimate: simulated gas estimate
+        :return: txn fields
+        """
+        txn = {"from": self.provider.get_wallet_address(), "chainId": chain_id}
+        if fee_params is not None:
+            txn.update(fee_params)
+
+        gas_limit = self.gas_limit_cache.get(gas_key)
+        if gas_limit is None and gas_estimate is not None:
+            gas_limit = math.ceil(gas_estimate * self.gas_limit_cache.margin)
+        if gas_limit is not None:
+            txn["gas"] = gas_limit
+
+        return txn
+
+    def finish_deploy(self, timeout=120):
+        """
+        Wait for the receipt of a deploy txn broadcast by start_deploy
+        :param timeout: seconds to wait for the receipt
+        :return: txn receipt
+        """
+        if self.deploy_txn_hash is None:
+            raise Exception("No deploy transaction pending")
+
+        try:
+            with metrics.timer("receipt_wait_seconds"):
+                txn_receipt_json = self.provider.w3.eth.wait_for_transaction_receipt(self.deploy_txn_hash,
+                                                                                     timeout=timeout)
+        except TimeExhausted:
+            # the txn may never have been delivered, the allocator re-reads the nonce from the node
+            self.provider.resync_nonce()
+            raise
+        self.provider.release_nonce(self.deploy_txn_nonce)
 
         if txn_receipt_json['status'] == 0:
             raise Exception('Transaction failed')
         else:
+            self.gas_limit_cache.record(self.deploy_gas_key, txn_receipt_json['gasUsed'])
             self.contract_address = txn_receipt_json['contractAddress']
-            self.contract_abi = compiled_abi
             self.deploy_status = True
 
         return txn_receipt_json
 
+    @metrics.timed("compile_contract_seconds")
     def compile_contract(self, contract_source_path) -> Optional[Dict]:
         """
-        Compile solidity contract and modify based on contract_modifiers
+        Compile solidity contract and modify based on contract_modifiers.
+        Compiled artifacts are cached by source hash, solc version and contract name, and solc is
+        only resolved from the contract pragma and installed when no cached artifact exists.
         :param contract_source_path: path to contract source file
         :return:
         """
+        source_hash = ArtifactCache.hash_source(contract_source_path)
+        version_spec = read_pragma(contract_source_path)
+        self.toolchain.check_pinned_version(version_spec, contract_source_path=contract_source_path)
+
+        solc_version = self.toolchain.resolve_installed(version_spec)
+        if solc_version is not None:
+            cached_artifact = self.artifact_cache.get(source_hash, solc_version, self.event_contract_name)
+        else:
+            cached_artifact = self.artifact_cache.find(source_hash, self.event_contract_name,
+                                                       lambda version: self.toolchain.is_usable(version, version_spec))
+        if cached_artifact is not None:
+            return cached_artifact
+
+        if solc_version is None:
+            solc_version = self.toolchain.ensure(version_spec)
+
         contract_id = None
-        compiled_sol = compile_files(source_files=contract_source_path, output_values=['abi', 'bin'])
+        compiled_sol = compile_files(source_files=contract_source_path, output_values=['abi', 'bin'],
+                                     solc_binary=self.toolchain.get_executable(solc_version))
 
         for key in compiled_sol.keys():
             if self.event_contract_name in key:
@@ -83,9 +276,9 @@ class EventDeployer:
         compiled_bytecode = contract_interface['bin']
         compiled_abi = contract_interface['abi']
 
-        return {"compiled_bytecode": compiled_bytecode, "compiled_abi": compiled_abi}
+        return self.artifact_cache.put(source_hash, solc_version, self.event_contract_name,
+                                       {"compiled_bytecode": compiled_bytecode, "compiled_abi": compiled_abi})
 
-    @retry(stop_max_attempt_number=5, wait_fixed=1000)
     def create_and_send_deploy_txn(self, compiled_abi, compiled_bytecode, constructor_args) -> Optional[Dict]:
         """
         Create and send txn to deploy contract to ETHEREUM network
@@ -94,17 +287,70 @@ class EventDeployer:
         :param constructor_args: arguments for contract constructor
         :return:
         """
+        if self.simulate_deploys:
+            self.simulated_gas_estimate = self.simulate_deploy_txn(compiled_abi=compiled_abi,
+                                                                   compiled_bytecode=compiled_bytecode,
+                                                                   constructor_args=constructor_args)["gas_estimate"]
+        self.deploy_txn_hash = self.send_deploy_txn(compiled_abi=compiled_abi,
+                                                    compiled_bytecode=compiled_bytecode,
+                                                    constructor_args=constructor_args)
+        txn_receipt = self.provider.w3.eth.wait_for_transaction_receipt(self.deploy_txn_hash)
+        self.provider.release_nonce(self.deploy_txn_nonce)
+        if txn_receipt['status'] == 1:
+            self.gas_limit_cache.record(self.deploy_gas_key, txn_receipt['gasUsed'])
+
+        return txn_receipt
+
+    @metrics.timed("send_deploy_txn_seconds")
+    @retry(stop_max_attempt_number=5, wait_fixed=1000, retry_on_exception=is_retryable_error)
+    def send_deploy_txn(self, compiled_abi, compiled_bytecode, constructor_args):
+        """
+        Sign and broadcast the deploy txn using a nonce from the provider's local allocator.
+        Fees come from the cached fee oracle and the gas limit from previous receipts of the same bytecode,
+        so a warm deploy builds the txn without any RPC round-trip.
+        Nonce conflicts and transport errors before the broadcast are retried with a freshly signed txn, after
+        resyncing the allocator with the node; reverts and other deterministic failures are raised on the first
+        attempt. Transport errors of the broadcast resend the same signed txn, and a txn whose delivery stays
+        unconfirmed keeps its nonce and hash so finish_deploy waits on it instead of deploying twice.
+        :param compiled_abi: compliled json interface for contract
+        :param compiled_bytecode: compiled bytecode for contract
+        :param constructor_args: arguments for contract constructor
+        :return: txn hash
+        """
         contract = self.provider.w3.eth.contract(abi=compiled_abi, bytecode=compiled_bytecode)
 
-        txn = {"from": self.provider.get_wallet_address(), "nonce": self.provider.get_nonce()}
-        constructor = contract.constructor(**constructor_args).build_transaction(txn)
+        try:
+            fee_params = self.fee_oracle.get_fee_params()
+        except FeeCapExceededError:
+            raise
+        except Exception as e:
+            # ex. a chain without EIP-1559, web3 fills in the gas price
+            print(f"Unable to get fees from the fee oracle: {e}")
+            fee_params = None
 
-        signed_txn = self.provider.w3.eth.account.sign_transaction(constructor,
-                                                                   private_key=self.provider.get_wallet_private_key())
-        send_txn = self.provider.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-        txn_receipt = self.provider.w3.eth.wait_for_transaction_receipt(send_txn)
+        self.deploy_gas_key = GasLimitCache.make_key(compiled_bytecode)
+        txn = self.build_deploy_txn_params(chain_id=self.provider.get_chain_id(), fee_params=fee_params,
+                                           gas_key=self.deploy_gas_key, gas_estimate=self.simulated_gas_estimate)
 
-        return txn_receipt
+        self.deploy_txn_nonce = self.provider.allocate_nonce()
+        try:
+            txn["nonce"] = self.deploy_txn_nonce
+            constructor = contract.constructor(**constructor_args).build_transaction(txn)
+
+            with metrics.timer("sign_transaction_seconds"):
+                signed_txn = self.provider.w3.eth.account.sign_transaction(
+                    constructor, private_key=self.provider.get_wallet_private_key())
+            with metrics.timer("send_transaction_seconds"):
+                send_txn = self.provider.send_signed_transaction(signed_txn)
+        except TransactionDeliveryError as e:
+            print(f"Deploy txn with nonce {self.deploy_txn_nonce} may be pending: {e}")
+            return e.txn_hash
+        except Exception as e:
+            print(f"Deploy txn with nonce {self.deploy_txn_nonce} failed, resyncing nonce: {e}")
+            self.provider.resync_nonce()
+            raise e
+
+        return send_txn
 
     def get_contract_address(self):
         return self.contract_address
@@ -116,37 +362,158 @@ class EventDeployer:
         return self.deploy_status
 
 
+def from_wei_ether(value):
+    return Web3.from_wei(value, 'ether')
+
+
+# (contract_info field, getter function name, converter)
+EVENT_CONTRACT_INFO_GETTERS = [
+    ("contract_name", "getContractName", None),
+    ("price_mark", "getPriceMark", from_wei_ether),
+    ("asset_symbol", "getAssetSymbol", None),
+    ("betting_close", "getBettingClose", None),
+    ("event_close", "getEventClose", None),
+    ("payout_close", "getPayoutClose", None),
+    ("contract_balance", "getContractBalance", from_wei_ether),
+    ("over_betters_balance", "getOverBettersBalance", from_wei_ether),
+    ("under_betters_balance", "getUnderBettersBalance", from_wei_ether),
+    ("over_betting_payout_modifier", "getOverBettingPayoutModifier", None),
+    ("under_betting_payout_modifier", "getUnderBettingPayoutModifier", None),
+    ("over_betters_addresses", "getOverBettersAddresses", None),
+    ("under_betters_addresses", "getUnderBettersAddresses", None),
+    ("is_event_over", "isEventOver", None),
+    ("is_payout_period_over", "isPayoutPeriodOver", None),
+]
+
+
+# Bettor address arrays, replaced by the bettor log index for contracts emitting bet logs
+BETTOR_ADDRESS_FIELDS = ["over_betters_addresses", "under_betters_addresses"]
+
+
+# Contract info helpers shared by EventContractInterface and the async engine's reader
+
+
+def get_function_abis(contract_abi) -> Dict:
+    return {abi_entry["name"]: abi_entry for abi_entry in contract_abi or [] if abi_entry.get("type") == "function"}
+
+
+def get_contract_info_getters(function_abis: Dict, fields=None) -> List:
+    """
+    Getters of EVENT_CONTRACT_INFO_GETTERS a contract has
+    :param function_abis: function ABIs of the contract by name
+    :param fields: contract info fields to read, all fields if None
+    :return: [(field, function_name, converter), ...]
+    """
+    return [(field, function_name, converter)
+            for field, function_name, converter in EVENT_CONTRACT_INFO_GETTERS
+            if function_name in function_abis and (fields is None or field in fields)]
+
+
+def decode_getter_results(codec, function_abis: Dict, getters: List, results: List) -> List:
+    """
+    Decode the Multicall3 aggregate3 results of the getters
+    :param codec: web3 ABI codec
+    :param function_abis: function ABIs of the contract by name
+    :param getters: getters the calls were made for, in call order
+    :param results: [(success, return_data), ...]
+    :return: getter values
+    """
+    values = []
+    for (_, function_name, _), (success, return_data) in zip(getters, results):
+        if not success:
+            raise MulticallError(f"{function_name} reverted")
+        output_types = [output["type"] for output in function_abis[function_name]["outputs"]]
+        values.append(codec.decode(output_types, return_data)[0])
+
+    return values
+
+
+def build_contract_info(contract_address, contract_abi, getters: List, values: List) -> Dict:
+    """
+    Contract info dict from getter values, getters that were not read are reported as None
+    :param contract_address:
+    :param contract_abi:
+    :param getters: getters the values were read from
+    :param values: getter values
+    :return: contract info dict
+    """
+    contract_info = {field: None for field, _, _ in EVENT_CONTRACT_INFO_GETTERS}
+    contract_info["contract_address"] = contract_address
+    contract_info["contract_abi"] = contract_abi
+    for (field, _, converter), value in zip(getters, values):
+        contract_info[field] = converter(value) if converter is not None else value
+
+    return contract_info
+
+
 class EventContractInterface:
-    def __init__(self, provider: Provider, contract_address, contract_abi):
+    def __init__(self, provider: Provider, contract_address, contract_abi=None, use_multicall=True,
+                 contract_factory=None):
         self.provider = provider
-        self.w3_contract_handle = self.provider.w3.eth.contract(address=contract_address, abi=contract_abi)
+        self.use_multicall = use_multicall
+        if contract_factory is not None:
+            self.w3_contract_handle = contract_factory(address=contract_address)
+        else:
+            self.w3_contract_handle = self.provider.w3.eth.contract(address=contract_address, abi=contract_abi)
         if self.w3_contract_handle is None:
             raise Exception("Contract not found")
 
-    def get_event_contract_info(self) -> Optional[Dict]:
-        contract_info = {
-            "contract_name": self.w3_contract_handle.functions.getContractName().call(),
-            "contract_address": self.w3_contract_handle.address,
-            "contract_abi": self.w3_contract_handle.abi,
-            "price_mark": Web3.from_wei(self.w3_contract_handle.functions.getPriceMark().call(), 'ether'),
-            "asset_symbol": self.w3_contract_handle.functions.getAssetSymbol().call(),
-            "betting_close": self.w3_contract_handle.functions.getBettingClose().call(),
-            "event_close": self.w3_contract_handle.functions.getEventClose().call(),
-            "payout_close": self.w3_contract_handle.functions.getPayoutClose().call(),
-
-            "contract_balance": Web3.from_wei(self.w3_contract_handle.functions.getContractBalance().call(),
-                                              'ether'),
-            "over_betters_balance": Web3.from_wei(self.w3_contract_handle.functions.getOverBettersBalance().call(),
-                                                  'ether'),
-            "under_betters_balance": Web3.from_wei(
-                self.w3_contract_handle.functions.getUnderBettersBalance().call(), 'ether'),
-            "over_betting_payout_modifier": self.w3_contract_handle.functions.getOverBettingPayoutModifier().call(),
-            "under_betting_payout_modifier": self.w3_contract_handle.functions.getUnderBettingPayoutModifier().call(),
-            "over_betters_addresses": self.w3_contract_handle.functions.getOverBettersAddresses().call(),
-            "under_betters_addresses": self.w3_contract_handle.functions.getUnderBettersAddresses().call(),
-            "is_event_over": self.w3_contract_handle.functions.isEventOver().call(),
-            "is_payout_period_over": self.w3_contract_handle.functions.isPayoutPeriodOver().call()
+        self.function_abis = get_function_abis(self.w3_contract_handle.abi)
 
-        }
+    @classmethod
+    def from_abi_id(cls, provider: Provider, contract_address, abi_id, abi_loader, use_multicall=True):
+        """
+        Build an interface from a registered ABI through the contract factory cache
+        :param provider:
+        :param contract_address:
+        :param abi_id: ABI registry id
+        :param abi_loader: callable returning the ABI for abi_id
+        :param use_multicall:
+        :return: EventContractInterface
+        """
+        contract_factory = contract_factory_cache.get(w3=provider.w3, abi_id=abi_id, abi_loader=abi_loader)
+
+        return cls(provider=provider, contract_address=contract_address, use_multicall=use_multicall,
+                   contract_factory=contract_factory)
+
+    @metrics.timed("get_event_contract_info_seconds")
+    def get_event_contract_info(self, fields=None, block_identifier="latest") -> Optional[Dict]:
+        """
+        Read the event contract state. Getters are batched into a single Multicall3 eth_call,
+        falling back to one eth_call per getter if the batch cannot be executed.
+        Getters that are not part of the contract ABI are reported as None.
+        :param fields: contract info fields to read, all fields if None
+        :param block_identifier: block to read the state at
+        :return: contract info dict
+        """
+        contract_info = None
+        if self.use_multicall:
+            try:
+                contract_info = self.get_event_contract_info_batched(fields=fields,
+                                                                     block_identifier=block_identifier)
+            except MULTICALL_FALLBACK_ERRORS as e:
+                print(f"Multicall read failed for {self.w3_contract_handle.address}, reading getters one by one: {e}")
+
+        if contract_info is None:
+            contract_info = self.get_event_contract_info_sequential(fields=fields,
+                                                                    block_identifier=block_identifier)
 
         return contract_info
+
+    def get_event_contract_info_batched(self, fields=None, block_identifier="latest") -> Optional[Dict]:
+        getters = get_contract_info_getters(self.function_abis, fields=fields)
+
+        calls = [(self.w3_contract_handle.address,
+                  self.w3_contract_handle.encode_abi(abi_element_identifier=function_name))
+                 for _, function_name, _ in getters]
+        results = Multicall(provider=self.provider).aggregate(calls=calls, block_identifier=block_identifier)
+        values = decode_getter_results(self.provider.w3.codec, self.function_abis, getters, results)
+
+        return build_contract_info(self.w3_contract_handle.address, self.w3_contract_handle.abi, getters, values)
+
+    def get_event_contract_info_sequential(self, fields=None, block_identifier="latest") -> Optional[Dict]:
+        getters = get_contract_info_getters(self.function_abis, fields=fields)
+        values = [self.w3_contract_handle.functions[function_name]().call(block_identifier=block_identifier)
+                  for _, function_name, _ in getters]
+
+        return build_contract_info(self.w3_contract_handle.address, self.w3_contract_handle.abi, getters, values)
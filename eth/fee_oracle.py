@@ -0,0 +1,172 @@
+from typing import Dict, Optional
+import math
+import time
+import hashlib
+import threading
+import weakref
+
+from web3 import Web3
+
+from .provider.provider import Provider
+
+
+class FeeCapExceededError(Exception):
+    pass
+
+
+class FeeOracle:
+    """
+    EIP-1559 fee suggestions from a cached eth_feeHistory window. The history is re-read at most once
+    per refresh_interval (about one block), so back to back deploys share a single fee lookup.
+    """
+
+    _oracles = weakref.WeakKeyDictionary()
+    # fee policy of the shared oracles, see configure
+    _settings = {"history_blocks": 10, "max_fee_cap": None}
+
+    def __init__(self, provider: Provider, history_blocks=10, priority_fee_percentile=50,
+                 base_fee_multiplier=2.0, max_fee_cap: Optional[int] = None, min_priority_fee=Web3.to_wei(1, 'gwei'),
+                 refresh_interval=12.0):
+        self.provider = provider
+        self.history_blocks = history_blocks
+        self.priority_fee_percentile = priority_fee_percentile
+        self.base_fee_multiplier = base_fee_multiplier
+        self.max_fee_cap = max_fee_cap
+        self.min_priority_fee = min_priority_fee
+        self.refresh_interval = refresh_interval
+        self._fees = None
+        self._fees_time = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, max_fee_cap_gwei=None, history_blocks=10):
+        """
+        Set the fee policy of the shared oracles, including the ones already created
+        :param max_fee_cap_gwei: max fee per gas cap in gwei, no cap if None
+        :param history_blocks: eth_feeHistory window
+        :return:
+        """
+        cls._settings = {"history_blocks": int(history_blocks),
+                         "max_fee_cap": Web3.to_wei(max_fee_cap_gwei, 'gwei') if max_fee_cap_gwei else None}
+        for oracle in list(cls._oracles.values()):
+            oracle.history_blocks = cls._settings["history_blocks"]
+            oracle.max_fee_cap = cls._settings["max_fee_cap"]
+
+    @classmethod
+    def for_provider(cls, provider: Provider) -> "FeeOracle":
+        """
+        Get the shared fee oracle of a provider, with the fee policy set by configure
+        :param provider:
+        :return: FeeOracle
+        """
+        oracle = cls._oracles.get(provider)
+        if oracle is None:
+            oracle = cls(provider=provider, **cls._settings)
+            cls._oracles[provider] = oracle
+
+        return oracle
+
+    def refresh(self) -> Dict:
+        """
+        Re-read the fee history and recompute the fee suggestion
+        :return: {"base_fee": ..., "priority_fee": ..., "block_number": ...}
+        """
+        fee_history = self.provider.w3.eth.fee_history(self.history_blocks, 'latest',
+                                                       [self.priority_fee_percentile])
+
+        return self._set_fees(fee_history)
+
+    async def refresh_async(self) -> Dict:
+        """
+        refresh() for a provider on AsyncWeb3
+        :return: {"base_fee": ..., "priority_fee": ..., "block_number": ...}
+        """
+        fee_history = await self.provider.w3.eth.fee_history(self.history_blocks, 'latest',
+                                                             [self.priority_fee_percentile])
+
+        return self._set_fees(fee_history)
+
+    def _set_fees(self, fee_history) -> Dict:
+        # the last base fee is the one of the next block
+        next_base_fee = fee_history["baseFeePerGas"][-1]
+        rewards = sorted(reward[0] for reward in fee_history.get("reward") or [] if reward and reward[0] > 0)
+        priority_fee = rewards[len(rewards) // 2] if rewards else self.min_priority_fee
+
+        fees = {"base_fee": next_base_fee,
+                "priority_fee": max(priority_fee, self.min_priority_fee),
+                "block_number": fee_history["oldestBlock"] + len(fee_history["baseFeePerGas"]) - 2}
+        with self._lock:
+            self._fees = fees
+            self._fees_time = time.time()
+
+        return fees
+
+    def _get_cached_fees(self) -> Optional[Dict]:
+        with self._lock:
+            if self._fees is not None and time.time() - self._fees_time < self.refresh_interval:
+                return self._fees
+
+        return None
+
+    def get_fees(self) -> Dict:
+        fees = self._get_cached_fees()
+
+        return fees if fees is not None else self.refresh()
+
+    def get_fee_params(self) -> Dict:
+        """
+        Fee fields for a dynamic fee transaction, within the max fee policy
+        :return: {"maxFeePerGas": ..., "maxPriorityFeePerGas": ...}
+        """
+        return self._build_fee_params(self.get_fees())
+
+    async def get_fee_params_async(self) -> Dict:
+        fees = self._get_cached_fees()
+        if fees is None:
+            fees = await self.refresh_async()
+
+        return self._build_fee_params(fees)
+
+    def _build_fee_params(self, fees: Dict) -> Dict:
+        priority_fee = fees["priority_fee"]
+        max_fee = int(fees["base_fee"] * self.base_fee_multiplier) + priority_fee
+
+        if self.max_fee_cap is not None:
+            if fees["base_fee"] + priority_fee > self.max_fee_cap:
+                raise FeeCapExceededError(f"Next base fee {fees['base_fee']} plus priority fee {priority_fee} "
+                                          f"exceeds the max fee cap {self.max_fee_cap}")
+            max_fee = min(max_fee, self.max_fee_cap)
+
+        return {"maxFeePerGas": max_fee, "maxPriorityFeePerGas": priority_fee}
+
+
+class GasLimitCache:
+    """
+    Gas limits per contract artifact learned from deploy receipts. Deploys of the same bytecode use
+    the largest gas seen so far plus a safety margin instead of an eth_estimateGas round-trip.
+    """
+
+    def __init__(self, margin=1.2):
+        self.margin = margin
+        self._gas_used = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(bytecode) -> str:
+        if isinstance(bytecode, str):
+            bytecode = bytecode.encode()
+        return hashlib.sha256(bytecode).hexdigest()
+
+    def get(self, key) -> Optional[int]:
+        with self._lock:
+            gas_used = self._gas_used.get(key)
+
+        return math.ceil(gas_used * self.margin) if gas_used is not None else None
+
+    def record(self, key, gas_used):
+        with self._lock:
+            self._gas_used[key] = max(gas_used, self._gas_used.get(key, 0))
+
+
+# shared cache, run_jobs sets its margin from DEPLOY_GAS_MARGIN in the .env config
+gas_limit_cache = GasLimitCache()
@@ -0,0 +1,226 @@
+from typing import Dict, List, Optional
+from web3 import Web3
+from pymongo import UpdateOne
+
+from db.write_buffer import MongoWriteBuffer
+from db.schemas.event_serializers import to_decimal128
+from .provider.provider import Provider
+
+BETTOR_INDEX_COLLECTION = "event_bettors"
+LOG_INDEXER_STATE_COLLECTION = "log_indexer_state"
+
+
+def normalize_topic(topic) -> str:
+    # HexBytes.hex() drops the 0x prefix in newer hexbytes releases
+    topic = topic.hex() if not isinstance(topic, str) else topic
+    return topic.lower() if topic.startswith("0x") else f"0x{topic.lower()}"
+
+
+BET_PLACED_TOPIC = normalize_topic(Web3.keccak(text="BetPlaced(address,bool,uint256,uint256)"))
+WINNERS_SET_TOPIC = normalize_topic(Web3.keccak(text="WinnersSet(uint256,uint256)"))
+WITHDRAWN_TOPIC = normalize_topic(Web3.keccak(text="Withdrawn(address,uint256)"))
+
+
+def topic_to_address(topic) -> str:
+    return Web3.to_checksum_address(normalize_topic(topic)[-40:])
+
+
+def decode_words(data) -> List[int]:
+    data = bytes(data) if not isinstance(data, str) else bytes.fromhex(data[2:] if data.startswith("0x") else data)
+    return [int.from_bytes(data[offset:offset + 32], "big") for offset in range(0, len(data), 32)]
+
+
+def get_log_id(log) -> str:
+    return f"{normalize_topic(log['transactionHash'])}:{log['logIndex']}"
+
+
+def emits_bet_logs(contract_abi) -> bool:
+    """
+    Whether a contract emits BetPlaced, so its bettors are covered by the log index.
+    Contracts deployed before the bet events were added only expose their bettors through storage.
+    :param contract_abi:
+    :return: bool
+    """
+    return any(abi_entry.get("type") == "event" and abi_entry.get("name") == "BetPlaced"
+               for abi_entry in contract_abi or [])
+
+
+class BettorLogIndexer:
+    """
+    Maintains a per-contract bettor index (bet totals, side, payouts) from BetPlaced, WinnersSet and
+    Withdrawn logs. All live contracts are covered by one eth_getLogs query per block range, so the
+    cost of a cycle grows with the number of new bets instead of bettors x contracts.
+    Every log is applied at most once to its bettor document, so re-reading a block range is harmless.
+    """
+
+    def __init__(self, provider: Provider, mongo_handler, max_block_range=2000, max_addresses_per_query=500,
+                 confirmations=2, lookback_blocks=14400, index_name="bettor_index"):
+        self.provider = provider
+        self.mongo_handler = mongo_handler
+        self.max_block_range = max_block_range
+        self.max_addresses_per_query = max_addresses_per_query
+        self.confirmations = confirmations
+        self.lookback_blocks = lookback_blocks
+        self.index_name = index_name
+
+    def get_last_indexed_block(self) -> Optional[int]:
+        state = self.mongo_handler.find_one(collection=LOG_INDEXER_STATE_COLLECTION, query={"_id": self.index_name})
+        return state["last_block"] if state is not None else None
+
+    def get_logs(self, contract_addresses: List[str], from_block, to_block) -> List[Dict]:
+        """
+        Read the bet logs of many contracts, split into block ranges and address chunks
+        :param contract_addresses:
+        :param from_block: first block (inclusive)
+        :param to_block: last block (inclusive)
+        :return: logs ordered by block and log index
+        """
+        logs = []
+        for range_start in range(from_block, to_block + 1, self.max_block_range):
+            range_end = min(to_block, range_start + self.max_block_range - 1)
+            for chunk_start in range(0, len(contract_addresses), self.max_addresses_per_query):
+                logs += self.provider.w3.eth.get_logs({
+                    "fromBlock": range_start,
+                    "toBlock": range_end,
+                    "address": contract_addresses[chunk_start:chunk_start + self.max_addresses_per_query],
+                    "topics": [[BET_PLACED_TOPIC, WINNERS_SET_TOPIC, WITHDRAWN_TOPIC]]
+                })
+
+        return sorted(logs, key=lambda log: (log["blockNumber"], log["logIndex"]))
+
+    @staticmethod
+    def build_log_update(log) -> Optional[tuple]:
+        """
+        Bettor index update for a log
+        :param log: BetPlaced, WinnersSet or Withdrawn log
+        :return: (query, update_document) or None for logs that do not concern a bettor
+        """
+        topic = normalize_topic(log["topics"][0])
+        contract_address = Web3.to_checksum_address(log["address"])
+        log_id = get_log_id(log)
+
+        if topic == BET_PLACED_TOPIC:
+            amount, fee = decode_words(log["data"])
+            bettor_address = topic_to_address(log["topics"][1])
+            update_document = {
+                "$inc": {"bet_total": to_decimal128(Web3.from_wei(amount, 'ether')),
+                         "fee_total": to_decimal128(Web3.from_wei(fee, 'ether')),
+                         "bet_count": 1},
+                "$set": {"is_over_bet": int(normalize_topic(log["topics"][2]), 16) == 1},
+            }
+        elif topic == WITHDRAWN_TOPIC:
+            amount, = decode_words(log["data"])
+            bettor_address = topic_to_address(log["topics"][1])
+            update_document = {
+                "$inc": {"withdrawn_total": to_decimal128(Web3.from_wei(amount, 'ether'))},
+                "$set": {"is_winner": True},
+            }
+        else:
+            return None
+
+        update_document["$push"] = {"applied_logs": log_id}
+        update_document["$max"] = {"last_block": log["blockNumber"]}
+        # a log already applied to the bettor no longer matches
+        query = {"contract_address": contract_address, "bettor_address": bettor_address,
+                 "applied_logs": {"$ne": log_id}}
+
+        return query, update_document
+
+    @staticmethod
+    def build_bettor_array_update(log) -> tuple:
+        """
+        Event record update adding the bettor of a BetPlaced log to its side's address array. Contracts
+        push a bettor once per side, in bet order, which $addToSet over the ordered logs reproduces.
+        :param log: BetPlaced log
+        :return: (query, update_document)
+        """
+        array_field = "over_betters_addresses" if int(normalize_topic(log["topics"][2]), 16) == 1 \
+            else "under_betters_addresses"
+        return ({"contract_address": Web3.to_checksum_address(log["address"])},
+                {"$addToSet": {array_field: topic_to_address(log["topics"][1])}})
+
+    @staticmethod
+    def build_settlement_update(log) -> tuple:
+        price_at_close, winner_count = decode_words(log["data"])
+        return ({"contract_address": Web3.to_checksum_address(log["address"])},
+                {"$set": {"price_at_close": to_decimal128(Web3.from_wei(price_at_close, 'ether')),
+                          "winner_count": winner_count,
+                          "settled_block": log["blockNumber"]}})
+
+    def ensure_bettor_documents(self, queries):
+        """
+        Create the missing bettor documents up front, so the per-log updates never need to upsert and
+        several logs of a new bettor in one bulk write cannot race to create it
+        :param queries: bettor log update queries
+        :return:
+        """
+        bettor_keys = {(query["contract_address"], query["bettor_address"]) for query in queries}
+        if not bettor_keys:
+            return
+
+        self.mongo_handler.bulk_write(collection=BETTOR_INDEX_COLLECTION, operations=[
+            UpdateOne({"contract_address": contract_address, "bettor_address": bettor_address},
+                      {"$setOnInsert": {"applied_logs": []}}, upsert=True)
+            for contract_address, bettor_address in sorted(bettor_keys)
+        ])
+
+    def index_contracts(self, contract_addresses: List[str],
+                        event_collection_by_address: Optional[Dict[str, str]] = None) -> int:
+        """
+        Index the logs of the given contracts since the last indexed block. Bettor documents, the bettor
+        address arrays of the event records and settlement results are written here, and the checkpoint only
+        advances once every one of these writes is confirmed; a partly failed write is retried from the same
+        block on the next pass, where the logs already applied are skipped.
+        :param contract_addresses: live contract addresses
+        :param event_collection_by_address: event record collection per contract, for record updates
+        :return: number of logs indexed
+        """
+        latest_block = self.provider.w3.eth.block_number - self.confirmations
+        last_indexed_block = self.get_last_indexed_block()
+        from_block = last_indexed_block + 1 if last_indexed_block is not None \
+            else max(0, latest_block - self.lookback_blocks)
+        if not contract_addresses or from_block > latest_block:
+            return 0
+
+        logs = self.get_logs(contract_addresses=[Web3.to_checksum_address(address)
+                                                 for address in contract_addresses],
+                             from_block=from_block,
+                             to_block=latest_block)
+        index_buffer = MongoWriteBuffer(mongo_handler=self.mongo_handler)
+        log_updates = []
+        for log in logs:
+            topic = normalize_topic(log["topics"][0])
+            collection_name = (event_collection_by_address or {}).get(Web3.to_checksum_address(log["address"]))
+            if topic == WINNERS_SET_TOPIC:
+                if collection_name is not None:
+                    query, update_document = self.build_settlement_update(log)
+                    index_buffer.update(collection=collection_name, query=query, document=update_document,
+                                        description=f"settlement {log['address']}")
+                continue
+            if topic == BET_PLACED_TOPIC and collection_name is not None:
+                query, update_document = self.build_bettor_array_update(log)
+                index_buffer.update(collection=collection_name, query=query, document=update_document,
+                                    description=f"bettor array {get_log_id(log)}")
+
+            log_update = self.build_log_update(log)
+            if log_update is not None:
+                log_updates.append((get_log_id(log), *log_update))
+
+        self.ensure_bettor_documents(query for _, query, _ in log_updates)
+        for log_id, query, update_document in log_updates:
+            index_buffer.update(collection=BETTOR_INDEX_COLLECTION, query=query, document=update_document,
+                                description=f"bettor log {log_id}")
+        failed_writes = sum(len(result["errors"]) for result in index_buffer.flush().values())
+        if failed_writes:
+            print(f"{failed_writes} bettor index writes failed, {self.index_name} stays at block "
+                  f"{last_indexed_block}")
+            return len(logs)
+
+        self.mongo_handler.update(collection=LOG_INDEXER_STATE_COLLECTION,
+                                  query={"_id": self.index_name},
+                                  document={"$set": {"last_block": latest_block}},
+                                  upsert=True)
+        print(f"Indexed {len(logs)} bet logs of {len(contract_addresses)} contracts "
+              f"from block {from_block} to {latest_block}")
+
+        return len(logs)
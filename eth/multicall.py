@@ -0,0 +1,69 @@
+from typing import List, Tuple
+from eth_abi.exceptions import DecodingError
+from web3.exceptions import BadFunctionCallOutput, ContractLogicError, Web3RPCError
+
+from .provider.provider import Provider
+
+# Multicall3 is deployed at the same address on mainnet, Sepolia and most EVM chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Call3[]",
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Result[]",
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
+
+class MulticallError(Exception):
+    pass
+
+
+# Batch failures a read with one eth_call per getter can still get past, ex. a getter reverting, no Multicall3
+# on the chain or a batch over the node's eth_call gas cap. Other errors are bugs and are not hidden by a fallback.
+MULTICALL_FALLBACK_ERRORS = (MulticallError, ContractLogicError, BadFunctionCallOutput, Web3RPCError, DecodingError)
+
+
+class Multicall:
+    def __init__(self, provider: Provider, multicall_address=MULTICALL3_ADDRESS):
+        self.provider = provider
+        self.w3_contract_handle = self.provider.w3.eth.contract(address=multicall_address, abi=MULTICALL3_ABI)
+
+    def aggregate(self, calls: List[Tuple[str, bytes]], allow_failure=True, block_identifier="latest") -> List:
+        """
+        Execute many contract calls in a single eth_call through Multicall3.aggregate3
+        :param calls: [(target_address, call_data), ...]
+        :param allow_failure: allow individual calls to revert without reverting the batch
+        :param block_identifier: block to execute the calls against
+        :return: [(success, return_data), ...] in the same order as calls
+        """
+        if not calls:
+            return []
+
+        call_structs = [(target, allow_failure, call_data) for target, call_data in calls]
+
+        return self.w3_contract_handle.functions.aggregate3(call_structs).call(block_identifier=block_identifier)
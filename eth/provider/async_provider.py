@@ -0,0 +1,112 @@
+import asyncio
+from web3 import AsyncWeb3
+from web3.exceptions import TransactionNotFound
+
+from utils.metrics import instrument_async_web3_provider
+from .provider import Provider, get_send_error_outcome, SEND_LOOKUP, SEND_RESEND
+
+
+class AsyncProvider:
+    """
+    AsyncWeb3 counterpart of Provider for the async job engine: the same wallet and the same local nonce
+    allocator, with every chain request awaitable so many of them overlap on one event loop.
+    """
+
+    def __init__(self, provider_url=None, wallet_address=None, wallet_private_key=None, provider_urls=None,
+                 web3_provider=None):
+        if web3_provider is not None:
+            self.provider = web3_provider
+        else:
+            # the async engine has no endpoint pool or hedging, only the first endpoint is used
+            self.provider = AsyncWeb3.AsyncHTTPProvider(endpoint_uri=provider_url or provider_urls[0])
+        instrument_async_web3_provider(self.provider)
+        self.w3 = AsyncWeb3(self.provider)
+        self.chain_id = None
+
+        self.__wallet_address = wallet_address
+        self.__wallet_private_key = wallet_private_key
+
+        self._nonce_lock = asyncio.Lock()
+        self._next_nonce = None
+        self._pending_nonces = set()
+
+    async def get_chain_id(self):
+        if self.chain_id is None:
+            self.chain_id = await self.w3.eth.chain_id
+        return self.chain_id
+
+    async def allocate_nonce(self):
+        """
+        Allocate the next nonce for the wallet without a round-trip once synced.
+        The local counter is seeded from the pending transaction count of the wallet.
+        :return: nonce
+        """
+        async with self._nonce_lock:
+            if self._next_nonce is None:
+                self._next_nonce = await self.w3.eth.get_transaction_count(self.__wallet_address, 'pending')
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            self._pending_nonces.add(nonce)
+
+            return nonce
+
+    def release_nonce(self, nonce):
+        self._pending_nonces.discard(nonce)
+
+    def resync_nonce(self):
+        """
+        Drop the local nonce counter so the next allocation re-reads it from the node
+        :return:
+        """
+        self._next_nonce = None
+        self._pending_nonces.clear()
+
+    def get_pending_nonces(self):
+        return sorted(self._pending_nonces)
+
+    @staticmethod
+    def is_nonce_error(error: Exception) -> bool:
+        return Provider.is_nonce_error(error)
+
+    async def is_transaction_known(self, txn_hash) -> bool:
+        try:
+            await self.w3.eth.get_transaction(txn_hash)
+        except TransactionNotFound:
+            return False
+
+        return True
+
+    async def send_signed_transaction(self, signed_txn, attempts=3, retry_wait=1.0):
+        """
+        Provider.send_signed_transaction on AsyncWeb3: transport errors resend the same signed txn
+        :param signed_txn: signed transaction
+        :param attempts: sends of the signed txn before giving up on transport errors
+        :param retry_wait: seconds between sends
+        :return: txn hash
+        :raises TransactionDeliveryError: if the delivery could not be confirmed, the txn may still be pending
+        """
+        for attempt in range(attempts):
+            try:
+                return await self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+            except Exception as e:
+                send_outcome = get_send_error_outcome(e, signed_txn=signed_txn, attempt=attempt, attempts=attempts)
+                if send_outcome == SEND_LOOKUP and not await self.is_transaction_known(signed_txn.hash):
+                    raise e
+                if send_outcome != SEND_RESEND:
+                    return signed_txn.hash
+                await asyncio.sleep(retry_wait)
+
+    async def get_is_connected(self):
+        return await self.w3.is_connected()
+
+    async def close(self):
+        # AsyncHTTPProvider keeps an aiohttp session open until it is disconnected
+        disconnect = getattr(self.provider, "disconnect", None)
+        if disconnect is not None:
+            await disconnect()
+
+    def get_wallet_address(self):
+        return self.__wallet_address
+
+    def get_wallet_private_key(self):
+        return self.__wallet_private_key
@@ -1,23 +1,156 @@
+import time
+import threading
+import requests
 from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+from utils.metrics import instrument_web3_provider
+from .provider_pool import ProviderPool
+
+NONCE_ERROR_MESSAGES = ("nonce too low", "replacement transaction underpriced")
+# The node already has this exact signed txn, the send succeeded
+ALREADY_KNOWN_MESSAGES = ("already known", "known transaction")
+# Outcomes of a failed broadcast, see get_send_error_outcome
+SEND_DELIVERED = "delivered"
+SEND_LOOKUP = "lookup"
+SEND_RESEND = "resend"
+# Transport and node load errors, the request may or may not have reached the node
+TRANSPORT_ERROR_MESSAGES = ("timeout", "timed out", "connection", "too many requests", "429", "502", "503",
+                            "rate limit", "header not found", "temporarily unavailable")
+
+
+class TransactionDeliveryError(Exception):
+    """
+    A signed txn could not be confirmed as delivered because of transport errors. It may still have
+    reached the node, so it must not be signed again with a new nonce; txn_hash is the hash to look for.
+    """
+
+    def __init__(self, message, txn_hash):
+        super().__init__(message)
+        self.txn_hash = txn_hash
 
 
 class Provider:
-    def __init__(self, provider_url, wallet_address, wallet_private_key):
-        self.provider = Web3.HTTPProvider(endpoint_uri=provider_url)
+    def __init__(self, provider_url=None, wallet_address=None, wallet_private_key=None, provider_urls=None,
+                 hedge_delay=None, web3_provider=None):
+        if web3_provider is not None:
+            self.provider = web3_provider
+        elif provider_urls:
+            self.provider = ProviderPool(endpoint_uris=provider_urls, hedge_delay=hedge_delay)
+        else:
+            self.provider = Web3.HTTPProvider(endpoint_uri=provider_url)
+        instrument_web3_provider(self.provider)
         self.w3 = Web3(self.provider)
-        self.chain_id = self.w3.eth.chain_id
-        self.is_connected = self.w3.is_connected()
+        # resolved lazily so constructing a provider does not block on the network
+        self.chain_id = None
+        self.is_connected = None
 
         self.__wallet_address = wallet_address
         self.__wallet_private_key = wallet_private_key
 
+        self._nonce_lock = threading.Lock()
+        self._next_nonce = None
+        self._pending_nonces = set()
+
     def get_chain_id(self):
+        if self.chain_id is None:
+            self.chain_id = self.w3.eth.chain_id
         return self.chain_id
 
     def get_nonce(self):
         return self.w3.eth.get_transaction_count(self.__wallet_address)
 
+    def allocate_nonce(self):
+        """
+        Allocate the next nonce for the wallet without a round-trip once synced.
+        The local counter is seeded from the pending transaction count of the wallet.
+        :return: nonce
+        """
+        with self._nonce_lock:
+            if self._next_nonce is None:
+                self._next_nonce = self.w3.eth.get_transaction_count(self.__wallet_address, 'pending')
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            self._pending_nonces.add(nonce)
+
+            return nonce
+
+    def release_nonce(self, nonce):
+        """
+        Mark an allocated nonce as mined
+        :param nonce:
+        :return:
+        """
+        with self._nonce_lock:
+            self._pending_nonces.discard(nonce)
+
+    def resync_nonce(self):
+        """
+        Drop the local nonce counter so the next allocation re-reads it from the node.
+        Called when a send fails or the node reports a nonce conflict.
+        :return:
+        """
+        with self._nonce_lock:
+            self._next_nonce = None
+            self._pending_nonces.clear()
+
+    def get_pending_nonces(self):
+        with self._nonce_lock:
+            return sorted(self._pending_nonces)
+
+    @staticmethod
+    def is_nonce_error(error: Exception) -> bool:
+        message = str(error).lower()
+        return any(nonce_error in message for nonce_error in NONCE_ERROR_MESSAGES)
+
+    @staticmethod
+    def is_already_known_error(error: Exception) -> bool:
+        message = str(error).lower()
+        return any(known_error in message for known_error in ALREADY_KNOWN_MESSAGES)
+
+    @staticmethod
+    def is_transport_error(error: Exception) -> bool:
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                              TimeoutError, ConnectionError)):
+            return True
+
+        message = str(error).lower()
+        return any(transport_error in message for transport_error in TRANSPORT_ERROR_MESSAGES)
+
+    def is_transaction_known(self, txn_hash) -> bool:
+        try:
+            self.w3.eth.get_transaction(txn_hash)
+        except TransactionNotFound:
+            return False
+
+        return True
+
+    def send_signed_transaction(self, signed_txn, attempts=3, retry_wait=1.0):
+        """
+        Broadcast a signed txn. Transport errors resend the same signed txn, never a re-signed one, so a send
+        whose response was lost cannot be duplicated under a new nonce. A node that already has the txn
+        reports it as known, and a nonce conflict after a lost response means it was already mined; both are
+        successful sends and the hash of the signed txn is returned.
+        :param signed_txn: signed transaction
+        :param attempts: sends of the signed txn before giving up on transport errors
+        :param retry_wait: seconds between sends
+        :return: txn hash
+        :raises TransactionDeliveryError: if the delivery could not be confirmed, the txn may still be pending
+        """
+        for attempt in range(attempts):
+            try:
+                return self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+            except Exception as e:
+                send_outcome = get_send_error_outcome(e, signed_txn=signed_txn, attempt=attempt, attempts=attempts)
+                if send_outcome == SEND_LOOKUP and not self.is_transaction_known(signed_txn.hash):
+                    raise e
+                if send_outcome != SEND_RESEND:
+                    return signed_txn.hash
+                time.sleep(retry_wait)
+
     def get_is_connected(self):
+        if self.is_connected is None:
+            self.is_connected = self.w3.is_connected()
         return self.is_connected
 
     def get_w3(self):
@@ -31,3 +164,30 @@ class Provider:
 
     def get_wallet_private_key(self):
         return self.__wallet_private_key
+
+
+def get_send_error_outcome(error: Exception, signed_txn, attempt, attempts) -> str:
+    """
+    What a failed broadcast of a signed txn means, shared by Provider and AsyncProvider
+    :param error: error of the send
+    :param signed_txn: signed transaction
+    :param attempt: index of the failed send
+    :param attempts: sends of the signed txn before giving up on transport errors
+    :return: SEND_DELIVERED if the node has the txn, SEND_LOOKUP if a nonce conflict after an earlier send
+             needs the txn looked up, SEND_RESEND to send the same signed txn again
+    :raises TransactionDeliveryError: once the attempts are used up on transport errors
+    """
+    if Provider.is_already_known_error(error):
+        print(f"Txn {Web3.to_hex(signed_txn.hash)} already known to the node")
+        return SEND_DELIVERED
+    if attempt > 0 and Provider.is_nonce_error(error):
+        # the earlier send may have been mined before its response was lost
+        return SEND_LOOKUP
+    if not Provider.is_transport_error(error):
+        raise error
+    if attempt == attempts - 1:
+        raise TransactionDeliveryError(f"Delivery of txn {Web3.to_hex(signed_txn.hash)} unconfirmed after "
+                                       f"{attempts} sends: {error}", txn_hash=signed_txn.hash)
+    print(f"Send of txn {Web3.to_hex(signed_txn.hash)} failed, resending it: {error}")
+
+    return SEND_RESEND
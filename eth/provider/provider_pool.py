@@ -0,0 +1,164 @@
+from typing import Any, List, Optional
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+from web3 import Web3
+from web3.providers.base import JSONBaseProvider
+
+# Methods that must always go to the same endpoint so nonces stay consistent, and lookups of sent txns, which
+# another endpoint may not have seen yet and would report as not found
+PINNED_METHODS = {"eth_sendRawTransaction", "eth_sendTransaction", "eth_getTransactionCount",
+                  "eth_getTransactionReceipt", "eth_getTransactionByHash"}
+# Read methods that may be sent to a second endpoint when the first one is slow
+HEDGED_METHODS = {"eth_call", "eth_getBalance", "eth_getStorageAt", "eth_getCode", "eth_getLogs"}
+# JSON-RPC error codes that indicate an unhealthy endpoint rather than a bad request
+ENDPOINT_ERROR_CODES = {-32005, -32603, 429}
+
+
+class PoolEndpoint:
+    def __init__(self, endpoint_uri, request_timeout=10):
+        self.endpoint_uri = endpoint_uri
+        # persistent keep-alive session per endpoint
+        self.session = requests.Session()
+        self.provider = Web3.HTTPProvider(endpoint_uri=endpoint_uri,
+                                          request_kwargs={"timeout": request_timeout},
+                                          session=self.session)
+        self.latency = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.lock = threading.Lock()
+
+    def record_success(self, latency, smoothing=0.2):
+        with self.lock:
+            self.latency = latency if self.latency is None else (1 - smoothing) * self.latency + smoothing * latency
+            self.error_rate = (1 - smoothing) * self.error_rate
+            self.consecutive_failures = 0
+
+    def record_failure(self, smoothing=0.2, base_cooldown=5.0, max_cooldown=300.0):
+        with self.lock:
+            self.error_rate = (1 - smoothing) * self.error_rate + smoothing
+            self.consecutive_failures += 1
+            self.cooldown_until = time.time() + min(max_cooldown,
+                                                    base_cooldown * 2 ** (self.consecutive_failures - 1))
+
+    def is_available(self):
+        return time.time() >= self.cooldown_until
+
+    def get_score(self):
+        # lower is better, untested endpoints are tried before known slow ones
+        latency = self.latency if self.latency is not None else 0.0
+        return latency * (1 + 10 * self.error_rate)
+
+
+class ProviderPool(JSONBaseProvider):
+    """
+    web3 provider routing requests over several HTTP endpoints. Reads go to the healthiest endpoint
+    (by smoothed latency and error rate) and fail over to the next one; slow eth_calls can be hedged
+    to a second endpoint. Sends and the receipt and txn lookups that follow them stay pinned to one endpoint
+    and only move when it fails.
+    """
+
+    def __init__(self, endpoint_uris: List[str], hedge_delay: Optional[float] = None, request_timeout=10):
+        super().__init__()
+        if not endpoint_uris:
+            raise Exception("ProviderPool needs at least one endpoint")
+        self.endpoints = [PoolEndpoint(endpoint_uri=endpoint_uri, request_timeout=request_timeout)
+                          for endpoint_uri in endpoint_uris]
+        self.hedge_delay = hedge_delay
+        self.pinned_endpoint = self.endpoints[0]
+        self._pin_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(2, 2 * len(self.endpoints)))
+
+    def get_ranked_endpoints(self) -> List[PoolEndpoint]:
+        available = [endpoint for endpoint in self.endpoints if endpoint.is_available()]
+        unavailable = [endpoint for endpoint in self.endpoints if not endpoint.is_available()]
+
+        return sorted(available, key=PoolEndpoint.get_score) + sorted(unavailable,
+                                                                      key=lambda endpoint: endpoint.cooldown_until)
+
+    def _request(self, endpoint: PoolEndpoint, method, params):
+        start = time.time()
+        try:
+            response = endpoint.provider.make_request(method, params)
+        except Exception:
+            endpoint.record_failure()
+            raise
+
+        error = response.get("error") if isinstance(response, dict) else None
+        if isinstance(error, dict) and error.get("code") in ENDPOINT_ERROR_CODES:
+            endpoint.record_failure()
+            raise Exception(f"{endpoint.endpoint_uri} returned {error}")
+
+        endpoint.record_success(time.time() - start)
+        return response
+
+    def make_request(self, method, params) -> Any:
+        if method in PINNED_METHODS:
+            return self._make_pinned_request(method, params)
+
+        ranked_endpoints = self.get_ranked_endpoints()
+        if self.hedge_delay is not None and method in HEDGED_METHODS and len(ranked_endpoints) > 1:
+            try:
+                return self._make_hedged_request(ranked_endpoints[0], ranked_endpoints[1], method, params)
+            except Exception as e:
+                print(f"Hedged {method} failed on both endpoints: {e}")
+                ranked_endpoints = ranked_endpoints[2:]
+                if not ranked_endpoints:
+                    raise e
+
+        last_error = None
+        for endpoint in ranked_endpoints:
+            try:
+                return self._request(endpoint, method, params)
+            except Exception as e:
+                print(f"{method} failed on {endpoint.endpoint_uri}, failing over: {e}")
+                last_error = e
+
+        raise last_error
+
+    def _make_hedged_request(self, primary: PoolEndpoint, secondary: PoolEndpoint, method, params):
+        futures = [self._executor.submit(self._request, primary, method, params)]
+        done, _ = wait(futures, timeout=self.hedge_delay)
+        if not done or futures[0].exception() is not None:
+            futures.append(self._executor.submit(self._request, secondary, method, params))
+
+        last_error = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                last_error = future.exception()
+
+        raise last_error
+
+    def _make_pinned_request(self, method, params):
+        with self._pin_lock:
+            pinned_endpoint = self.pinned_endpoint
+        try:
+            return self._request(pinned_endpoint, method, params)
+        except Exception as e:
+            for endpoint in self.get_ranked_endpoints():
+                if endpoint is pinned_endpoint:
+                    continue
+                print(f"{method} failed on pinned {pinned_endpoint.endpoint_uri}, re-pinning to "
+                      f"{endpoint.endpoint_uri}: {e}")
+                with self._pin_lock:
+                    self.pinned_endpoint = endpoint
+                return self._request(endpoint, method, params)
+            raise e
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        for endpoint in self.get_ranked_endpoints():
+            try:
+                if endpoint.provider.is_connected():
+                    return True
+            except Exception as e:
+                print(f"Unable to connect to {endpoint.endpoint_uri}: {e}")
+                endpoint.record_failure()
+
+        return False
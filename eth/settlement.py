@@ -0,0 +1,171 @@
+from typing import Dict, List, Optional
+from decimal import Decimal
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+from retrying import retry
+
+from .provider.provider import Provider, TransactionDeliveryError
+from .fee_oracle import FeeOracle
+from .simulation import is_retryable_error
+from .state_sync import STORAGE_LAYOUTS
+
+# Settlement functions in call order
+SETTLEMENT_FUNCTIONS = ["setPriceAtClose", "setWinners"]
+# Restricted payout functions of the contracts that pay winners directly (12h/24h). They have no
+# setPriceAtClose, so payWinners would settle against a zero closing price; these are not sent here.
+DIRECT_PAYOUT_FUNCTIONS = ["payWinners", "sendFee"]
+# Sends per settlement function before the record is marked failed
+MAX_SETTLEMENT_ATTEMPTS = 3
+
+# Explicit gas limits, so sends need no eth_estimateGas round-trip
+SET_PRICE_AT_CLOSE_GAS = 80000
+SET_WINNERS_BASE_GAS = 80000
+# one new winningBetters slot per winner
+SET_WINNERS_GAS_PER_BETTOR = 30000
+
+
+def get_function_names(contract_abi: List) -> set:
+    return {abi_entry.get("name") for abi_entry in contract_abi or [] if abi_entry.get("type") == "function"}
+
+
+def get_settlement_functions(contract_abi: List) -> List[str]:
+    function_names = get_function_names(contract_abi)
+    if "setPriceAtClose" not in function_names:
+        return []
+
+    return [function_name for function_name in SETTLEMENT_FUNCTIONS if function_name in function_names]
+
+
+def has_direct_payout(contract_abi: List) -> bool:
+    return any(function_name in get_function_names(contract_abi) for function_name in DIRECT_PAYOUT_FUNCTIONS)
+
+
+class EventSettler:
+    """
+    Sends the restricted settlement transactions (setPriceAtClose, setWinners) of expired contracts
+    back to back with locally allocated nonces, so a whole batch of contracts lands within a few blocks.
+    """
+
+    def __init__(self, provider: Provider, fee_oracle: Optional[FeeOracle] = None):
+        self.provider = provider
+        self.fee_oracle = fee_oracle if fee_oracle is not None else FeeOracle.for_provider(provider)
+
+    @retry(stop_max_attempt_number=5, wait_fixed=1000, retry_on_exception=is_retryable_error)
+    def send_transaction(self, contract_function, gas) -> Dict:
+        """
+        Sign and broadcast a contract call with a nonce from the provider's local allocator. Only nonce
+        conflicts and errors before the broadcast sign again; a broadcast whose delivery stays unconfirmed
+        returns its hash, and the next pass sends it again if the node never got it.
+        :param contract_function: bound web3 contract function
+        :param gas: gas limit
+        :return: {"txn_hash": ..., "nonce": ...}
+        """
+        txn = {"from": self.provider.get_wallet_address(),
+               "chainId": self.provider.get_chain_id(),
+               "gas": gas,
+               **self.fee_oracle.get_fee_params()}
+
+        nonce = self.provider.allocate_nonce()
+        try:
+            txn["nonce"] = nonce
+            signed_txn = self.provider.w3.eth.account.sign_transaction(
+                contract_function.build_transaction(txn), private_key=self.provider.get_wallet_private_key())
+            txn_hash = self.provider.send_signed_transaction(signed_txn)
+        except TransactionDeliveryError as e:
+            print(f"Settlement txn with nonce {nonce} may be pending: {e}")
+            return {"txn_hash": e.txn_hash, "nonce": nonce}
+        except Exception as e:
+            print(f"Settlement txn with nonce {nonce} failed, resyncing nonce: {e}")
+            self.provider.resync_nonce()
+            raise e
+
+        return {"txn_hash": txn_hash, "nonce": nonce}
+
+    def get_bettor_count(self, contract, contract_name=None) -> int:
+        """
+        Size of the larger bettor pool of a contract, read from its array length slots when the storage layout
+        is known and from the address getters otherwise
+        :param contract: web3 contract
+        :param contract_name: getContractName() of the contract
+        :return: bettor count
+        """
+        layout = STORAGE_LAYOUTS.get(contract_name)
+        if layout is not None:
+            return max(int.from_bytes(self.provider.w3.eth.get_storage_at(contract.address, layout[slot_field]),
+                                      "big")
+                       for slot_field in ("over_betters", "under_betters"))
+
+        return max(len(contract.functions.getOverBettersAddresses().call()),
+                   len(contract.functions.getUnderBettersAddresses().call()))
+
+    def send_settlement_function(self, contract_address, contract_abi: List, function_name, price_at_close,
+                                 contract_name=None) -> Dict:
+        """
+        Broadcast one settlement txn of a contract without waiting for the receipt
+        :param contract_address:
+        :param contract_abi:
+        :param function_name: setPriceAtClose or setWinners
+        :param price_at_close: closing price of the asset
+        :param contract_name: getContractName() of the contract, locates the bettor arrays for the setWinners gas
+        :return: {"txn_hash": ..., "nonce": ...}
+        """
+        contract = self.provider.w3.eth.contract(address=Web3.to_checksum_address(contract_address),
+                                                 abi=contract_abi)
+        if function_name == "setPriceAtClose":
+            return self.send_transaction(contract.functions.setPriceAtClose(
+                Web3.to_wei(Decimal(str(price_at_close)), 'ether')), SET_PRICE_AT_CLOSE_GAS)
+        if function_name == "setWinners":
+            # sized from the on-chain pools, the synced record counts may lag or be missing
+            bettor_count = self.get_bettor_count(contract, contract_name=contract_name)
+            return self.send_transaction(contract.functions.setWinners(),
+                                         SET_WINNERS_BASE_GAS + SET_WINNERS_GAS_PER_BETTOR * bettor_count)
+
+        raise Exception(f"Unknown settlement function {function_name}")
+
+    def wait_for_txn(self, sent_txn: Dict, timeout=180) -> Optional[bool]:
+        """
+        Wait for the receipt of a settlement txn
+        :param sent_txn: txn returned by send_settlement_function
+        :param timeout: seconds to wait for the receipt
+        :return: True if it succeeded, False if it reverted, None if no receipt arrived in time
+        """
+        try:
+            txn_receipt = self.provider.w3.eth.wait_for_transaction_receipt(sent_txn["txn_hash"], timeout=timeout)
+        except Exception as e:
+            print(f"No receipt for settlement txn {Web3.to_hex(sent_txn['txn_hash'])}: {e}")
+            # the txn may never have been delivered, the allocator re-reads the nonce from the node
+            self.provider.resync_nonce()
+            return None
+        finally:
+            self.provider.release_nonce(sent_txn["nonce"])
+
+        return txn_receipt["status"] == 1
+
+    def get_txn_status(self, txn_hash) -> Optional[bool]:
+        """
+        Status of a settlement txn sent in an earlier pass
+        :param txn_hash:
+        :return: True if it succeeded, False if it reverted, None if it is not mined
+        """
+        try:
+            txn_receipt = self.provider.w3.eth.get_transaction_receipt(txn_hash)
+        except Exception:
+            return None
+
+        return txn_receipt["status"] == 1 if txn_receipt is not None else None
+
+    def is_txn_known(self, txn_hash) -> bool:
+        """
+        Whether the node still knows an unmined settlement txn; dropped and replaced txns are not found
+        :param txn_hash:
+        :return: bool
+        """
+        try:
+            self.provider.w3.eth.get_transaction(txn_hash)
+        except TransactionNotFound:
+            return False
+        except Exception as e:
+            # unknown, keep waiting on it
+            print(f"Unable to look up settlement txn {txn_hash}: {e}")
+
+        return True
@@ -0,0 +1,82 @@
+from typing import Dict, Optional
+import time
+import threading
+
+from web3.exceptions import ContractLogicError, TimeExhausted
+
+from .provider.provider import Provider, TransactionDeliveryError
+
+# Deterministic failures, sending the same txn again fails the same way
+FATAL_ERROR_MESSAGES = ("execution reverted", "revert", "invalid opcode", "invalid jump", "out of gas",
+                        "gas required exceeds allowance", "intrinsic gas too low", "insufficient funds",
+                        "max fee per gas less than block base fee")
+
+
+class DeploySimulationError(Exception):
+    def __init__(self, message, is_retryable=False):
+        super().__init__(message)
+        self.is_retryable = is_retryable
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """
+    Classify a txn error as retryable (nonce conflicts, transport errors, node load) or fatal
+    (reverts, out of gas, insufficient funds). Unknown errors are fatal so they are never blindly resent.
+    Transport errors of the broadcast itself are resent with the same signed txn by
+    Provider.send_signed_transaction, so a TransactionDeliveryError is never retried with a new signature.
+    :param error:
+    :return: True if the txn should be built and signed again
+    """
+    if isinstance(error, TransactionDeliveryError):
+        return False
+    if isinstance(error, DeploySimulationError):
+        return error.is_retryable
+    if Provider.is_nonce_error(error):
+        return True
+    if isinstance(error, ContractLogicError):
+        return False
+    if isinstance(error, TimeExhausted):
+        return True
+
+    message = str(error).lower()
+    if any(fatal_message in message for fatal_message in FATAL_ERROR_MESSAGES):
+        return False
+
+    return Provider.is_transport_error(error)
+
+
+class SimulationCache:
+    """
+    Deploy simulation results per (bytecode, asset, sender). A deploy that simulated cleanly or reverted
+    within the last ttl seconds is not simulated again, so a batch of deploys of one artifact costs a
+    single eth_call and a deterministic revert fails every deploy of the batch without a round-trip.
+    """
+
+    def __init__(self, ttl=300.0):
+        self.ttl = ttl
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[Dict]:
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None and time.time() - result["simulated_at"] >= self.ttl:
+                del self._results[key]
+                return None
+
+        return result
+
+    def record(self, key, gas_estimate=None, error=None) -> Dict:
+        result = {"gas_estimate": gas_estimate, "error": error, "simulated_at": time.time()}
+        with self._lock:
+            self._results[key] = result
+
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+
+# shared cache, run_jobs sets its ttl from DEPLOY_SIMULATION_TTL in the .env config
+simulation_cache = SimulationCache()
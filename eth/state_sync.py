@@ -0,0 +1,190 @@
+from typing import Dict, List, Optional
+from web3 import Web3
+
+from db.schemas.event_serializers import to_decimal128, to_uint_record
+from .provider.provider import Provider
+from .event_interfaces import EventContractInterface, BETTOR_ADDRESS_FIELDS
+from .log_indexer import emits_bet_logs
+
+# Storage slots of the state the sync engine fingerprints, per contract name (getContractName()).
+# Constants and immutables take no storage; every other state variable takes one slot in declaration order.
+STORAGE_LAYOUTS = {
+    "OverUnder6Hour": {"over_betters": 2, "under_betters": 3,
+                       "over_betters_balance": 5, "under_betters_balance": 6},
+    # clones keep the pool layout of OverUnder6Hour, the former immutables follow it in storage
+    "OverUnder6HourClone": {"over_betters": 2, "under_betters": 3,
+                            "over_betters_balance": 5, "under_betters_balance": 6},
+    "OverUnderTwelveHour": {"over_betters": 0, "under_betters": 2,
+                            "over_betters_balance": 4, "under_betters_balance": 5},
+    "OverUnderTwentyFourHour": {"over_betters": 0, "under_betters": 2,
+                                "over_betters_balance": 4, "under_betters_balance": 5},
+    "OverUnderTest": {"over_betters": 2, "under_betters": 3,
+                      "over_betters_balance": 5, "under_betters_balance": 6},
+}
+
+# Contract info fields derived from the pool balances, re-read when any fingerprint value changes
+BALANCE_FIELDS = ["contract_balance", "over_betters_balance", "under_betters_balance",
+                  "over_betting_payout_modifier", "under_betting_payout_modifier"]
+
+# Fields a record needs for an incremental sync
+SYNC_PROJECTION = {"_id": 0, "contract_address": 1, "contract_name": 1, "contract_abi": 1, "abi_id": 1,
+                   "event_close": 1, "payout_close": 1, "last_synced_block": 1, "sync_fingerprint": 1,
+                   "over_betters_count": 1, "under_betters_count": 1}
+
+
+def to_record_number(field, value):
+    # matches serialize_contract_info: ether amounts as Decimal128, payout modifiers as ints
+    if field in ("over_betting_payout_modifier", "under_betting_payout_modifier"):
+        return to_uint_record(value)
+
+    return to_decimal128(value)
+
+
+def get_array_element_slot(array_slot: int, index: int) -> int:
+    """
+    Storage slot of a dynamic array element, for element types taking a full slot (ex. address)
+    :param array_slot: slot holding the array length
+    :param index: element index
+    :return: slot
+    """
+    return int.from_bytes(Web3.keccak(array_slot.to_bytes(32, "big")), "big") + index
+
+
+class IncrementalStateSync:
+    """
+    Syncs event contract records from block-tagged storage reads instead of re-reading every getter.
+    A fingerprint of the contract balance, the bettor array lengths and the pool balance slots decides
+    whether anything changed since the last synced block; only changed fields and new bettor
+    addresses are read and written as $set/$push deltas.
+    With indexed_bettors the bettors of contracts emitting bet logs come from the bettor log index, so their
+    address arrays are not read at all and only the bettor counts are kept from the array lengths.
+    """
+
+    def __init__(self, provider: Provider, indexed_bettors=False):
+        self.provider = provider
+        self.indexed_bettors = indexed_bettors
+
+    def is_bettor_indexed(self, record, abi_loader=None) -> bool:
+        if not self.indexed_bettors:
+            return False
+        contract_abi = record.get("contract_abi")
+        if contract_abi is None and record.get("abi_id") is not None and abi_loader is not None:
+            contract_abi = abi_loader(record["abi_id"])
+
+        return emits_bet_logs(contract_abi)
+
+    def get_fingerprint(self, contract_address, layout: Dict, block_number) -> Dict:
+        w3 = self.provider.w3
+        fingerprint = {"balance": str(w3.eth.get_balance(contract_address, block_identifier=block_number))}
+        for field, slot in layout.items():
+            fingerprint[field] = str(int.from_bytes(
+                w3.eth.get_storage_at(contract_address, slot, block_identifier=block_number), "big"))
+
+        return fingerprint
+
+    def get_array_tail(self, contract_address, array_slot, start, end, block_number) -> List[str]:
+        addresses = []
+        for index in range(start, end):
+            value = self.provider.w3.eth.get_storage_at(contract_address, get_array_element_slot(array_slot, index),
+                                                        block_identifier=block_number)
+            addresses.append(Web3.to_checksum_address(value[-20:]))
+
+        return addresses
+
+    def build_contract_interface(self, record, abi_loader=None) -> EventContractInterface:
+        if record.get("abi_id") is not None and abi_loader is not None:
+            return EventContractInterface.from_abi_id(provider=self.provider,
+                                                      contract_address=record["contract_address"],
+                                                      abi_id=record["abi_id"],
+                                                      abi_loader=abi_loader)
+
+        return EventContractInterface(provider=self.provider,
+                                      contract_address=record["contract_address"],
+                                      contract_abi=record.get("contract_abi"))
+
+    def sync_contract(self, record: Dict, block: Dict, abi_loader=None) -> Optional[Dict]:
+        """
+        Compute the update for a contract record since its last synced block
+        :param record: event contract record (at least SYNC_PROJECTION fields)
+        :param block: block to sync to (number and timestamp)
+        :param abi_loader: callable returning the ABI for an abi_id
+        :return: mongo update document, or None if the record is already up to date
+        """
+        block_number = block["number"]
+        if record.get("last_synced_block") is not None and record["last_synced_block"] >= block_number:
+            return None
+
+        set_fields = {"last_synced_block": block_number}
+        push_fields = {}
+
+        # time based flags do not touch storage
+        if record.get("event_close") is not None:
+            set_fields["is_event_over"] = block["timestamp"] > record["event_close"]
+        if record.get("payout_close") is not None:
+            set_fields["is_payout_period_over"] = block["timestamp"] > record["payout_close"]
+
+        layout = STORAGE_LAYOUTS.get(record.get("contract_name"))
+        contract_address = record["contract_address"]
+        bettors_indexed = self.is_bettor_indexed(record, abi_loader=abi_loader)
+        if layout is None or record.get("over_betters_count") is None or record.get("under_betters_count") is None:
+            # unknown layout or no bettor counts yet, fall back to a full read
+            contract_info = self.build_contract_interface(record, abi_loader=abi_loader).get_event_contract_info(
+                fields=BALANCE_FIELDS + ([] if bettors_indexed else BETTOR_ADDRESS_FIELDS),
+                block_identifier=block_number)
+            for field in BALANCE_FIELDS:
+                set_fields[field] = to_record_number(field, contract_info[field])
+            if not bettors_indexed:
+                for field in BETTOR_ADDRESS_FIELDS:
+                    set_fields[field] = contract_info[field]
+                set_fields["over_betters_count"] = len(contract_info["over_betters_addresses"] or [])
+                set_fields["under_betters_count"] = len(contract_info["under_betters_addresses"] or [])
+            if layout is not None:
+                fingerprint = self.get_fingerprint(contract_address, layout, block_number)
+                set_fields["sync_fingerprint"] = fingerprint
+                if bettors_indexed:
+                    set_fields["over_betters_count"] = int(fingerprint["over_betters"])
+                    set_fields["under_betters_count"] = int(fingerprint["under_betters"])
+            return {"$set": set_fields}
+
+        fingerprint = self.get_fingerprint(contract_address, layout, block_number)
+        if fingerprint != record.get("sync_fingerprint"):
+            contract_info = self.build_contract_interface(record, abi_loader=abi_loader).get_event_contract_info(
+                fields=BALANCE_FIELDS, block_identifier=block_number)
+            for field in BALANCE_FIELDS:
+                set_fields[field] = to_record_number(field, contract_info[field])
+            set_fields["sync_fingerprint"] = fingerprint
+
+            for array_field, count_field, slot_field in (
+                    ("over_betters_addresses", "over_betters_count", "over_betters"),
+                    ("under_betters_addresses", "under_betters_count", "under_betters")):
+                synced_count = record[count_field]
+                current_count = int(fingerprint[slot_field])
+                if current_count > synced_count and bettors_indexed:
+                    set_fields[count_field] = current_count
+                elif current_count > synced_count:
+                    push_fields[array_field] = {"$each": self.get_array_tail(contract_address, layout[slot_field],
+                                                                             synced_count, current_count,
+                                                                             block_number)}
+                    set_fields[count_field] = current_count
+
+        update_document = {"$set": set_fields}
+        if push_fields:
+            update_document["$push"] = push_fields
+
+        return update_document
+
+    def sync_records(self, records: List[Dict], abi_loader=None) -> List[tuple]:
+        """
+        Compute the updates for many records against one block
+        :param records: event contract records
+        :param abi_loader: callable returning the ABI for an abi_id
+        :return: [(contract_address, update_document), ...] for the records that changed
+        """
+        block = self.provider.w3.eth.get_block("latest")
+        updates = []
+        for record in records:
+            update_document = self.sync_contract(record=record, block=block, abi_loader=abi_loader)
+            if update_document is not None:
+                updates.append((record["contract_address"], update_document))
+
+        return updates
@@ -0,0 +1,188 @@
+from typing import Optional, List
+import re
+import threading
+
+from solcx import get_installed_solc_versions, get_installable_solc_versions, install_solc
+from solcx.install import get_executable
+
+PRAGMA_PATTERN = re.compile(r"pragma\s+solidity\s+([^;]+);")
+CONSTRAINT_PATTERN = re.compile(r"(\^|~|>=|<=|>|<|=)?\s*v?(\d+)(?:\.(\d+))?(?:\.(\d+))?")
+
+
+class SolcVersionMismatchError(Exception):
+    pass
+
+
+def read_pragma(contract_source_path) -> str:
+    """
+    Read the solidity version pragma from a contract source file
+    :param contract_source_path: path to contract source file
+    :return: version spec (ex. '^0.8.18')
+    """
+    with open(contract_source_path, "r") as source_file:
+        match = PRAGMA_PATTERN.search(source_file.read())
+
+    if match is None:
+        raise Exception(f"No solidity pragma found in {contract_source_path}")
+
+    return match.group(1).strip()
+
+
+def parse_version(version) -> tuple:
+    """
+    Parse a version string into a comparable tuple
+    :param version: version string or object (ex. '0.8.21')
+    :return: (major, minor, patch)
+    """
+    parts = str(version).lstrip("v").split("+")[0].split("-")[0].split(".")
+    parts = [int(part) for part in parts] + [0] * (3 - len(parts))
+
+    return tuple(parts[:3])
+
+
+def version_satisfies(version, version_spec: str) -> bool:
+    """
+    Check a version against a solidity pragma version spec (^, ~, comparison operators, ranges)
+    :param version: version string or object
+    :param version_spec: pragma version spec (ex. '^0.8.18', '>=0.8.0 <0.9.0')
+    :return: bool
+    """
+    version = parse_version(version)
+
+    for constraint in CONSTRAINT_PATTERN.finditer(version_spec):
+        operator = constraint.group(1) or "="
+        major, minor, patch = (int(part) if part is not None else 0 for part in constraint.group(2, 3, 4))
+        bound = (major, minor, patch)
+
+        if operator == "^":
+            if major > 0:
+                upper = (major + 1, 0, 0)
+            elif minor > 0:
+                upper = (0, minor + 1, 0)
+            else:
+                upper = (0, 0, patch + 1)
+            if not bound <= version < upper:
+                return False
+        elif operator == "~":
+            if not bound <= version < (major, minor + 1, 0):
+                return False
+        elif operator == ">=" and not version >= bound:
+            return False
+        elif operator == "<=" and not version <= bound:
+            return False
+        elif operator == ">" and not version > bound:
+            return False
+        elif operator == "<" and not version < bound:
+            return False
+        elif operator == "=" and version != bound:
+            return False
+
+    return True
+
+
+class SolcToolchain:
+    """
+    Resolves the solc version for a contract from its pragma and installs it lazily.
+    Installed compilers are reused from a local compiler directory; the network is only
+    touched when no installed compiler satisfies the pragma.
+    """
+
+    def __init__(self, solcx_binary_path=None, pinned_version: Optional[str] = None):
+        self.solcx_binary_path = solcx_binary_path
+        self.pinned_version = pinned_version
+        self._resolved_versions = {}
+        self._lock = threading.Lock()
+
+    def check_pinned_version(self, version_spec: str, contract_source_path=None):
+        """
+        Refuse a pinned solc version the contract pragma does not accept, before anything is installed or compiled
+        :param version_spec: pragma version spec
+        :param contract_source_path: contract the spec was read from, for the error message
+        :return:
+        """
+        if self.pinned_version is not None and not version_satisfies(self.pinned_version, version_spec):
+            raise SolcVersionMismatchError(f"SOLC_VERSION {self.pinned_version} does not satisfy pragma solidity "
+                                           f"{version_spec} of {contract_source_path or 'the contract'}")
+
+    def is_usable(self, version, version_spec: str) -> bool:
+        """
+        Whether artifacts compiled with a solc version can be used for the spec, the pinned version only if pinned
+        :param version: version string or object
+        :param version_spec: pragma version spec
+        :return: bool
+        """
+        if self.pinned_version is not None:
+            return parse_version(version) == parse_version(self.pinned_version)
+
+        return version_satisfies(version, version_spec)
+
+    def get_installed_versions(self) -> List:
+        try:
+            return get_installed_solc_versions(solcx_binary_path=self.solcx_binary_path)
+        except Exception as e:
+            print(f"Unable to list installed solc versions: {e}")
+            return []
+
+    def resolve_installed(self, version_spec: str) -> Optional[str]:
+        """
+        Get the newest locally installed solc version satisfying the spec without touching the network
+        :param version_spec: pragma version spec
+        :return: version string or None
+        """
+        self.check_pinned_version(version_spec)
+        if self.pinned_version is not None:
+            pinned = parse_version(self.pinned_version)
+            for version in self.get_installed_versions():
+                if parse_version(version) == pinned:
+                    return str(version)
+            return None
+
+        with self._lock:
+            if version_spec in self._resolved_versions:
+                return self._resolved_versions[version_spec]
+
+        candidates = [version for version in self.get_installed_versions()
+                      if version_satisfies(version, version_spec)]
+        if not candidates:
+            return None
+
+        resolved_version = str(max(candidates, key=parse_version))
+        with self._lock:
+            self._resolved_versions[version_spec] = resolved_version
+
+        return resolved_version
+
+    def ensure(self, version_spec: str) -> str:
+        """
+        Get a solc version satisfying the spec, installing it if none is available locally
+        :param version_spec: pragma version spec
+        :return: version string
+        """
+        self.check_pinned_version(version_spec)
+        installed_version = self.resolve_installed(version_spec)
+        if installed_version is not None:
+            return installed_version
+
+        with self._lock:
+            if self.pinned_version is not None:
+                install_version = self.pinned_version
+            else:
+                candidates = [version for version in get_installable_solc_versions()
+                              if version_satisfies(version, version_spec)]
+                if not candidates:
+                    raise Exception(f"No installable solc version satisfies {version_spec}")
+                install_version = str(max(candidates, key=parse_version))
+
+            print(f"Installing solc {install_version}...")
+            installed_version = str(install_solc(version=install_version,
+                                                 solcx_binary_path=self.solcx_binary_path))
+            self._resolved_versions[version_spec] = installed_version
+
+        return installed_version
+
+    def get_executable(self, version):
+        return get_executable(version=version, solcx_binary_path=self.solcx_binary_path)
+
+
+# shared toolchain, run_jobs sets SOLCX_BINARY_PATH and SOLC_VERSION from the .env config
+solc_toolchain = SolcToolchain()
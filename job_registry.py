@@ -0,0 +1,92 @@
+from typing import Dict, List, Optional
+import os
+
+CONTRACTS_DIR = os.path.join(os.path.dirname(__file__), "eth/contracts")
+# Factory creating EIP-1167 clones of the cloneable contract of a series (clone_source_path/clone_contract_name)
+FACTORY_SOURCE_PATH = os.path.join(CONTRACTS_DIR, "OverUnderEventFactory.sol")
+FACTORY_CONTRACT_NAME = ":OverUnderEventFactory"
+
+# Declarative definition of every betting event series. Adding a series or an asset is a change here only.
+JOB_REGISTRY: Dict[str, Dict] = {
+    "betting_event_6h": {
+        "collection_name": "event_contracts_6h",
+        "hr_duration": 6,
+        "contract_source_path": os.path.join(CONTRACTS_DIR, "OverUnderSixHour.sol"),
+        "contract_name": ":OverUnderSixHour",
+        "clone_source_path": os.path.join(CONTRACTS_DIR, "OverUnderSixHourCloneable.sol"),
+        "clone_contract_name": ":OverUnderSixHourCloneable",
+        "assets": ["BTC", "ETH"],
+        "is_test": False
+    },
+    "betting_event_12h": {
+        "collection_name": "event_contracts_12h",
+        "hr_duration": 12,
+        "contract_source_path": os.path.join(CONTRACTS_DIR, "OverUnderTwelveHour.sol"),
+        "contract_name": ":OverUnderTwelveHour",
+        "assets": ["BTC", "ETH"],
+        "is_test": False
+    },
+    "betting_event_24h": {
+        "collection_name": "event_contracts_24h",
+        "hr_duration": 24,
+        "contract_source_path": os.path.join(CONTRACTS_DIR, "OverUnderTwentyFourHour.sol"),
+        "contract_name": ":OverUnderTwentyFourHour",
+        "assets": ["BTC", "ETH"],
+        "is_test": False
+    },
+    "betting_event_test": {
+        "collection_name": "event_contracts_test",
+        "hr_duration": 0,
+        "contract_source_path": os.path.join(CONTRACTS_DIR, "test_contracts/OverUnderTest.sol"),
+        "contract_name": ":OverUnderTest",
+        "assets": ["BTC", "ETH"],
+        "is_test": True
+    },
+}
+
+
+def get_job_definition(job_type: str) -> Optional[Dict]:
+    return JOB_REGISTRY.get(job_type)
+
+
+def get_job_definition_by_collection(collection_name: str) -> Optional[Dict]:
+    for job_definition in JOB_REGISTRY.values():
+        if job_definition["collection_name"] == collection_name:
+            return job_definition
+    return None
+
+
+def get_job_type_by_collection(collection_name: str) -> Optional[str]:
+    for job_type, job_definition in JOB_REGISTRY.items():
+        if job_definition["collection_name"] == collection_name:
+            return job_type
+    return None
+
+
+def get_job_definition_by_duration(hr_duration: int, is_test=False) -> Optional[Dict]:
+    for job_definition in JOB_REGISTRY.values():
+        if is_test and job_definition["is_test"]:
+            return job_definition
+        if not is_test and not job_definition["is_test"] and job_definition["hr_duration"] == hr_duration:
+            return job_definition
+    return None
+
+
+def build_job_config(job_type: str) -> Dict:
+    """
+    Build the job config consumed by EventDeployerJobs from a registry entry
+    :param job_type:
+    :return: {"job_type": job_type, "params": {asset: {"collection_name": ...}}}
+    """
+    job_definition = JOB_REGISTRY[job_type]
+
+    return {
+        "job_type": job_type,
+        "params": {asset: {"collection_name": job_definition["collection_name"]}
+                   for asset in job_definition["assets"]}
+    }
+
+
+def build_job_configs(is_test=False) -> List[Dict]:
+    return [build_job_config(job_type) for job_type, job_definition in JOB_REGISTRY.items()
+            if job_definition["is_test"] == is_test]
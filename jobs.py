@@ -1,32 +1,87 @@
 import time
 import random
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from web3 import Web3
 
-from db.schemas.event_schemas import ContractInfoModel
-from eth.event_interfaces import EventContractInterface, EventDeployer
+from db.schemas.event_serializers import serialize_contract_info, to_decimal128, to_uint_record
+from db.write_buffer import MongoWriteBuffer
+from db.abi_registry import AbiRegistry
+from db.indexes import EVENT_STATUS_COVERED_PROJECTION
+from db.event_feed import EVENT_DEADLINE_FIELDS
+from db.price_feed import LatestPriceCache, StalePriceError, DEFAULT_PRICE_COLLECTIONS, get_prices_at_close
+from utils.scheduler import DeadlineScheduler
+from utils.metrics import metrics
+from eth.event_interfaces import (EventContractInterface, EventDeployer, BETTOR_ADDRESS_FIELDS,
+                                  EVENT_CONTRACT_INFO_GETTERS)
+from eth.fee_oracle import FeeCapExceededError
+from eth.simulation import DeploySimulationError
+from eth.event_factory import EventFactory, parse_event_created_logs
+from eth.state_sync import IncrementalStateSync, SYNC_PROJECTION
+from eth.log_indexer import BettorLogIndexer, emits_bet_logs
+from eth.settlement import (EventSettler, SETTLEMENT_FUNCTIONS, MAX_SETTLEMENT_ATTEMPTS, get_settlement_functions,
+                            has_direct_payout)
+from job_registry import (get_job_definition, get_job_definition_by_collection, get_job_definition_by_duration,
+                          get_job_type_by_collection)
+
+# Only the fields needed to check an expired contract's status
+EXPIRED_EVENT_PROJECTION = {"_id": 0, "contract_address": 1, "contract_abi": 1, "abi_id": 1}
+# Factory events whose creation txn is not mined this long after it was sent are dropped
+PENDING_EVENT_TIMEOUT = 900
+# Expired events are only settled this long after their event close
+SETTLEMENT_WINDOW = 72 * 3600
+SETTLEMENT_PROJECTION = {"_id": 0, "contract_address": 1, "contract_name": 1, "contract_abi": 1, "abi_id": 1,
+                         "asset_symbol": 1, "event_close": 1, "settled_functions": 1, "settlement_txns": 1,
+                         "settlement_attempts": 1}
+# Contract info read for expired events whose bettors are covered by the bettor log index
+CONTRACT_INFO_FIELDS_WITHOUT_BETTORS = [field for field, _, _ in EVENT_CONTRACT_INFO_GETTERS
+                                        if field not in BETTOR_ADDRESS_FIELDS]
+# Contracts stay in the bettor log index this long after their event closes, to pick up settlement and payouts
+LOG_INDEX_SETTLEMENT_WINDOW = 24 * 3600
 
 
 class EventDeployerJobs:
 
-    def __init__(self, job_configs, provider_handler, mongo_handler):
+    def __init__(self, job_configs, provider_handler, mongo_handler, rpc_concurrency=8, scheduler=None,
+                 price_cache: Optional[LatestPriceCache] = None, sync_ongoing_events=True, metrics_path=None,
+                 log_indexer: Optional[BettorLogIndexer] = None, settle_events=True, dry_run=False,
+                 factory_job_types=()):
         self.job_configs = job_configs
+        # series whose events are created as clones through their event factory
+        self.factory_job_types = tuple(factory_job_types)
+        for job_type in self.factory_job_types:
+            if (get_job_definition(job_type) or {}).get("clone_source_path") is None:
+                raise Exception(f"{job_type} has no cloneable contract, it cannot be deployed through a factory")
+        # a dry run plans and simulates one pass without sending txns or writing to mongo
+        self.dry_run = dry_run
+        self.settle_events = settle_events
+        self.settler = EventSettler(provider=provider_handler)
+        self.metrics_path = metrics_path
+        self.log_indexer = log_indexer
         self.provider_handler = provider_handler
         self.mongo_handler = mongo_handler
+        self.price_cache = price_cache
+        self.sync_ongoing_events = sync_ongoing_events
+        # with the log index, bettor arrays of contracts emitting bet logs are maintained from their logs
+        self.state_sync = IncrementalStateSync(provider=provider_handler, indexed_bettors=log_indexer is not None)
+        self.rpc_concurrency = rpc_concurrency
+        self.scheduler = scheduler if scheduler is not None else DeadlineScheduler()
+        self.stop_requested = False
+
+    def stop(self):
+        """
+        Ask the job runner to exit after the current pass
+        :return:
+        """
+        self.stop_requested = True
+        self.scheduler.wake()
 
     def job_runner(self, is_test, run_indefinitely=True):
-        while run_indefinitely:
+        while run_indefinitely and not self.stop_requested:
             try:
                 if not is_test:
-                    for job in self.job_configs:
-                        if job["job_type"] == "betting_event_6h":
-                            self.deploy_event_job(job_config=job,
-                                                  provider_handler=self.provider_handler,
-                                                  mongo_handler=self.mongo_handler)
-                        elif job["job_type"] == "betting_event_12h":
-                            pass
-                        elif job["job_type"] == "betting_event_24h":
-                            pass
+                    self.run_jobs_pass(job_configs=self.get_active_job_configs(is_test=False))
 
                 elif is_test:
                     for job in self.job_configs:
@@ -34,101 +89,989 @@ class EventDeployerJobs:
                             self.deploy_event_job(job_config=job,
                                                   provider_handler=self.provider_handler,
                                                   mongo_handler=self.mongo_handler,
-                                                  is_test=is_test)
+                                                  is_test=is_test,
+                                                  dry_run=self.dry_run)
                             run_indefinitely = False
 
+                if self.dry_run:
+                    run_indefinitely = False
+
             except Exception as e:
                 print(e)
                 print("Error in job runner...")
                 print("Exiting job runner...")
                 run_indefinitely = False
 
-            if run_indefinitely:
-                print("Job runner sleeping for 2 hrs...")
-                time.sleep(86400 / 12)
+            if run_indefinitely and not self.stop_requested:
+                try:
+                    self.schedule_event_deadlines(job_configs=self.get_active_job_configs(is_test=False))
+                except Exception as e:
+                    print(f"Unable to schedule event deadlines: {e}")
+                    self.scheduler.clear()
+
+                next_deadline = self.scheduler.next_deadline()
+                sleep_seconds = self.scheduler.get_sleep_seconds()
+                if next_deadline is not None:
+                    print(f"Job runner sleeping for {sleep_seconds:.0f}s until {next_deadline[1]}...")
+                else:
+                    print(f"Job runner sleeping for {sleep_seconds:.0f}s...")
+                self.scheduler.sleep_until_next()
         return
 
-    @classmethod
-    def deploy_event_job(cls, job_config, provider_handler, mongo_handler, is_test=False):
-        for asset in job_config["params"].keys():
+    def get_active_job_configs(self, is_test) -> List[Dict]:
+        active_job_configs = []
+        for job in self.job_configs:
+            job_definition = get_job_definition(job["job_type"])
+            if job_definition is None:
+                print(f"Unknown job type {job['job_type']}, skipping...")
+            elif job_definition["is_test"] == is_test:
+                active_job_configs.append(job)
+
+        return active_job_configs
+
+    def run_jobs_pass(self, job_configs):
+        """
+        Run every job config in a single pass: expired statuses are read concurrently across all series,
+        all deploys are pipelined in one batch and all record writes are flushed together
+        :param job_configs:
+        :return:
+        """
+        rpc_calls_before = metrics.get_counter_by_label("rpc_requests_total", "method")
+        pass_start = time.perf_counter()
+        deploy_requests = []
+        write_buffer = MongoWriteBuffer(mongo_handler=self.mongo_handler)
+        try:
+            if self.factory_job_types and not self.dry_run:
+                self.resolve_pending_events(job_configs=job_configs, write_buffer=write_buffer)
+
+            expired_event_statuses = self.collect_expired_event_statuses(job_configs=job_configs,
+                                                                         provider_handler=self.provider_handler,
+                                                                         mongo_handler=self.mongo_handler,
+                                                                         rpc_concurrency=self.rpc_concurrency,
+                                                                         indexed_bettors=self.log_indexer is not None)
+            if self.sync_ongoing_events:
+                self.sync_ongoing_event_records(job_configs=job_configs, write_buffer=write_buffer)
+            if self.log_indexer is not None and not self.dry_run:
+                self.index_bettor_logs(job_configs=job_configs)
+
+            for job in job_configs:
+                deploy_requests += self.plan_event_job(job_config=job,
+                                                       mongo_handler=self.mongo_handler,
+                                                       expired_event_statuses=expired_event_statuses,
+                                                       write_buffer=write_buffer,
+                                                       dry_run=self.dry_run)
+
+            if self.dry_run:
+                self.simulate_event_deploys(provider_handler=self.provider_handler,
+                                            mongo_handler=self.mongo_handler,
+                                            deploy_requests=deploy_requests,
+                                            is_test=False,
+                                            price_cache=self.price_cache)
+                return
+
+            # the close-outs are written before their replacements are deployed
+            deploy_requests = self.drop_unrecorded_close_outs(deploy_requests=deploy_requests,
+                                                              expired_event_statuses=expired_event_statuses,
+                                                              flush_results=write_buffer.flush())
+            self.deploy_and_record_events(provider_handler=self.provider_handler,
+                                          mongo_handler=self.mongo_handler,
+                                          deploy_requests=deploy_requests,
+                                          is_test=False,
+                                          write_buffer=write_buffer,
+                                          price_cache=self.price_cache,
+                                          factory_job_types=self.factory_job_types)
+
+            if self.settle_events:
+                self.settle_expired_events(job_configs=job_configs, write_buffer=write_buffer)
+        finally:
+            if self.dry_run:
+                self.report_dry_run_writes(write_buffer=write_buffer)
+            else:
+                write_buffer.flush()
+            self.record_pass_metrics(job_configs=job_configs,
+                                     rpc_calls_before=rpc_calls_before,
+                                     pass_seconds=time.perf_counter() - pass_start,
+                                     deploy_count=len(deploy_requests))
+
+    @staticmethod
+    def report_dry_run_writes(write_buffer: MongoWriteBuffer):
+        """
+        Print the writes a dry run queued instead of flushing them
+        :param write_buffer:
+        :return:
+        """
+        for collection, descriptions in write_buffer.descriptions.items():
+            print(f"[dry run] {len(descriptions)} {collection} writes not flushed")
+            for description in descriptions:
+                print(f"[dry run]   {description}")
+
+    def record_pass_metrics(self, job_configs, rpc_calls_before: Dict, pass_seconds, deploy_count):
+        """
+        Log the pass duration and the RPC requests it made, and dump the metrics file if configured
+        :param job_configs:
+        :param rpc_calls_before: rpc_requests_total by method at the start of the pass
+        :param pass_seconds:
+        :param deploy_count:
+        :return:
+        """
+        rpc_calls = {method: count - rpc_calls_before.get(method, 0)
+                     for method, count in metrics.get_counter_by_label("rpc_requests_total", "method").items()
+                     if count - rpc_calls_before.get(method, 0) > 0}
+        metrics.observe("jobs_pass_seconds", pass_seconds)
+        metrics.log_event("jobs_pass",
+                          job_types=[job["job_type"] for job in job_configs],
+                          duration_seconds=round(pass_seconds, 3),
+                          deploy_requests=deploy_count,
+                          rpc_requests=sum(rpc_calls.values()),
+                          rpc_requests_by_method=rpc_calls)
+        if self.metrics_path is not None:
             try:
+                metrics.write_prometheus(self.metrics_path)
+            except OSError as e:
+                print(f"Unable to write metrics to {self.metrics_path}: {e}")
+
+    def sync_ongoing_event_records(self, job_configs, write_buffer: MongoWriteBuffer):
+        """
+        Incrementally sync the records of ongoing events with their contracts and queue the deltas
+        :param job_configs:
+        :param write_buffer:
+        :return:
+        """
+        abi_registry = AbiRegistry.for_mongo_handler(mongo_handler=self.mongo_handler)
+        for job_config in job_configs:
+            for asset in job_config["params"].keys():
+                collection_name = job_config['params'][asset]["collection_name"]
+                ongoing_event_records = self.mongo_handler.find(
+                    collection=collection_name,
+                    query={"is_event_over": False,
+                           "event_close": {"$gt": datetime.now().timestamp()},
+                           "asset_symbol": asset,
+                           "deploy_status": {"$ne": "pending"}
+                           },
+                    projection=SYNC_PROJECTION
+                )
+                for contract_address, update_document in self.state_sync.sync_records(
+                        records=list(ongoing_event_records), abi_loader=abi_registry.get):
+                    write_buffer.update(collection=collection_name,
+                                        query={"contract_address": contract_address},
+                                        document=update_document,
+                                        description=f"sync {contract_address}")
+
+    def settle_expired_events(self, job_configs, write_buffer: MongoWriteBuffer):
+        """
+        Settle the expired events whose contracts have settlement functions. The closing price is looked up
+        once per close time, then each settlement function is sent for every contract back to back and the
+        receipts are awaited together, so a batch takes one round of blocks per function.
+        setWinners is only sent once setPriceAtClose is mined, and never twice for a contract.
+        A txn that reverted or was dropped is sent again, up to MAX_SETTLEMENT_ATTEMPTS sends per function,
+        after which the record is marked failed.
+        :param job_configs:
+        :param write_buffer:
+        :return:
+        """
+        abi_registry = AbiRegistry.for_mongo_handler(mongo_handler=self.mongo_handler)
+        price_collections = self.price_cache.price_collections if self.price_cache is not None \
+            else DEFAULT_PRICE_COLLECTIONS
+        now = datetime.now().timestamp()
+
+        settlements = []
+        for collection_name in sorted({params["collection_name"] for job_config in job_configs
+                                       for params in job_config["params"].values()}):
+            expired_event_records = self.mongo_handler.find(
+                collection=collection_name,
+                query=self.build_settlement_query(now=now),
+                projection=SETTLEMENT_PROJECTION
+            )
+            for event_record in expired_event_records:
+                contract_abi = event_record.get("contract_abi")
+                if contract_abi is None and event_record.get("abi_id") is not None:
+                    contract_abi = abi_registry.get(event_record["abi_id"])
+                functions = get_settlement_functions(contract_abi)
+                if not functions and has_direct_payout(contract_abi):
+                    # payWinners/sendFee contracts still need settling, which this job cannot do; left unmarked
+                    continue
+                if not functions:
+                    write_buffer.update(collection=collection_name,
+                                        query={"contract_address": event_record["contract_address"]},
+                                        document={"$set": {"settlement_status": "not_required"}},
+                                        description=f"settlement not required {event_record['contract_address']}")
+                    continue
+
+                settlement = {"collection_name": collection_name, "record": event_record, "abi": contract_abi,
+                              "functions": functions, "settled": set(event_record.get("settled_functions") or []),
+                              "txns": dict(event_record.get("settlement_txns") or {}),
+                              "attempts": dict(event_record.get("settlement_attempts") or {}), "is_pending": False}
+                # txns from earlier passes that were not confirmed yet
+                for function_name, txn_hash in list(settlement["txns"].items()):
+                    if function_name in settlement["settled"]:
+                        continue
+                    txn_status = self.settler.get_txn_status(txn_hash)
+                    if txn_status is True:
+                        settlement["settled"].add(function_name)
+                    elif txn_status is False or not self.settler.is_txn_known(txn_hash):
+                        print(f"Settlement {function_name} txn {txn_hash} of {event_record['contract_address']} "
+                              f"{'reverted' if txn_status is False else 'was dropped'}")
+                        del settlement["txns"][function_name]
+                    else:
+                        settlement["is_pending"] = True
+                if settlement["is_pending"]:
+                    continue
+
+                exhausted_functions = [function_name for function_name in functions
+                                       if function_name not in settlement["settled"]
+                                       and settlement["attempts"].get(function_name, 0) >= MAX_SETTLEMENT_ATTEMPTS]
+                if exhausted_functions:
+                    print(f"Settlement of {event_record['contract_address']} failed after {MAX_SETTLEMENT_ATTEMPTS} "
+                          f"attempts of {', '.join(exhausted_functions)}")
+                    write_buffer.update(collection=collection_name,
+                                        query={"contract_address": event_record["contract_address"]},
+                                        document={"$set": {"settlement_status": "failed",
+                                                           "settled_functions": sorted(settlement["settled"]),
+                                                           "settlement_txns": settlement["txns"]}},
+                                        description=f"settlement failed {event_record['contract_address']}")
+                    continue
+                settlements.append(settlement)
+
+        if not settlements:
+            return
+
+        close_prices = {}
+        for asset_symbol in {settlement["record"]["asset_symbol"] for settlement in settlements}:
+            if asset_symbol not in price_collections:
+                continue
+            asset_prices = get_prices_at_close(mongo_handler=self.mongo_handler,
+                                               collection_name=price_collections[asset_symbol],
+                                               close_times=[settlement["record"]["event_close"]
+                                                            for settlement in settlements
+                                                            if settlement["record"]["asset_symbol"] == asset_symbol])
+            for close_time, price in asset_prices.items():
+                close_prices[(asset_symbol, close_time)] = price
+        for settlement in settlements:
+            settlement["price"] = close_prices.get((settlement["record"]["asset_symbol"],
+                                                    settlement["record"]["event_close"]))
+            if settlement["price"] is None:
+                print(f"No closing price for {settlement['record']['asset_symbol']} at "
+                      f"{settlement['record']['event_close']}, settlement of "
+                      f"{settlement['record']['contract_address']} deferred")
+        settlements = [settlement for settlement in settlements if settlement["price"] is not None]
+
+        for function_index, function_name in enumerate(SETTLEMENT_FUNCTIONS):
+            sent_settlements = []
+            for settlement in settlements:
+                if function_name not in settlement["functions"] or function_name in settlement["settled"]:
+                    continue
+                if any(prior_function in settlement["functions"] and prior_function not in settlement["settled"]
+                       for prior_function in SETTLEMENT_FUNCTIONS[:function_index]):
+                    continue
+                event_record = settlement["record"]
+                try:
+                    sent_txn = self.settler.send_settlement_function(
+                        contract_address=event_record["contract_address"],
+                        contract_abi=settlement["abi"],
+                        function_name=function_name,
+                        price_at_close=settlement["price"],
+                        contract_name=event_record.get("contract_name"))
+                except Exception as e:
+                    print(f"Unable to send {function_name} to {event_record['contract_address']}: {e}")
+                    continue
+                settlement["attempts"][function_name] = settlement["attempts"].get(function_name, 0) + 1
+                settlement["txns"][function_name] = Web3.to_hex(sent_txn["txn_hash"])
+                sent_settlements.append((settlement, sent_txn))
+
+            if not sent_settlements:
+                continue
+            with ThreadPoolExecutor(max_workers=max(1, min(self.rpc_concurrency, len(sent_settlements)))) as executor:
+                txn_results = list(executor.map(lambda sent: self.settler.wait_for_txn(sent[1]), sent_settlements))
+            for (settlement, _), txn_succeeded in zip(sent_settlements, txn_results):
+                if txn_succeeded:
+                    settlement["settled"].add(function_name)
+            print(f"Settlement {function_name}: {sum(1 for result in txn_results if result)} of "
+                  f"{len(sent_settlements)} txns succeeded")
+
+        for settlement in settlements:
+            set_fields = {"settled_functions": sorted(settlement["settled"]),
+                          "settlement_txns": settlement["txns"],
+                          "settlement_attempts": settlement["attempts"],
+                          "price_at_close": to_decimal128(settlement["price"])}
+            if all(function_name in settlement["settled"] for function_name in settlement["functions"]):
+                set_fields["settlement_status"] = "settled"
+            write_buffer.update(collection=settlement["collection_name"],
+                                query={"contract_address": settlement["record"]["contract_address"]},
+                                document={"$set": set_fields},
+                                description=f"settlement {settlement['record']['contract_address']}")
+
+    def index_bettor_logs(self, job_configs):
+        """
+        Index the bet logs of every contract that can still see bets or payouts in one batched log query.
+        The indexer writes the bettor index and the event record bettor arrays itself, before its checkpoint.
+        :param job_configs:
+        :return:
+        """
+        now = datetime.now().timestamp()
+        event_collection_by_address = {}
+        for collection_name in {params["collection_name"] for job_config in job_configs
+                                for params in job_config["params"].values()}:
+            live_event_records = self.mongo_handler.find(
+                collection=collection_name,
+                query=self.build_log_indexed_event_query(now=now),
+                projection={"_id": 0, "contract_address": 1}
+            )
+            for event_record in live_event_records:
+                event_collection_by_address[event_record["contract_address"]] = collection_name
+
+        try:
+            self.log_indexer.index_contracts(contract_addresses=list(event_collection_by_address.keys()),
+                                             event_collection_by_address=event_collection_by_address)
+        except Exception as e:
+            # the index catches up from its checkpoint on the next pass
+            print(f"Unable to index bettor logs: {e}")
+
+    def schedule_event_deadlines(self, job_configs):
+        """
+        Reload the scheduler with the earliest upcoming betting_close and event_close of the open events of
+        every asset and collection. Open events already past their close, which the last pass could not close
+        out, are retried with the scheduler's past due backoff instead of on every wake-up.
+        :param job_configs: job configs to schedule
+        :return:
+        """
+        self.scheduler.clear()
+        now = datetime.now().timestamp()
+        for job_config in job_configs:
+            for asset in job_config["params"].keys():
+                collection_name = job_config['params'][asset]["collection_name"]
+                for deadline_field in EVENT_DEADLINE_FIELDS:
+                    next_event_record = self.mongo_handler.find_one(
+                        collection=collection_name,
+                        query={"asset_symbol": asset, "is_event_over": False, deadline_field: {"$gt": now}},
+                        projection={"_id": 0, deadline_field: 1},
+                        sort=[(deadline_field, 1)]
+                    )
+                    if next_event_record is not None:
+                        self.scheduler.add_deadline(timestamp=next_event_record[deadline_field],
+                                                    label=f"{asset} {collection_name} {deadline_field}")
+
+                has_past_due_event = self.mongo_handler.exists(
+                    collection=collection_name,
+                    query={"asset_symbol": asset, "is_event_over": False, "event_close": {"$lte": now}},
+                    projection=EVENT_STATUS_COVERED_PROJECTION
+                )
+                if has_past_due_event:
+                    self.scheduler.add_past_due(label=f"{asset} {collection_name}", now=now)
+                else:
+                    self.scheduler.clear_past_due(label=f"{asset} {collection_name}")
+
+    @classmethod
+    def collect_expired_event_statuses(cls, job_configs, provider_handler, mongo_handler,
+                                       rpc_concurrency=8, indexed_bettors=False) -> Dict:
+        """
+        Check the on-chain status of every expired event across all assets and collections of the given
+        job configs concurrently, with at most rpc_concurrency status reads in flight.
+        A contract whose status cannot be read is left out and checked again on the next pass.
+        :param job_configs: job configs to collect expired events for
+        :param provider_handler:
+        :param mongo_handler:
+        :param rpc_concurrency: max number of concurrent contract status reads
+        :param indexed_bettors: skip the bettor arrays of contracts covered by the bettor log index
+        :return: {(collection_name, asset_symbol): [event_status, ...]}
+        """
+        expired_event_records = []
+        for job_config in job_configs:
+            for asset in job_config["params"].keys():
                 params = job_config['params'][asset]
                 completed_to_be_updated_event_records = mongo_handler.find(
                     collection=params["collection_name"],
-                    query={"is_event_over": False,
-                           "event_close": {"$lt": datetime.now().timestamp()},
-                           "asset_symbol": asset
-                           }
+                    query=cls.build_expired_event_query(asset_symbol=asset),
+                    projection=EXPIRED_EVENT_PROJECTION
                 )
+                for event_info in completed_to_be_updated_event_records:
+                    expired_event_records.append((params["collection_name"], asset, event_info))
+
+        expired_event_statuses = {}
+        for job_config in job_configs:
+            for asset in job_config["params"].keys():
+                expired_event_statuses[(job_config['params'][asset]["collection_name"], asset)] = []
+
+        if not expired_event_records:
+            return expired_event_statuses
+
+        with ThreadPoolExecutor(max_workers=max(1, min(rpc_concurrency, len(expired_event_records)))) as executor:
+            status_futures = [
+                (collection_name, asset, event_info["contract_address"],
+                 executor.submit(cls.check_contract_status,
+                                 provider_handler=provider_handler,
+                                 contract_address=event_info["contract_address"],
+                                 contract_abi=event_info.get("contract_abi"),
+                                 collection_name=collection_name,
+                                 abi_id=event_info.get("abi_id"),
+                                 mongo_handler=mongo_handler,
+                                 indexed_bettors=indexed_bettors))
+                for collection_name, asset, event_info in expired_event_records
+            ]
+            for collection_name, asset, contract_address, status_future in status_futures:
+                try:
+                    expired_event_statuses[(collection_name, asset)].append(status_future.result())
+                except Exception as e:
+                    # the record stays open, its status is read again on the next pass
+                    print(f"Unable to check {asset} {collection_name} event {contract_address} status, "
+                          f"skipping it: {e}")
+
+        return expired_event_statuses
+
+    @classmethod
+    def deploy_event_job(cls, job_config, provider_handler, mongo_handler, is_test=False,
+                         expired_event_statuses: Optional[Dict] = None, rpc_concurrency=8,
+                         write_buffer: Optional[MongoWriteBuffer] = None, dry_run=False):
+        """
+        Update the records of the expired events of a job and deploy their replacements
+        :param job_config:
+        :param provider_handler:
+        :param mongo_handler:
+        :param is_test:
+        :param expired_event_statuses: statuses from collect_expired_event_statuses, read if None
+        :param rpc_concurrency:
+        :param write_buffer: buffer to queue the record writes on, flushed here if None
+        :param dry_run: simulate the deploys and report the record writes instead of sending or writing anything
+        :return:
+        """
+        owns_write_buffer = write_buffer is None
+        if owns_write_buffer:
+            write_buffer = MongoWriteBuffer(mongo_handler=mongo_handler)
+
+        if expired_event_statuses is None:
+            expired_event_statuses = cls.collect_expired_event_statuses(job_configs=[job_config],
+                                                                        provider_handler=provider_handler,
+                                                                        mongo_handler=mongo_handler,
+                                                                        rpc_concurrency=rpc_concurrency)
+
+        deploy_requests = cls.plan_event_job(job_config=job_config,
+                                             mongo_handler=mongo_handler,
+                                             expired_event_statuses=expired_event_statuses,
+                                             write_buffer=write_buffer,
+                                             dry_run=dry_run)
+
+        if dry_run:
+            cls.simulate_event_deploys(provider_handler=provider_handler,
+                                       mongo_handler=mongo_handler,
+                                       deploy_requests=deploy_requests,
+                                       is_test=is_test)
+            if owns_write_buffer:
+                cls.report_dry_run_writes(write_buffer=write_buffer)
+            return
+
+        try:
+            deploy_requests = cls.drop_unrecorded_close_outs(deploy_requests=deploy_requests,
+                                                             expired_event_statuses=expired_event_statuses,
+                                                             flush_results=write_buffer.flush())
+            cls.deploy_and_record_events(provider_handler=provider_handler,
+                                         mongo_handler=mongo_handler,
+                                         deploy_requests=deploy_requests,
+                                         is_test=is_test,
+                                         write_buffer=write_buffer)
+        except Exception as e:
+            print(f"An error occurred while deploying betting events: {str(e)}")
+            raise e
+        finally:
+            if owns_write_buffer:
+                write_buffer.flush()
+        return
+
+    @classmethod
+    def plan_event_job(cls, job_config, mongo_handler, expired_event_statuses: Dict,
+                       write_buffer: MongoWriteBuffer, dry_run=False) -> List:
+        """
+        Queue the record updates for the expired events of a job and work out which contracts to deploy
+        :param job_config:
+        :param mongo_handler:
+        :param expired_event_statuses: {(collection_name, asset_symbol): [event_status, ...]}
+        :param write_buffer:
+        :param dry_run: do not register new contract ABIs
+        :return: deploy requests [(asset_symbol, collection_name), ...]
+        """
+        deploy_requests = []
+        for asset in job_config["params"].keys():
+            asset_start = time.perf_counter()
+            try:
+                params = job_config['params'][asset]
+                event_statuses: List[Dict] = expired_event_statuses.get((params["collection_name"], asset), [])
                 print(
-                    f"Found {len(list(completed_to_be_updated_event_records.clone()))} {asset} {params['collection_name']} "
+                    f"Found {len(event_statuses)} {asset} {params['collection_name']} "
                     f"completed events to be updated... "
                 )
-                for event_info in completed_to_be_updated_event_records:
-                    event_status = cls.check_contract_status(provider_handler=provider_handler,
-                                                             contract_address=event_info["contract_address"],
-                                                             contract_abi=event_info["contract_abi"],
-                                                             collection_name=params["collection_name"])
-                    if event_status["is_event_over"]:
-                        current_contract_address = event_status["contract_address"]
-                        record_updated = cls.update_event_record(mongo_handler=mongo_handler,
-                                                                 collection_name=params["collection_name"],
-                                                                 current_contract_address=current_contract_address,
-                                                                 current_contract_info=event_status)
-
-                        if record_updated:
-                            deployed_contract_interface = cls.deploy_events(provider_handler=provider_handler,
-                                                                            mongo_handler=mongo_handler,
-                                                                            asset_symbol=asset,
-                                                                            collection_name=params["collection_name"],
-                                                                            is_test=is_test)
-                            if deployed_contract_interface is not None:
-                                contract_info = deployed_contract_interface.get_event_contract_info()
-                                contract_info_record_data = ContractInfoModel(**contract_info)
-
-                                contracts_response = mongo_handler.insert(collection=params["collection_name"],
-                                                                          document=contract_info_record_data.dict())
-                                if contracts_response.acknowledged:
-                                    print("Event {} {} contract record created".format(params["collection_name"],
-                                                                                       asset))
-                            else:
-                                raise Exception("Failed to establish event contract interface")
-                        else:
-                            raise Exception("Failed to update event record")
-
-                ongoing_event_records = mongo_handler.find(
+                close_out_count = cls.queue_close_outs(mongo_handler=mongo_handler,
+                                                       collection_name=params["collection_name"],
+                                                       event_statuses=event_statuses,
+                                                       write_buffer=write_buffer,
+                                                       register_abi=not dry_run)
+                deploy_requests += [(asset, params["collection_name"])] * close_out_count
+
+                if (asset, params["collection_name"]) in deploy_requests:
+                    continue
+
+                has_ongoing_event = mongo_handler.exists(
                     collection=params["collection_name"],
-                    query={"is_event_over": False,
-                           "event_close": {"$gt": datetime.now().timestamp()},
-                           "asset_symbol": asset
-                           }
+                    query=cls.build_ongoing_event_query(asset_symbol=asset),
+                    projection=EVENT_STATUS_COVERED_PROJECTION
                 )
 
-                if len(list(ongoing_event_records.clone())) == 0:
+                if not has_ongoing_event:
                     print("No {} {} events ongoing...".format(params["collection_name"], asset))
                     print("Deploying new contract...")
-                    deployed_contract_interface = cls.deploy_events(provider_handler=provider_handler,
-                                                                    mongo_handler=mongo_handler,
-                                                                    asset_symbol=asset,
-                                                                    collection_name=params["collection_name"],
-                                                                    is_test=is_test)
+                    deploy_requests.append((asset, params["collection_name"]))
+
+            except Exception as e:
+                print(f"An error occurred while processing betting events: {str(e)}")
+                raise e
+            finally:
+                metrics.observe("event_job_asset_seconds", time.perf_counter() - asset_start,
+                                labels={"job_type": job_config["job_type"], "asset": asset})
 
-                    if deployed_contract_interface is not None:
-                        contract_info = deployed_contract_interface.get_event_contract_info()
-                        contract_info_record_data = ContractInfoModel(**contract_info)
+        return deploy_requests
 
-                        contracts_response = mongo_handler.insert(collection=params["collection_name"],
-                                                                  document=contract_info_record_data.dict())
+    @staticmethod
+    def build_expired_event_query(asset_symbol) -> Dict:
+        # open records of events past their close, their status is read from the contract
+        return {"is_event_over": False,
+                "event_close": {"$lt": datetime.now().timestamp()},
+                "asset_symbol": asset_symbol,
+                "deploy_status": {"$ne": "pending"}}
 
-                        if contracts_response.acknowledged:
-                            print(f"Event {asset} {params['collection_name']} record created")
-                    else:
-                        raise Exception(f"Failed to deploy {params['collection_name']} contract")
+    @staticmethod
+    def build_ongoing_event_query(asset_symbol) -> Dict:
+        return {"is_event_over": False,
+                "event_close": {"$gt": datetime.now().timestamp()},
+                "asset_symbol": asset_symbol}
+
+    @staticmethod
+    def build_pending_event_query() -> Dict:
+        # factory events recorded before their create txn was confirmed
+        return {"deploy_status": "pending"}
+
+    @staticmethod
+    def build_settlement_query(now) -> Dict:
+        # closed out records of recent events that have not been settled or given up on
+        return {"is_event_over": True,
+                "settlement_status": {"$exists": False},
+                "event_close": {"$gt": now - SETTLEMENT_WINDOW}}
 
+    @staticmethod
+    def build_log_indexed_event_query(now) -> Dict:
+        # records of contracts that can still see bets, winners or withdrawals, each branch has its own index
+        return {"$or": [{"is_event_over": False},
+                        {"payout_close": {"$gt": now}},
+                        {"event_close": {"$gt": now - LOG_INDEX_SETTLEMENT_WINDOW}}]}
+
+    @staticmethod
+    def get_status_read_fields(contract_abi, indexed_bettors=False) -> Optional[List[str]]:
+        """
+        Contract info fields to read for the status of an expired event
+        :param contract_abi:
+        :param indexed_bettors: whether the bettor log index is on
+        :return: fields, None for all fields
+        """
+        if indexed_bettors and emits_bet_logs(contract_abi):
+            # the bettor arrays of the record are maintained by the log index
+            return CONTRACT_INFO_FIELDS_WITHOUT_BETTORS
+
+        return None
+
+    @classmethod
+    def queue_close_outs(cls, mongo_handler, collection_name, event_statuses: List[Dict],
+                         write_buffer: MongoWriteBuffer, register_abi=True) -> int:
+        """
+        Queue the record updates of the expired events whose contracts report the event over
+        :param mongo_handler:
+        :param collection_name:
+        :param event_statuses: contract info of the expired events
+        :param write_buffer:
+        :param register_abi: store new contract ABIs in the registry
+        :return: number of events closed out
+        """
+        close_out_count = 0
+        for event_status in event_statuses:
+            if event_status["is_event_over"]:
+                cls.update_event_record(mongo_handler=mongo_handler,
+                                        collection_name=collection_name,
+                                        current_contract_address=event_status["contract_address"],
+                                        current_contract_info=event_status,
+                                        write_buffer=write_buffer,
+                                        register_abi=register_abi)
+                close_out_count += 1
+
+        return close_out_count
+
+    @classmethod
+    def drop_unrecorded_close_outs(cls, deploy_requests, expired_event_statuses: Dict, flush_results: Dict) -> List:
+        """
+        Drop the deploy requests whose expired event record update failed to flush. The expired record is
+        still open, so the next pass closes it out again and deploys its replacement then, instead of
+        deploying a replacement next to a record that still looks ongoing.
+        :param deploy_requests: [(asset_symbol, collection_name), ...]
+        :param expired_event_statuses: {(collection_name, asset_symbol): [event_status, ...]}
+        :param flush_results: result of MongoWriteBuffer.flush with the close-out updates
+        :return: deploy requests whose close-outs were written
+        """
+        kept_requests = []
+        for asset, collection_name in deploy_requests:
+            failed_addresses = {query.get("contract_address") for query in
+                                MongoWriteBuffer.get_failed_queries(flush_results, collection_name)}
+            unrecorded_events = [event_status["contract_address"]
+                                 for event_status in expired_event_statuses.get((collection_name, asset), [])
+                                 if event_status["is_event_over"]
+                                 and event_status["contract_address"] in failed_addresses]
+            if unrecorded_events:
+                print(f"Event {collection_name} {asset} record update failed for {', '.join(unrecorded_events)}, "
+                      f"not deploying its replacement")
+                continue
+            kept_requests.append((asset, collection_name))
+
+        return kept_requests
+
+    @classmethod
+    def deploy_and_record_events(cls, provider_handler, mongo_handler, deploy_requests, is_test: bool,
+                                 write_buffer: Optional[MongoWriteBuffer] = None,
+                                 price_cache: Optional[LatestPriceCache] = None, factory_job_types=()):
+        """
+        Deploy an event contract for every (asset_symbol, collection_name) request in one pipelined batch
+        and insert a record for each deployed contract
+        :param provider_handler:
+        :param mongo_handler:
+        :param deploy_requests: [(asset_symbol, collection_name), ...]
+        :param is_test:
+        :param write_buffer: buffer to queue the record inserts on, inserted directly if None
+        :param price_cache: latest price cache to take price marks from, read from mongo if None
+        :param factory_job_types: series whose events are created as clones through their event factory
+        :return:
+        """
+        if not deploy_requests:
+            return
+
+        factory_requests = [(asset, collection_name) for asset, collection_name in deploy_requests
+                            if get_job_type_by_collection(collection_name) in factory_job_types]
+        deploy_requests = [deploy_request for deploy_request in deploy_requests
+                           if deploy_request not in factory_requests]
+
+        failed_deploys = []
+        if factory_requests:
+            failed_deploys += cls.create_and_record_factory_events(provider_handler=provider_handler,
+                                                                   mongo_handler=mongo_handler,
+                                                                   deploy_requests=factory_requests,
+                                                                   write_buffer=write_buffer,
+                                                                   price_cache=price_cache)
+
+        deployed_contract_interfaces = cls.deploy_events_pipelined(provider_handler=provider_handler,
+                                                                   mongo_handler=mongo_handler,
+                                                                   deploy_requests=deploy_requests,
+                                                                   is_test=is_test,
+                                                                   price_cache=price_cache)
+
+        for (asset, collection_name), deployed_contract_interface in zip(deploy_requests,
+                                                                         deployed_contract_interfaces):
+            if deployed_contract_interface is not None:
+                try:
+                    contract_info = deployed_contract_interface.get_event_contract_info()
+                except Exception as e:
+                    print(f"Unable to read deployed {asset} {collection_name} contract "
+                          f"{deployed_contract_interface.w3_contract_handle.address}: {e}")
+                    failed_deploys.append(f"{asset} {collection_name}")
+                    continue
+                contract_record = cls.build_contract_record(mongo_handler=mongo_handler, contract_info=contract_info)
+
+                if write_buffer is not None:
+                    write_buffer.insert(collection=collection_name, document=contract_record,
+                                        description=f"insert {contract_info['contract_address']}")
+                    print(f"Event {asset} {collection_name} record queued")
+                    continue
+
+                contracts_response = mongo_handler.insert(collection=collection_name,
+                                                          document=contract_record)
+                if contracts_response.acknowledged:
+                    print(f"Event {asset} {collection_name} record created")
+            else:
+                failed_deploys.append(f"{asset} {collection_name}")
+
+        # records of the contracts that did deploy are queued before reporting the failures
+        if failed_deploys:
+            raise Exception(f"Failed to deploy {', '.join(failed_deploys)} contracts")
+
+    @classmethod
+    def create_and_record_factory_events(cls, provider_handler, mongo_handler, deploy_requests,
+                                         write_buffer: Optional[MongoWriteBuffer] = None,
+                                         price_cache: Optional[LatestPriceCache] = None) -> List[str]:
+        """
+        Create an event clone for every request through the event factory of its series. The createEvent
+        txns are sent back to back and each record is inserted as pending as soon as its txn is sent,
+        at the locally predicted CREATE2 address; the receipts then confirm the records with the exact closes.
+        :param provider_handler:
+        :param mongo_handler:
+        :param deploy_requests: [(asset_symbol, collection_name), ...]
+        :param write_buffer: buffer to queue the confirmations on, written directly if None
+        :param price_cache: latest price cache to take price marks from, read from mongo if None
+        :return: failed requests ["asset_symbol collection_name", ...]
+        """
+        failed_deploys = []
+        created_events = []
+        for asset_symbol, collection_name in deploy_requests:
+            try:
+                event_factory = EventFactory.for_job(provider=provider_handler, mongo_handler=mongo_handler,
+                                                     job_definition=get_job_definition_by_collection(collection_name))
+                price_mark = cls.get_price_mark(mongo_handler=mongo_handler, asset_symbol=asset_symbol.upper(),
+                                                price_cache=price_cache)
+                if price_mark is None:
+                    raise StalePriceError(f"No price available for {asset_symbol}")
+                created_event = event_factory.create_event(price_mark=price_mark, asset_symbol=asset_symbol.upper())
+            except (StalePriceError, FeeCapExceededError) as e:
+                print(f"Refusing to create {asset_symbol} {collection_name} event: {e}")
+                failed_deploys.append(f"{asset_symbol} {collection_name}")
+                continue
+
+            contract_record = cls.build_contract_record(
+                mongo_handler=mongo_handler,
+                contract_info=event_factory.build_pending_contract_info(created_event=created_event))
+            contract_record.update({"deploy_status": "pending",
+                                    "deploy_txn_hash": Web3.to_hex(created_event["txn_hash"]),
+                                    "deploy_txn_nonce": created_event["nonce"],
+                                    "deploy_sent_at": time.time()})
+            mongo_handler.insert(collection=collection_name, document=contract_record)
+            print(f"Event {asset_symbol} {collection_name} record created as pending at "
+                  f"{created_event['contract_address']}")
+            created_events.append((asset_symbol, collection_name, event_factory, created_event))
+
+        if not created_events:
+            return failed_deploys
+
+        with ThreadPoolExecutor(max_workers=len(created_events)) as executor:
+            event_close_futures = [executor.submit(created[2].wait_for_event, created[3]) for created in created_events]
+
+        for (asset_symbol, collection_name, _, created_event), closes_future in zip(created_events,
+                                                                                    event_close_futures):
+            try:
+                closes = closes_future.result()
             except Exception as e:
-                print(f"An error occurred while processing betting events: {str(e)}")
-                raise e
-        return
+                # no receipt yet, the record stays pending for resolve_pending_events
+                print(f"Event {asset_symbol} {collection_name} at {created_event['contract_address']} "
+                      f"left pending: {e}")
+                failed_deploys.append(f"{asset_symbol} {collection_name}")
+                continue
+            if closes is None:
+                mongo_handler.delete(collection=collection_name,
+                                     query={"contract_address": created_event["contract_address"]})
+                failed_deploys.append(f"{asset_symbol} {collection_name}")
+                continue
+            cls.confirm_factory_event(mongo_handler=mongo_handler, collection_name=collection_name,
+                                      contract_address=created_event["contract_address"], closes=closes,
+                                      write_buffer=write_buffer)
+
+        return failed_deploys
+
+    @classmethod
+    def confirm_factory_event(cls, mongo_handler, collection_name, contract_address, closes: Dict,
+                              write_buffer: Optional[MongoWriteBuffer] = None):
+        update_document = {"$set": {"betting_close": to_uint_record(closes["betting_close"]),
+                                    "event_close": to_uint_record(closes["event_close"]),
+                                    "payout_close": to_uint_record(closes["payout_close"]),
+                                    "deploy_status": "confirmed"}}
+        if write_buffer is not None:
+            write_buffer.update(collection=collection_name, query={"contract_address": contract_address},
+                                document=update_document, description=f"confirm {contract_address}")
+        else:
+            mongo_handler.update(collection=collection_name, query={"contract_address": contract_address},
+                                 document=update_document)
+        print(f"Event {collection_name} {contract_address} creation confirmed")
+
+    def resolve_pending_events(self, job_configs, write_buffer: MongoWriteBuffer):
+        """
+        Confirm or drop the factory events left pending by an earlier pass, ex. after a restart while
+        waiting for their receipts. Events without a receipt after PENDING_EVENT_TIMEOUT are checked on chain
+        before anything is dropped, see resolve_stuck_event.
+        :param job_configs:
+        :param write_buffer:
+        :return:
+        """
+        for collection_name in sorted({params["collection_name"] for job_config in job_configs
+                                       for params in job_config["params"].values()}):
+            pending_event_records = self.mongo_handler.find(
+                collection=collection_name,
+                query=self.build_pending_event_query(),
+                projection={"_id": 0, "contract_address": 1, "deploy_txn_hash": 1, "deploy_txn_nonce": 1,
+                            "deploy_sent_at": 1, "cancel_txn_hash": 1}
+            )
+            for event_record in pending_event_records:
+                try:
+                    txn_receipt = self.provider_handler.w3.eth.get_transaction_receipt(event_record["deploy_txn_hash"])
+                except Exception:
+                    txn_receipt = None
+
+                closes = None
+                if txn_receipt is not None and txn_receipt["status"] == 1:
+                    closes = parse_event_created_logs(txn_receipt["logs"]).get(event_record["contract_address"])
+                if closes is not None:
+                    self.confirm_factory_event(mongo_handler=self.mongo_handler, collection_name=collection_name,
+                                               contract_address=event_record["contract_address"], closes=closes,
+                                               write_buffer=write_buffer)
+                elif txn_receipt is not None:
+                    self.drop_pending_event(collection_name=collection_name, event_record=event_record)
+                elif time.time() - event_record.get("deploy_sent_at", 0) > PENDING_EVENT_TIMEOUT:
+                    try:
+                        self.resolve_stuck_event(collection_name=collection_name, event_record=event_record,
+                                                 write_buffer=write_buffer)
+                    except Exception as e:
+                        print(f"Unable to resolve pending event {collection_name} "
+                              f"{event_record['contract_address']}: {e}")
+
+    def resolve_stuck_event(self, collection_name, event_record, write_buffer: MongoWriteBuffer):
+        """
+        Resolve a pending factory event whose createEvent txn has no receipt after PENDING_EVENT_TIMEOUT.
+        A clone with code was created, by this txn or a replacement, and is confirmed from its getters.
+        Otherwise the record is only dropped once the txn can no longer be mined: its nonce went to another
+        txn, or the node no longer has it. A txn still stuck in the mempool is replaced by a cancel txn at
+        the same nonce and the record stays pending until one of the two is mined.
+        :param collection_name:
+        :param event_record: pending event record
+        :param write_buffer:
+        :return:
+        """
+        w3 = self.provider_handler.w3
+        contract_address = event_record["contract_address"]
+        event_factory = EventFactory.for_job(provider=self.provider_handler, mongo_handler=self.mongo_handler,
+                                             job_definition=get_job_definition_by_collection(collection_name))
+        if len(w3.eth.get_code(contract_address)) > 0:
+            self.confirm_factory_event(mongo_handler=self.mongo_handler, collection_name=collection_name,
+                                       contract_address=contract_address,
+                                       closes=event_factory.read_event_closes(contract_address),
+                                       write_buffer=write_buffer)
+            return
+
+        txn_hash = event_record["deploy_txn_hash"]
+        is_txn_known = self.provider_handler.is_transaction_known(txn_hash)
+        nonce = event_record.get("deploy_txn_nonce")
+        if nonce is None and is_txn_known:
+            nonce = w3.eth.get_transaction(txn_hash)["nonce"]
+        if nonce is not None and \
+                w3.eth.get_transaction_count(self.provider_handler.get_wallet_address(), 'latest') > nonce:
+            # the nonce was mined by another txn, ex. the cancel txn, so this createEvent never will be
+            self.drop_pending_event(collection_name=collection_name, event_record=event_record)
+            return
+        if not is_txn_known:
+            # dropped by the node, the allocator re-reads the nonce so the gap is filled by the next send
+            self.provider_handler.resync_nonce()
+            self.drop_pending_event(collection_name=collection_name, event_record=event_record)
+            return
+
+        if event_record.get("cancel_txn_hash") is not None:
+            print(f"Event {collection_name} {contract_address} creation is being cancelled by "
+                  f"{event_record['cancel_txn_hash']}")
+            return
+        cancel_txn_hash = event_factory.cancel_create_event(txn_hash=txn_hash, nonce=nonce)
+        print(f"Event {collection_name} {contract_address} creation stuck, cancelling with "
+              f"{Web3.to_hex(cancel_txn_hash)}")
+        self.mongo_handler.update(collection=collection_name, query={"contract_address": contract_address},
+                                  document={"$set": {"cancel_txn_hash": Web3.to_hex(cancel_txn_hash)}})
+
+    def drop_pending_event(self, collection_name, event_record):
+        print(f"Event {collection_name} {event_record['contract_address']} was not created, "
+              f"dropping its pending record")
+        self.mongo_handler.delete(collection=collection_name,
+                                  query={"contract_address": event_record["contract_address"]})
+
+    @classmethod
+    def get_price_mark(cls, mongo_handler, asset_symbol: str,
+                       price_cache: Optional[LatestPriceCache] = None) -> Optional[float]:
+        """
+        Pick the price mark for a new event around the latest asset price
+        :param mongo_handler:
+        :param asset_symbol:
+        :param price_cache: latest price cache, raises StalePriceError if its price is stale
+        :return: price mark or None if no price is available for the asset
+        """
+        if price_cache is not None:
+            latest_price = price_cache.get_price(asset_symbol)
+        else:
+            if asset_symbol not in DEFAULT_PRICE_COLLECTIONS:
+                return None
+            mongo_response = mongo_handler.find_one_sorted(collection=DEFAULT_PRICE_COLLECTIONS[asset_symbol],
+                                                           query=[("timestamp", -1)])
+            latest_price = mongo_response['price']
+
+        return latest_price + latest_price * random.uniform(-0.07, 0.07)
+
+    @classmethod
+    def build_event_deployer(cls, provider_handler, hr_duration, is_test: bool,
+                             job_definition: Optional[Dict] = None) -> EventDeployer:
+        if job_definition is None:
+            job_definition = get_job_definition_by_duration(hr_duration=hr_duration, is_test=is_test)
+            if job_definition is None:
+                raise Exception(f"No event contract registered for a {hr_duration}h event")
+
+        return EventDeployer(provider=provider_handler, job_definition=job_definition)
+
+    @classmethod
+    def simulate_event_deploys(cls, provider_handler, mongo_handler, deploy_requests, is_test: bool,
+                               price_cache: Optional[LatestPriceCache] = None) -> List[Optional[Dict]]:
+        """
+        Simulate the deploys of a pass with eth_call/eth_estimateGas and print the outcome of each,
+        without signing or sending any txn
+        :param provider_handler:
+        :param mongo_handler:
+        :param deploy_requests: [(asset_symbol, collection_name), ...]
+        :param is_test:
+        :param price_cache:
+        :return: simulation results in request order (None where no deploy would be made)
+        """
+        simulation_results = []
+        for asset_symbol, collection_name in deploy_requests:
+            simulation_result = None
+            job_definition = get_job_definition_by_collection(collection_name)
+            try:
+                if job_definition is None:
+                    raise Exception(f"No job registered for collection {collection_name}")
+                event_deployer = cls.build_event_deployer(provider_handler=provider_handler,
+                                                          hr_duration=job_definition["hr_duration"],
+                                                          is_test=is_test,
+                                                          job_definition=job_definition)
+                price_mark = cls.get_price_mark(mongo_handler=mongo_handler, asset_symbol=asset_symbol.upper(),
+                                                price_cache=price_cache)
+                if price_mark is None:
+                    raise Exception(f"No price available for {asset_symbol}")
+                event_deployer.fee_oracle.get_fee_params()
+                simulation_result = event_deployer.simulate_deploy(price_mark=price_mark,
+                                                                   asset_symbol=asset_symbol.upper())
+            except Exception as e:
+                print(f"[dry run] {asset_symbol} {collection_name} deploy would not be sent: {e}")
+            else:
+                if simulation_result["error"] is not None:
+                    print(f"[dry run] {asset_symbol} {collection_name} deploy fails in simulation: "
+                          f"{simulation_result['error']}")
+                else:
+                    print(f"[dry run] {asset_symbol} {collection_name} deploy simulated, "
+                          f"gas estimate {simulation_result['gas_estimate'] or 'learned from receipts'}")
+            simulation_results.append(simulation_result)
+
+        return simulation_results
+
+    @classmethod
+    def start_event_deploy(cls,
+                           provider_handler,
+                           mongo_handler,
+                           asset_symbol: str,
+                           hr_duration,
+                           is_test: bool,
+                           job_definition: Optional[Dict] = None,
+                           price_cache: Optional[LatestPriceCache] = None) -> Optional[EventDeployer]:
+        """
+        Broadcast the deploy txn for an event contract without waiting for its receipt
+        :return: EventDeployer with a pending deploy txn or None
+        """
+        event_deployer = cls.build_event_deployer(provider_handler=provider_handler, hr_duration=hr_duration,
+                                                  is_test=is_test, job_definition=job_definition)
+
+        price_mark = cls.get_price_mark(mongo_handler=mongo_handler, asset_symbol=asset_symbol,
+                                        price_cache=price_cache)
+        if price_mark is None:
+            return None
+
+        event_deployer.start_deploy(price_mark=price_mark, asset_symbol=asset_symbol)
+
+        return event_deployer
 
     @classmethod
     def deploy_event(cls,
@@ -138,80 +1081,104 @@ class EventDeployerJobs:
                      hr_duration,
                      is_test: bool) -> Optional[EventDeployer]:
 
-        event_deployer = EventDeployer(provider=provider_handler,
-                                       hr_duration=hr_duration,
-                                       is_test=is_test)
-        price_mark = None
-
-        if asset_symbol == "BTC":
-            mongo_response = mongo_handler.find_one_sorted(collection='btc_live_price',
-                                                           query=[("timestamp", -1)])
-            btc_latest_price = mongo_response['price']
-            price_mark = btc_latest_price + btc_latest_price * random.uniform(-0.07, 0.07)
-        elif asset_symbol == "ETH":
-            mongo_response = mongo_handler.find_one_sorted(collection='eth_live_price',
-                                                           query=[("timestamp", -1)])
-            eth_latest_price = mongo_response['price']
-            price_mark = eth_latest_price + eth_latest_price * random.uniform(-0.07, 0.07)
+        event_deployer = cls.start_event_deploy(provider_handler=provider_handler,
+                                                mongo_handler=mongo_handler,
+                                                asset_symbol=asset_symbol,
+                                                hr_duration=hr_duration,
+                                                is_test=is_test)
 
         deploy_response = None
-        if price_mark is not None:
-            deploy_response = event_deployer.deploy_event_contract(price_mark=price_mark,
-                                                                   asset_symbol=asset_symbol)
+        if event_deployer is not None:
+            deploy_response = event_deployer.finish_deploy()
 
         if deploy_response is not None:
             return event_deployer
         else:
             return None
 
+    @classmethod
+    def deploy_events_pipelined(cls, provider_handler, mongo_handler, deploy_requests, is_test: bool,
+                                price_cache: Optional[LatestPriceCache] = None
+                                ) -> List[Optional[EventContractInterface]]:
+        """
+        Sign and broadcast the deploy txns for all requests back-to-back with locally allocated nonces,
+        then wait for all receipts together. Each deploy succeeds or fails on its own: a refused send or
+        a reverted or timed out receipt never keeps the other deploys of the batch from being awaited.
+        :param provider_handler:
+        :param mongo_handler:
+        :param deploy_requests: [(asset_symbol, collection_name), ...]
+        :param is_test:
+        :return: event contract interfaces in request order (None where no contract was deployed)
+        """
+        event_deployers = []
+        for asset_symbol, collection_name in deploy_requests:
+            event_deployer = None
+            job_definition = get_job_definition_by_collection(collection_name)
+            if job_definition is not None:
+                try:
+                    event_deployer = cls.start_event_deploy(provider_handler=provider_handler,
+                                                            mongo_handler=mongo_handler,
+                                                            asset_symbol=asset_symbol.upper(),
+                                                            hr_duration=job_definition["hr_duration"],
+                                                            is_test=is_test,
+                                                            job_definition=job_definition,
+                                                            price_cache=price_cache)
+                except (StalePriceError, FeeCapExceededError, DeploySimulationError) as e:
+                    print(f"Refusing to deploy {asset_symbol} {collection_name} contract: {e}")
+                except Exception as e:
+                    # the deploys already broadcast are still awaited and recorded
+                    print(f"Unable to send {asset_symbol} {collection_name} deploy txn: {e}")
+            event_deployers.append(event_deployer)
+
+        pending_deployers = [(asset_symbol, collection_name, event_deployer)
+                             for (asset_symbol, collection_name), event_deployer in zip(deploy_requests,
+                                                                                         event_deployers)
+                             if event_deployer is not None]
+        if pending_deployers:
+            with ThreadPoolExecutor(max_workers=len(pending_deployers)) as executor:
+                receipt_futures = [(asset_symbol, collection_name, executor.submit(event_deployer.finish_deploy))
+                                   for asset_symbol, collection_name, event_deployer in pending_deployers]
+                for asset_symbol, collection_name, receipt_future in receipt_futures:
+                    try:
+                        receipt_future.result()
+                    except Exception as e:
+                        print(f"{asset_symbol} {collection_name} deploy failed: {e}")
+
+        event_interfaces = []
+        for event_deployer in event_deployers:
+            if event_deployer is not None and event_deployer.is_contract_deployed():
+                event_interfaces.append(EventContractInterface(provider=provider_handler,
+                                                               contract_address=event_deployer.get_contract_address(),
+                                                               contract_abi=event_deployer.get_contract_abi()))
+            else:
+                event_interfaces.append(None)
+
+        return event_interfaces
+
     @classmethod
     def deploy_events(cls, provider_handler, mongo_handler,
                       asset_symbol: str, collection_name: str, is_test: bool) -> Optional[EventContractInterface]:
-        asset_symbol = asset_symbol.upper()
-        event_deployer = None
-
-        if collection_name == "event_contracts_6h":
-            event_deployer = cls.deploy_event(provider_handler=provider_handler,
-                                              mongo_handler=mongo_handler,
-                                              asset_symbol=asset_symbol,
-                                              hr_duration=6,
-                                              is_test=is_test)
-
-        if collection_name == "event_contracts_12h":
-            event_deployer = cls.deploy_event(provider_handler=provider_handler,
-                                              mongo_handler=mongo_handler,
-                                              asset_symbol=asset_symbol,
-                                              hr_duration=12,
-                                              is_test=is_test)
-
-        if collection_name == "event_contracts_24h":
-            event_deployer = cls.deploy_event(provider_handler=provider_handler,
-                                              mongo_handler=mongo_handler,
-                                              asset_symbol=asset_symbol,
-                                              hr_duration=24,
-                                              is_test=is_test)
-
-        if collection_name == "event_contracts_test":
-            event_deployer = cls.deploy_event(provider_handler=provider_handler,
-                                              mongo_handler=mongo_handler,
-                                              asset_symbol=asset_symbol,
-                                              hr_duration=0,
-                                              is_test=is_test)
-
-        if event_deployer is not None:
-            event_interface = EventContractInterface(provider=provider_handler,
-                                                     contract_address=event_deployer.get_contract_address(),
-                                                     contract_abi=event_deployer.get_contract_abi())
-            return event_interface
-        else:
-            return None
+        return cls.deploy_events_pipelined(provider_handler=provider_handler,
+                                           mongo_handler=mongo_handler,
+                                           deploy_requests=[(asset_symbol, collection_name)],
+                                           is_test=is_test)[0]
 
     @classmethod
-    def check_contract_status(cls, provider_handler, contract_address, contract_abi, collection_name) -> Optional[Dict]:
-        contract_interface = EventContractInterface(provider=provider_handler,
-                                                    contract_address=contract_address,
-                                                    contract_abi=contract_abi)
-        current_contract_info = contract_interface.get_event_contract_info()
+    def check_contract_status(cls, provider_handler, contract_address, contract_abi, collection_name,
+                              abi_id=None, mongo_handler=None, indexed_bettors=False) -> Optional[Dict]:
+        if abi_id is not None:
+            abi_registry = AbiRegistry.for_mongo_handler(mongo_handler=mongo_handler)
+            contract_interface = EventContractInterface.from_abi_id(provider=provider_handler,
+                                                                    contract_address=contract_address,
+                                                                    abi_id=abi_id,
+                                                                    abi_loader=abi_registry.get)
+        else:
+            contract_interface = EventContractInterface(provider=provider_handler,
+                                                        contract_address=contract_address,
+                                                        contract_abi=contract_abi)
+        current_contract_info = contract_interface.get_event_contract_info(
+            fields=cls.get_status_read_fields(contract_interface.w3_contract_handle.abi,
+                                              indexed_bettors=indexed_bettors))
         asset_symbol = current_contract_info['asset_symbol']
 
         if current_contract_info:
@@ -223,11 +1190,22 @@ class EventDeployerJobs:
         return current_contract_info
 
     @classmethod
-    def update_event_record(cls, mongo_handler, collection_name, current_contract_address, current_contract_info):
-        update_record = ContractInfoModel(**current_contract_info)
+    def update_event_record(cls, mongo_handler, collection_name, current_contract_address, current_contract_info,
+                            write_buffer: Optional[MongoWriteBuffer] = None, register_abi=True):
+        update_record = cls.build_contract_record(mongo_handler=mongo_handler, contract_info=current_contract_info,
+                                                  register_abi=register_abi)
+        update_document = {"$set": update_record, "$unset": {"contract_abi": ""}}
+        if write_buffer is not None:
+            write_buffer.update(collection=collection_name,
+                                query={"contract_address": current_contract_address},
+                                document=update_document,
+                                description=f"update {current_contract_address}")
+            print(f"Event {collection_name} {current_contract_info['asset_symbol']} record update queued")
+            return True
+
         update_result = mongo_handler.update(collection=collection_name,
                                              query={"contract_address": current_contract_address},
-                                             document={"$set": update_record.dict()})
+                                             document=update_document)
 
         if update_result.acknowledged:
             print(f"Event {collection_name} {current_contract_info['asset_symbol']} record updated")
@@ -236,3 +1214,29 @@ class EventDeployerJobs:
             raise Exception("Event record update failed")
 
         return update_result.acknowledged
+
+    @classmethod
+    def build_contract_record(cls, mongo_handler, contract_info, register_abi=True) -> Dict:
+        """
+        Build the event contract record, storing the contract ABI in the ABI registry
+        and referencing it by abi_id instead of embedding it
+        :param mongo_handler:
+        :param contract_info: contract info from EventContractInterface.get_event_contract_info
+        :param register_abi: store the ABI in the registry, otherwise only its abi_id is computed
+        :return: record document
+        """
+        abi_id = contract_info.get("abi_id")
+        if contract_info.get("contract_abi") is not None:
+            if register_abi:
+                abi_id = AbiRegistry.for_mongo_handler(mongo_handler=mongo_handler).register(
+                    contract_info["contract_abi"])
+            else:
+                abi_id = AbiRegistry.hash_abi(contract_info["contract_abi"])
+
+        record = serialize_contract_info(contract_info=contract_info, abi_id=abi_id)
+        # bettor arrays that were not read are left as they are in the record
+        for field in BETTOR_ADDRESS_FIELDS:
+            if record[field] is None:
+                del record[field]
+
+        return record
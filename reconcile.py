@@ -0,0 +1,199 @@
+import os
+import json
+import argparse
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from bson import ObjectId
+from dotenv import dotenv_values, find_dotenv
+
+from eth.provider.provider import Provider
+from eth.event_interfaces import EventContractInterface
+from db.mongo_interface import MongoInterface
+from db.abi_registry import AbiRegistry
+from db.write_buffer import MongoWriteBuffer
+from db.schemas.event_schemas import ContractInfoModel
+from job_registry import JOB_REGISTRY
+from jobs import EventDeployerJobs
+
+# Load environment variables
+config = dotenv_values(dotenv_path=find_dotenv())
+
+# Record fields compared against chain state (the ABI is stored by reference and never drifts)
+RECONCILED_FIELDS = [field for field in ContractInfoModel.__fields__ if field not in ("contract_abi", "abi_id")]
+RECONCILE_PROJECTION = {field: 1 for field in RECONCILED_FIELDS + ["contract_abi", "abi_id"]}
+# Incremental sync state derived from the bettor arrays (see eth/state_sync.py)
+BETTOR_COUNT_FIELDS = {"over_betters_addresses": "over_betters_count",
+                       "under_betters_addresses": "under_betters_count"}
+
+
+class ContractReconciler:
+    """
+    Streams event contract records, reads their on-chain state in concurrent batches and bulk-fixes drift.
+    Progress is checkpointed per collection by _id so an interrupted run resumes where it stopped.
+    """
+
+    def __init__(self, provider_handler: Provider, mongo_handler: MongoInterface, batch_size=200, concurrency=16,
+                 checkpoint_path="reconcile_checkpoint.json", dry_run=False):
+        self.provider_handler = provider_handler
+        self.mongo_handler = mongo_handler
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.checkpoint_path = checkpoint_path
+        self.dry_run = dry_run
+        self.abi_registry = AbiRegistry.for_mongo_handler(mongo_handler=mongo_handler)
+        self.checkpoints = self.load_checkpoints()
+
+    def load_checkpoints(self) -> Dict[str, str]:
+        if not os.path.isfile(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path, "r") as checkpoint_file:
+            return json.load(checkpoint_file)
+
+    def save_checkpoint(self, collection_name, last_id):
+        self.checkpoints[collection_name] = str(last_id)
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as checkpoint_file:
+            json.dump(self.checkpoints, checkpoint_file)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def iter_records(self, collection_name) -> Iterator[Dict]:
+        query = {}
+        if collection_name in self.checkpoints:
+            query = {"_id": {"$gt": ObjectId(self.checkpoints[collection_name])}}
+
+        yield from self.mongo_handler.find(collection=collection_name,
+                                           query=query,
+                                           projection=RECONCILE_PROJECTION,
+                                           sort=[("_id", 1)],
+                                           batch_size=self.batch_size)
+
+    @staticmethod
+    def iter_batches(records: Iterator[Dict], batch_size) -> Iterator[List[Dict]]:
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def fetch_chain_state(self, record) -> Optional[Dict]:
+        try:
+            if record.get("abi_id") is not None:
+                contract_interface = EventContractInterface.from_abi_id(provider=self.provider_handler,
+                                                                        contract_address=record["contract_address"],
+                                                                        abi_id=record["abi_id"],
+                                                                        abi_loader=self.abi_registry.get)
+            else:
+                contract_interface = EventContractInterface(provider=self.provider_handler,
+                                                            contract_address=record["contract_address"],
+                                                            contract_abi=record["contract_abi"])
+            return contract_interface.get_event_contract_info()
+        except Exception as e:
+            print(f"Unable to read {record.get('contract_address')}: {e}")
+            return None
+
+    def diff_record(self, record, chain_info) -> Dict:
+        """
+        Fields of the stored record that differ from chain state
+        :param record: stored event contract record
+        :param chain_info: contract info from EventContractInterface.get_event_contract_info
+        :return: {field: chain_value}
+        """
+        chain_record = EventDeployerJobs.build_contract_record(mongo_handler=self.mongo_handler,
+                                                               contract_info=chain_info,
+                                                               register_abi=not self.dry_run)
+
+        return {field: chain_record[field] for field in RECONCILED_FIELDS
+                if field in chain_record and record.get(field) != chain_record[field]}
+
+    @staticmethod
+    def build_update_document(drift) -> Dict:
+        """
+        Update fixing the drifted fields. Rewritten bettor arrays also reset the incremental sync state
+        derived from them, so the next sync appends to the new arrays instead of pushing a stale tail.
+        :param drift: result of diff_record
+        :return: mongo update document
+        """
+        set_fields = dict(drift)
+        for array_field, count_field in BETTOR_COUNT_FIELDS.items():
+            if array_field in drift:
+                set_fields[count_field] = len(drift[array_field] or [])
+
+        update_document = {"$set": set_fields}
+        if any(array_field in drift for array_field in BETTOR_COUNT_FIELDS):
+            update_document["$unset"] = {"sync_fingerprint": ""}
+
+        return update_document
+
+    def reconcile_collection(self, collection_name) -> Dict:
+        stats = {"checked": 0, "drifted": 0, "unreadable": 0}
+        # the checkpoint never moves past an unreadable record, so the next run retries it
+        checkpoint_blocked = False
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for batch in self.iter_batches(self.iter_records(collection_name), self.batch_size):
+                write_buffer = MongoWriteBuffer(mongo_handler=self.mongo_handler)
+                chain_states = executor.map(self.fetch_chain_state, batch)
+                checkpoint_id = None
+
+                for record, chain_info in zip(batch, chain_states):
+                    stats["checked"] += 1
+                    if chain_info is None:
+                        stats["unreadable"] += 1
+                        checkpoint_blocked = True
+                        continue
+                    if not checkpoint_blocked:
+                        checkpoint_id = record["_id"]
+                    drift = self.diff_record(record, chain_info)
+                    if drift:
+                        stats["drifted"] += 1
+                        print(f"{collection_name} {record['contract_address']} drifted: {sorted(drift)}")
+                        write_buffer.update(collection=collection_name,
+                                            query={"_id": record["_id"]},
+                                            document=self.build_update_document(drift),
+                                            description=f"reconcile {record['contract_address']}")
+
+                if not self.dry_run:
+                    write_buffer.flush()
+                    if checkpoint_id is not None:
+                        self.save_checkpoint(collection_name, checkpoint_id)
+                print(f"{collection_name}: {stats['checked']} checked, {stats['drifted']} drifted, "
+                      f"{stats['unreadable']} unreadable")
+
+        return stats
+
+    def run(self, collection_names) -> Dict:
+        return {collection_name: self.reconcile_collection(collection_name) for collection_name in collection_names}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile event contract records against chain state")
+    parser.add_argument("--collections", nargs="*",
+                        default=[job_definition["collection_name"] for job_definition in JOB_REGISTRY.values()
+                                 if not job_definition["is_test"]])
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=int(config.get('RPC_CONCURRENCY') or 16))
+    parser.add_argument("--checkpoint-file", default="reconcile_checkpoint.json")
+    parser.add_argument("--reset", action="store_true", help="ignore and overwrite the checkpoint")
+    parser.add_argument("--dry-run", action="store_true", help="report drift without writing")
+    args = parser.parse_args()
+
+    if args.reset and os.path.isfile(args.checkpoint_file):
+        os.remove(args.checkpoint_file)
+
+    provider = Provider(provider_urls=[config.get(url_key) for url_key in ('ALCHEMY_SEPOLIA_URL', 'INFURA_SEPOLIA_URL')
+                                       if config.get(url_key)],
+                        wallet_address=config['WALLET_ADDRESS'],
+                        wallet_private_key=config['WALLET_PRIVATE_KEY'])
+    mongo_handler = MongoInterface(db_name=config['MONGO_DB_NAME'],
+                                   connection_url=config['MONGO_DB_CONNECTION_STRING'])
+
+    ContractReconciler(provider_handler=provider,
+                       mongo_handler=mongo_handler,
+                       batch_size=args.batch_size,
+                       concurrency=args.concurrency,
+                       checkpoint_path=args.checkpoint_file,
+                       dry_run=args.dry_run).run(collection_names=args.collections)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,80 +1,227 @@
-import multiprocessing
+import sys
+import asyncio
+import argparse
+import signal
 from dotenv import dotenv_values, find_dotenv
 
 from eth.provider.provider import Provider
+from eth.provider.async_provider import AsyncProvider
+from eth.log_indexer import BettorLogIndexer, BETTOR_INDEX_COLLECTION
+from eth.artifact_cache import artifact_cache, DEFAULT_ARTIFACT_DIR
+from eth.toolchain import solc_toolchain, read_pragma, SolcVersionMismatchError
+from eth.fee_oracle import FeeOracle, gas_limit_cache
+from eth.simulation import simulation_cache
 
 from db.mongo_interface import MongoInterface
+from db.indexes import ensure_indexes
+from db.price_feed import LatestPriceCache, parse_price_collections
+from db.event_feed import EventInsertFeed
 
 from jobs import EventDeployerJobs
+from async_jobs import AsyncEventDeployerJobs
+from job_registry import build_job_configs, get_job_definition, FACTORY_SOURCE_PATH
+from utils.supervisor import WorkerSupervisor
+from utils.metrics import metrics
 
 # Load environment variables
 config = dotenv_values(dotenv_path=find_dotenv())
 
 
-def event_deploy_worker():
-    try:
-        print("Connecting to Alchemy RPC...")
-        provider = Provider(provider_url=config['ALCHEMY_SEPOLIA_URL'],
-                            wallet_address=config['WALLET_ADDRESS'],
-                            wallet_private_key=config['WALLET_PRIVATE_KEY'])
-        if not provider.get_is_connected():
-            raise Exception("Unable to connect to Alchemy RPC...")
-    except Exception as e:
-        print(e)
-        print("Using Infura RPC instead...")
-        try:
-            provider = Provider(provider_url=config['INFURA_SEPOLIA_URL'],
-                                wallet_address=config['WALLET_ADDRESS'],
-                                wallet_private_key=config['WALLET_PRIVATE_KEY'])
-            if not provider.get_is_connected():
-                raise Exception("Unable to connect to Alchemy RPC...")
-        except Exception as e:
-            print(e)
-            print("Exiting...")
-            return
+def get_is_test():
+    if config['is_test'].lower() == "true":
+        return True
+    else:
+        return False
+
+
+def apply_runtime_config():
+    """
+    Configure the shared module level caches from the .env config. dotenv_values does not fill os.environ,
+    so the modules cannot read these settings themselves.
+    :return:
+    """
+    artifact_cache.artifact_dir = config.get('CONTRACT_ARTIFACT_DIR') or DEFAULT_ARTIFACT_DIR
+    solc_toolchain.solcx_binary_path = config.get('SOLCX_BINARY_PATH') or None
+    solc_toolchain.pinned_version = config.get('SOLC_VERSION') or None
+    metrics.log_events = (config.get('METRICS_JSON_LOGS') or "true").lower() == "true"
+    # MAX_FEE_PER_GAS_GWEI caps the max fee of every txn, sends are refused while the base fee is above it
+    FeeOracle.configure(max_fee_cap_gwei=config.get('MAX_FEE_PER_GAS_GWEI') or None,
+                        history_blocks=int(config.get('FEE_HISTORY_BLOCKS') or 10))
+    gas_limit_cache.margin = float(config.get('DEPLOY_GAS_MARGIN') or 1.2)
+    simulation_cache.ttl = float(config.get('DEPLOY_SIMULATION_TTL') or 300)
+
+
+def get_provider_urls():
+    return [config.get(url_key) for url_key in ('ALCHEMY_SEPOLIA_URL', 'INFURA_SEPOLIA_URL') if config.get(url_key)]
+
+
+def get_factory_job_types():
+    # FACTORY_DEPLOY_JOBS=betting_event_6h creates the events of the listed series as clones through a factory
+    return [job_type.strip() for job_type in (config.get('FACTORY_DEPLOY_JOBS') or "").split(",") if job_type.strip()]
+
+
+def get_engine():
+    return (config.get('ENGINE') or "sync").lower()
+
+
+def get_async_engine_conflicts():
+    """
+    Settings the async engine does not support. Its deploys and status reads go to a single endpoint
+    without the failover and hedging of the endpoint pool, and it has no factory deploys.
+    :return: reasons the async engine cannot run with the current config
+    """
+    conflicts = []
+    if len(get_provider_urls()) > 1:
+        conflicts.append("several RPC endpoints are configured, the async engine only uses the first one")
+    if get_factory_job_types():
+        conflicts.append("FACTORY_DEPLOY_JOBS is set, factory deploys only run on the sync engine")
+
+    return conflicts
+
+
+def check_solc_version_pin(job_configs):
+    """
+    Check SOLC_VERSION against the pragma of every contract the jobs may compile, so a bad pin stops the
+    runner at startup instead of failing every deploy
+    :param job_configs:
+    :return:
+    """
+    contract_source_paths = {FACTORY_SOURCE_PATH} if get_factory_job_types() else set()
+    for job_config in job_configs:
+        job_definition = get_job_definition(job_config["job_type"]) or {}
+        contract_source_paths.update(job_definition.get(source_key) for source_key in
+                                     ("contract_source_path", "clone_source_path") if job_definition.get(source_key))
+
+    for contract_source_path in sorted(contract_source_paths):
+        solc_toolchain.check_pinned_version(read_pragma(contract_source_path),
+                                            contract_source_path=contract_source_path)
+
+
+def event_deploy_worker(job_configs, metrics_port=None, metrics_path=None, dry_run=False):
+    """
+    Run the given job configs with a dedicated provider and mongo connection.
+    Exits non-zero when the job runner stops on an error so the supervisor restarts it.
+    :param job_configs:
+    :param metrics_port: port to serve Prometheus metrics on
+    :param metrics_path: file to dump Prometheus metrics to after every pass
+    :param dry_run: run a single simulated pass that sends no txns and writes nothing
+    :return:
+    """
+    apply_runtime_config()
+    if metrics_port is not None:
+        metrics.start_http_server(port=metrics_port)
+
+    provider_urls = get_provider_urls()
+    hedge_delay_ms = config.get('RPC_HEDGE_DELAY_MS')
+
+    print(f"Connecting to {len(provider_urls)} RPC endpoints...")
+    provider = Provider(provider_urls=provider_urls,
+                        wallet_address=config['WALLET_ADDRESS'],
+                        wallet_private_key=config['WALLET_PRIVATE_KEY'],
+                        hedge_delay=float(hedge_delay_ms) / 1000 if hedge_delay_ms else None)
+    if not provider.get_is_connected():
+        print("Unable to connect to any RPC endpoint...")
+        print("Exiting...")
+        sys.exit(1)
 
     mongo_handler = MongoInterface(db_name=config['MONGO_DB_NAME'],
                                    connection_url=config['MONGO_DB_CONNECTION_STRING'])
-    job_configs = [
-        {
-            "job_type": "betting_event_6h",
-            "params": {
-                "BTC": {"collection_name": "event_contracts_6h"},
-                "ETH": {"collection_name": "event_contracts_6h"}
-            }
-        },
-        {
-            "job_type": "betting_event_test",
-            "params": {
-                "BTC": {"collection_name": "event_contracts_test"},
-                "ETH": {"collection_name": "event_contracts_test"}
-            }
-        }
-    ]
-
-    if config['is_test'].lower() == "true":
-        is_test = True
+    price_collections = parse_price_collections(config.get('PRICE_COLLECTIONS'))
+
+    # LOG_INDEXER_ENABLED=false turns off the bettor index maintained from contract logs
+    log_indexer_enabled = (config.get('LOG_INDEXER_ENABLED') or "true").lower() == "true"
+    # SETTLEMENT_ENABLED=false leaves setPriceAtClose/setWinners of expired events to another operator
+    settlement_enabled = (config.get('SETTLEMENT_ENABLED') or "true").lower() == "true"
+    factory_job_types = get_factory_job_types()
+    event_collections = [params["collection_name"] for job in job_configs for params in job["params"].values()]
+    if not dry_run:
+        ensure_indexes(mongo_handler=mongo_handler,
+                       event_collections=event_collections,
+                       price_collections=price_collections.values(),
+                       bettor_collections=[BETTOR_INDEX_COLLECTION] if log_indexer_enabled else [])
+
+    price_cache = LatestPriceCache(mongo_handler=mongo_handler,
+                                   price_collections=price_collections,
+                                   max_age=float(config.get('PRICE_MAX_AGE_SECONDS') or 300)).start()
+
+    is_test = get_is_test()
+
+    event_deployer_jobs = EventDeployerJobs(job_configs=job_configs,
+                                            provider_handler=provider,
+                                            mongo_handler=mongo_handler,
+                                            rpc_concurrency=int(config.get('RPC_CONCURRENCY') or 8),
+                                            price_cache=price_cache,
+                                            metrics_path=metrics_path,
+                                            settle_events=settlement_enabled and not dry_run,
+                                            dry_run=dry_run,
+                                            factory_job_types=factory_job_types,
+                                            log_indexer=BettorLogIndexer(
+                                                provider=provider,
+                                                mongo_handler=mongo_handler,
+                                                max_block_range=int(config.get('LOG_INDEXER_BLOCK_RANGE') or 2000),
+                                                index_name="bettor_index_" + "_".join(job["job_type"]
+                                                                                      for job in job_configs)
+                                            ) if log_indexer_enabled else None)
+    if not is_test and not dry_run:
+        # events inserted while the runner sleeps move its next wake-up forward
+        EventInsertFeed(mongo_handler=mongo_handler, scheduler=event_deployer_jobs.scheduler,
+                        event_collections=event_collections).start()
+    # ENGINE=async runs the passes on the asyncio engine, overlapping the chain and mongo waits of all series.
+    # It is refused at startup for the settings it does not support, see get_async_engine_conflicts.
+    # Dry runs always plan and simulate on the sync engine.
+    if get_engine() == "async" and not dry_run:
+        async_event_deployer_jobs = AsyncEventDeployerJobs(
+            sync_jobs=event_deployer_jobs,
+            provider_handler=AsyncProvider(provider_urls=provider_urls,
+                                           wallet_address=config['WALLET_ADDRESS'],
+                                           wallet_private_key=config['WALLET_PRIVATE_KEY']))
+        asyncio.run(async_event_deployer_jobs.run(is_test=is_test))
     else:
-        is_test = False
+        signal.signal(signal.SIGTERM, lambda signum, frame: event_deployer_jobs.stop())
+        event_deployer_jobs.job_runner(is_test=is_test)
 
-    EventDeployerJobs(job_configs=job_configs,
-                      provider_handler=provider,
-                      mongo_handler=mongo_handler).job_runner(is_test=is_test)
+    if not is_test and not dry_run and not event_deployer_jobs.stop_requested:
+        sys.exit(1)
 
     return
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the betting event jobs")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="plan one pass and simulate its deploys with eth_call, without sending txns or "
+                             "writing to mongo")
+    args = parser.parse_args()
+
+    is_test = get_is_test()
+    apply_runtime_config()
+    try:
+        check_solc_version_pin(job_configs=build_job_configs(is_test=is_test))
+    except SolcVersionMismatchError as e:
+        print(e)
+        sys.exit(1)
+
+    if args.dry_run:
+        event_deploy_worker(job_configs=build_job_configs(is_test=is_test), dry_run=True)
+        sys.exit(0)
 
-    # process queue
-    processes = []
+    if get_engine() == "async" and get_async_engine_conflicts():
+        print(f"ENGINE=async refused: {'; '.join(get_async_engine_conflicts())}. Use ENGINE=sync instead.")
+        sys.exit(1)
 
-    betting_events_job_process = multiprocessing.Process(target=event_deploy_worker)
+    # All series run in one worker process: they sign with one wallet, and a single process keeps a single
+    # nonce allocator for it. The supervisor restarts the worker when it exits.
+    supervisor = WorkerSupervisor(base_backoff=float(config.get('WORKER_BACKOFF_SECONDS') or 5),
+                                  max_backoff=float(config.get('WORKER_MAX_BACKOFF_SECONDS') or 600))
 
-    betting_events_job_process.start()
+    # METRICS_PORT serves /metrics, METRICS_FILE is rewritten after every pass
+    metrics_port = int(config['METRICS_PORT']) if config.get('METRICS_PORT') else None
+    metrics_file = config.get('METRICS_FILE')
 
-    # wait for all processes to finish
-    for process in processes:
-        process.join()
+    supervisor.add_worker(name="betting_events",
+                          target=event_deploy_worker,
+                          kwargs={"job_configs": build_job_configs(is_test=is_test),
+                                  "metrics_port": metrics_port,
+                                  "metrics_path": metrics_file})
 
-    pass
+    supervisor.run()
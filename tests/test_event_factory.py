@@ -0,0 +1,66 @@
+import os
+import re
+
+import pytest
+from web3 import Web3
+
+from job_registry import FACTORY_SOURCE_PATH, FACTORY_CONTRACT_NAME, get_job_definition
+from eth.event_factory import (EIP1167_PREFIX, EIP1167_SUFFIX, get_create2_address, predict_clone_address,
+                               make_event_salt)
+
+ZERO_ADDRESS = "0x" + "00" * 20
+ZERO_SALT = bytes(32)
+
+# Examples from EIP-1014: (deployer address, salt, init code, address)
+EIP1014_EXAMPLES = [
+    (ZERO_ADDRESS, ZERO_SALT, "00", "0x4D1A2e2bB4F88F0250f26Ffff098B0b30B26BF38"),
+    ("0xdeadbeef00000000000000000000000000000000", ZERO_SALT, "00", "0xB928f69Bb1D91Cd65274e3c79d8986362984fDA3"),
+    ("0xdeadbeef00000000000000000000000000000000",
+     bytes.fromhex("000000000000000000000000feed000000000000000000000000000000000000"), "00",
+     "0xD04116cDd17beBE565EB2422F2497E06cC1C9833"),
+    (ZERO_ADDRESS, ZERO_SALT, "deadbeef", "0x70f2b2914A2a4b783FaEFb75f459A580616Fcb5e"),
+    (ZERO_ADDRESS, ZERO_SALT, "", "0xE33C0C7F7df4809055C3ebA6c09CFe4BaF1BD9e0"),
+]
+
+# Node and funded wallet for the on-chain check against the factory, ex. a local dev node
+NODE_ENV = ["EVENT_FACTORY_TEST_PROVIDER_URL", "EVENT_FACTORY_TEST_WALLET_ADDRESS",
+            "EVENT_FACTORY_TEST_WALLET_PRIVATE_KEY"]
+
+
+@pytest.mark.parametrize("deployer_address, salt, init_code, expected_address", EIP1014_EXAMPLES)
+def test_create2_address_matches_eip1014(deployer_address, salt, init_code, expected_address):
+    assert get_create2_address(deployer_address, salt, bytes.fromhex(init_code)) == expected_address
+
+
+def test_clone_init_code_matches_factory_source():
+    with open(FACTORY_SOURCE_PATH) as factory_source:
+        init_code_parts = re.findall(r'hex"([0-9a-f]+)"', factory_source.read())
+
+    assert init_code_parts == [EIP1167_PREFIX.hex(), EIP1167_SUFFIX.hex()]
+
+
+@pytest.mark.skipif(any(os.environ.get(name) is None for name in NODE_ENV),
+                    reason=f"needs a node and a funded wallet in {', '.join(NODE_ENV)}")
+def test_predict_clone_address_matches_factory():
+    from eth.provider.provider import Provider
+    from eth.event_interfaces import EventDeployer
+
+    provider = Provider(provider_url=os.environ["EVENT_FACTORY_TEST_PROVIDER_URL"],
+                        wallet_address=os.environ["EVENT_FACTORY_TEST_WALLET_ADDRESS"],
+                        wallet_private_key=os.environ["EVENT_FACTORY_TEST_WALLET_PRIVATE_KEY"])
+    job_definition = get_job_definition("betting_event_6h")
+    implementation_address = EventDeployer(provider=provider,
+                                           contract_source_path=job_definition["clone_source_path"],
+                                           event_contract_name=job_definition["clone_contract_name"],
+                                           simulate_deploys=False).deploy_contract()
+    factory_deployer = EventDeployer(provider=provider, contract_source_path=FACTORY_SOURCE_PATH,
+                                     event_contract_name=FACTORY_CONTRACT_NAME, simulate_deploys=False)
+    factory_address = factory_deployer.deploy_contract(constructor_args={"_implementation": implementation_address})
+    factory_contract = provider.w3.eth.contract(address=Web3.to_checksum_address(factory_address),
+                                                abi=factory_deployer.contract_abi)
+
+    for nonce in range(3):
+        salt = make_event_salt(wallet_address=provider.get_wallet_address(),
+                               collection_name=job_definition["collection_name"], asset_symbol="BTC", nonce=nonce)
+        assert predict_clone_address(factory_address, salt, implementation_address) == \
+            factory_contract.functions.predictAddress(salt).call()
@@ -0,0 +1,98 @@
+import pytest
+from eth_abi import decode, encode
+from web3 import Web3
+from web3.providers.base import JSONBaseProvider
+
+from eth.provider.provider import Provider
+from eth.event_interfaces import EventContractInterface
+from eth.multicall import MULTICALL3_ADDRESS
+
+CONTRACT_ADDRESS = Web3.to_checksum_address("0x" + "11" * 20)
+
+CONTRACT_ABI = [
+    {"type": "function", "name": "getPriceMark", "inputs": [], "stateMutability": "view",
+     "outputs": [{"name": "", "type": "uint256"}]},
+    {"type": "function", "name": "getAssetSymbol", "inputs": [], "stateMutability": "view",
+     "outputs": [{"name": "", "type": "string"}]},
+    {"type": "function", "name": "isEventOver", "inputs": [], "stateMutability": "view",
+     "outputs": [{"name": "", "type": "bool"}]},
+]
+
+GETTER_RESULTS = {
+    "getPriceMark": encode(["uint256"], [Web3.to_wei(65000, "ether")]),
+    "getAssetSymbol": encode(["string"], ["BTC"]),
+    "isEventOver": encode(["bool"], [False]),
+}
+
+
+class FakeNode(JSONBaseProvider):
+    """
+    Answers eth_call for the event contract getters and for Multicall3.aggregate3 over them
+    """
+
+    def __init__(self, reverting_getters=()):
+        super().__init__()
+        self.results_by_selector = {Web3.keccak(text=f"{function_name}()")[:4]: (function_name, result)
+                                    for function_name, result in GETTER_RESULTS.items()}
+        self.reverting_getters = reverting_getters
+        self.calls = []
+
+    def call_getter(self, call_data):
+        function_name, result = self.results_by_selector[bytes(call_data[:4])]
+        return function_name not in self.reverting_getters, result
+
+    def make_request(self, method, params):
+        if method == "eth_chainId":
+            return {"jsonrpc": "2.0", "id": 1, "result": "0x1"}
+        if method != "eth_call":
+            raise Exception(f"unexpected {method}")
+        to_address = Web3.to_checksum_address(params[0]["to"])
+        call_data = bytes.fromhex(params[0]["data"][2:])
+        self.calls.append(to_address)
+
+        if to_address == MULTICALL3_ADDRESS:
+            calls, = decode(["(address,bool,bytes)[]"], call_data[4:])
+            result = encode(["(bool,bytes)[]"], [[self.call_getter(sub_call_data) for _, _, sub_call_data in calls]])
+        else:
+            _, result = self.call_getter(call_data)
+
+        return {"jsonrpc": "2.0", "id": 1, "result": "0x" + result.hex()}
+
+
+def read_contract_info(node):
+    provider = Provider(web3_provider=node)
+    return EventContractInterface(provider=provider, contract_address=CONTRACT_ADDRESS,
+                                  contract_abi=CONTRACT_ABI).get_event_contract_info()
+
+
+def test_contract_info_is_read_with_one_multicall():
+    node = FakeNode()
+    contract_info = read_contract_info(node)
+
+    assert node.calls == [MULTICALL3_ADDRESS]
+    assert contract_info["price_mark"] == 65000
+    assert contract_info["asset_symbol"] == "BTC"
+    assert contract_info["is_event_over"] is False
+    assert contract_info["event_close"] is None
+
+
+def test_reverting_getter_falls_back_to_one_call_per_getter():
+    node = FakeNode(reverting_getters=("isEventOver",))
+    contract_info = read_contract_info(node)
+
+    assert node.calls == [MULTICALL3_ADDRESS] + [CONTRACT_ADDRESS] * len(GETTER_RESULTS)
+    assert contract_info["asset_symbol"] == "BTC"
+
+
+def test_unexpected_errors_are_not_hidden_by_the_fallback():
+    def read_with_missing_api(fields=None, block_identifier="latest"):
+        raise AttributeError("'Contract' object has no attribute 'encodeABI'")
+
+    node = FakeNode()
+    contract = EventContractInterface(provider=Provider(web3_provider=node), contract_address=CONTRACT_ADDRESS,
+                                      contract_abi=CONTRACT_ABI)
+    contract.get_event_contract_info_batched = read_with_missing_api
+
+    with pytest.raises(AttributeError):
+        contract.get_event_contract_info()
+    assert node.calls == []
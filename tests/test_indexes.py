@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from db.indexes import EVENT_CONTRACT_INDEXES, ensure_indexes
+from jobs import EventDeployerJobs
+
+NOW = time.time()
+RANGE_OPERATORS = ("$gt", "$lt", "$gte", "$lte")
+
+
+class RecordingMongo:
+    def __init__(self):
+        self.indexes = {}
+
+    def create_index(self, collection, keys, **options):
+        self.indexes.setdefault(collection, {})[options["name"]] = keys
+
+
+def get_range_fields(query):
+    return {field for field, condition in query.items()
+            if isinstance(condition, dict) and any(operator in condition for operator in RANGE_OPERATORS)}
+
+
+def get_serving_index(query):
+    """
+    Name of the event contract index whose leading keys are the query's fields, equality fields first and
+    at most one range field last, so the query is answered from the index without a collection scan
+    """
+    range_fields = get_range_fields(query)
+    if len(range_fields) > 1:
+        return None
+    for keys, options in EVENT_CONTRACT_INDEXES:
+        leading_fields = [field for field, _ in keys[:len(query)]]
+        if set(leading_fields) == set(query) and not range_fields - set(leading_fields[-1:]):
+            return options["name"]
+
+    return None
+
+
+def get_query_branches(query):
+    return query["$or"] if "$or" in query else [query]
+
+
+@pytest.mark.parametrize("query", [
+    EventDeployerJobs.build_ongoing_event_query(asset_symbol="BTC"),
+    EventDeployerJobs.build_log_indexed_event_query(now=NOW),
+    EventDeployerJobs.build_settlement_query(now=NOW),
+    EventDeployerJobs.build_pending_event_query(),
+])
+def test_event_queries_are_served_by_an_index(query):
+    for query_branch in get_query_branches(query):
+        assert get_serving_index(query_branch) is not None, f"no index serves {query_branch}"
+
+
+def test_ensure_indexes_creates_the_event_contract_indexes():
+    mongo_handler = RecordingMongo()
+    ensure_indexes(mongo_handler=mongo_handler, event_collections=["event_contracts_6h", "event_contracts_6h"],
+                   price_collections=["btc_live_price"])
+
+    assert mongo_handler.indexes["event_contracts_6h"] == {options["name"]: keys
+                                                           for keys, options in EVENT_CONTRACT_INDEXES}
+    assert set(mongo_handler.indexes) == {"event_contracts_6h", "btc_live_price"}
+
+
+def test_unindexed_queries_are_detected():
+    assert get_serving_index({"contract_name": "BettingEvent6h"}) is None
+    assert get_serving_index({"event_close": {"$gt": NOW}, "payout_close": {"$gt": NOW}}) is None
@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from db.write_buffer import MongoWriteBuffer
+
+
+class FakeMongo:
+    def __init__(self, error=None):
+        self.error = error
+        self.bulk_writes = []
+
+    def bulk_write(self, collection, operations, ordered=False):
+        self.bulk_writes.append((collection, list(operations)))
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(inserted_count=0, matched_count=len(operations), modified_count=len(operations),
+                               upserted_count=0)
+
+
+def test_flush_writes_and_empties_the_buffer():
+    mongo_handler = FakeMongo()
+    write_buffer = MongoWriteBuffer(mongo_handler=mongo_handler)
+    write_buffer.update(collection="event_contracts_6h", query={"contract_address": "0xA"},
+                        document={"$set": {"is_event_over": True}})
+
+    assert write_buffer.flush()["event_contracts_6h"]["modified"] == 1
+    assert len(write_buffer) == 0
+
+
+def test_failed_writes_are_reported_with_their_query():
+    error = BulkWriteError({"nMatched": 1, "nModified": 1,
+                            "writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate key"}]})
+    write_buffer = MongoWriteBuffer(mongo_handler=FakeMongo(error=error))
+    write_buffer.update(collection="event_contracts_6h", query={"contract_address": "0xA"}, document={"$set": {}})
+    write_buffer.update(collection="event_contracts_6h", query={"contract_address": "0xB"}, document={"$set": {}})
+
+    flush_results = write_buffer.flush()
+
+    assert MongoWriteBuffer.get_failed_queries(flush_results, "event_contracts_6h") == [{"contract_address": "0xB"}]
+    assert len(write_buffer) == 0
+
+
+def test_flush_raising_empties_the_buffer():
+    mongo_handler = FakeMongo(error=AutoReconnect("connection reset"))
+    write_buffer = MongoWriteBuffer(mongo_handler=mongo_handler)
+    write_buffer.insert(collection="event_contracts_6h", document={"contract_address": "0xA"})
+
+    with pytest.raises(AutoReconnect):
+        write_buffer.flush()
+    assert len(write_buffer) == 0
+
+    mongo_handler.error = None
+    write_buffer.insert(collection="event_contracts_6h", document={"contract_address": "0xB"})
+    write_buffer.flush()
+
+    assert [len(operations) for _, operations in mongo_handler.bulk_writes] == [1, 1]
@@ -0,0 +1,275 @@
+from typing import Dict, Optional
+import os
+import json
+import time
+import threading
+import functools
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds in seconds, from single RPC calls up to receipt waits
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def label_key(labels: Optional[Dict]) -> tuple:
+    return tuple(sorted((labels or {}).items()))
+
+
+def format_labels(key: tuple, extra: Optional[Dict] = None) -> str:
+    items = list(key) + sorted((extra or {}).items())
+    if not items:
+        return ""
+    escaped = [(name, str(value).replace("\\", "\\\\").replace('"', '\\"')) for name, value in items]
+
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        for index, upper_bound in enumerate(self.buckets):
+            if value <= upper_bound:
+                self.bucket_counts[index] += 1
+
+
+class MetricsRegistry:
+    """
+    In-process counters and latency histograms, rendered in the Prometheus text format.
+    Metrics are keyed by name and a label set; all updates are thread safe.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, log_events=True):
+        self.buckets = buckets
+        self.log_events = log_events
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._http_server = None
+
+    def increment(self, name, value=1, labels: Optional[Dict] = None):
+        with self._lock:
+            counter = self._counters.setdefault(name, {})
+            key = label_key(labels)
+            counter[key] = counter.get(key, 0) + value
+
+    def observe(self, name, value, labels: Optional[Dict] = None):
+        with self._lock:
+            histogram = self._histograms.setdefault(name, {}).get(label_key(labels))
+            if histogram is None:
+                histogram = self._histograms[name][label_key(labels)] = Histogram(buckets=self.buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, labels: Optional[Dict] = None):
+        """
+        Time a block into the {name} histogram, errors are counted in {name}_errors_total
+        :param name: histogram name, by convention ending in _seconds
+        :param labels: label set
+        :return:
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.increment(f"{name}_errors_total", labels=labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, labels=labels)
+
+    def timed(self, name, labels: Optional[Dict] = None):
+        """
+        Decorator timing every call of a function with timer()
+        :param name: histogram name
+        :param labels: label set
+        :return:
+        """
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, labels=labels):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def get_counter(self, name, labels: Optional[Dict] = None):
+        with self._lock:
+            return self._counters.get(name, {}).get(label_key(labels), 0)
+
+    def get_counter_total(self, name):
+        with self._lock:
+            return sum(self._counters.get(name, {}).values())
+
+    def get_counter_by_label(self, name, label_name) -> Dict:
+        """
+        Sum a counter over every label except label_name
+        :param name: counter name
+        :param label_name: label to group by
+        :return: {label_value: count}
+        """
+        totals = {}
+        with self._lock:
+            for key, value in self._counters.get(name, {}).items():
+                label_value = dict(key).get(label_name)
+                totals[label_value] = totals.get(label_value, 0) + value
+
+        return totals
+
+    def get_histogram_count_by_label(self, name, label_name) -> Dict:
+        """
+        Number of observations of a histogram, summed over every label except label_name
+        :param name: histogram name
+        :param label_name: label to group by
+        :return: {label_value: count}
+        """
+        totals = {}
+        with self._lock:
+            for key, histogram in self._histograms.get(name, {}).items():
+                label_value = dict(key).get(label_name)
+                totals[label_value] = totals.get(label_value, 0) + histogram.count
+
+        return totals
+
+    def log_event(self, event, **fields):
+        """
+        Emit a structured JSON log line
+        :param event: event name
+        :param fields: json serializable fields
+        :return:
+        """
+        if self.log_events:
+            print(json.dumps({"ts": round(time.time(), 3), "event": event, **fields}, default=str))
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{format_labels(key)} {value}")
+
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(series.items()):
+                    for upper_bound, bucket_count in zip(histogram.buckets, histogram.bucket_counts):
+                        lines.append(f"{name}_bucket{format_labels(key, {'le': upper_bound})} {bucket_count}")
+                    lines.append(f"{name}_bucket{format_labels(key, {'le': '+Inf'})} {histogram.count}")
+                    lines.append(f"{name}_sum{format_labels(key)} {histogram.total}")
+                    lines.append(f"{name}_count{format_labels(key)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """
+        Dump the metrics to a file, e.g. for the node exporter textfile collector
+        :param path: output file path
+        :return:
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as metrics_file:
+            metrics_file.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+    def start_http_server(self, port, host="0.0.0.0"):
+        """
+        Serve the metrics at /metrics from a daemon thread
+        :param port:
+        :param host:
+        :return: server
+        """
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                return
+
+        self._http_server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._http_server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"Serving metrics on {host}:{port}/metrics")
+
+        return self._http_server
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def instrument_web3_provider(web3_provider, registry: Optional[MetricsRegistry] = None):
+    """
+    Count and time every JSON-RPC request made through a web3 provider, by method.
+    Wraps the provider's make_request so calls are counted whatever the web3 middleware API is.
+    :param web3_provider: web3 provider instance (HTTPProvider, ProviderPool, ...)
+    :param registry: metrics registry, defaults to the module registry
+    :return: web3_provider
+    """
+    registry = registry or metrics
+    if getattr(web3_provider, "_metrics_instrumented", False):
+        return web3_provider
+    make_request = web3_provider.make_request
+
+    @functools.wraps(make_request)
+    def counted_make_request(method, params):
+        labels = {"method": method}
+        registry.increment("rpc_requests_total", labels=labels)
+        with registry.timer("rpc_request_seconds", labels=labels):
+            response = make_request(method, params)
+        if isinstance(response, dict) and response.get("error") is not None:
+            registry.increment("rpc_request_errors_total", labels=labels)
+
+        return response
+
+    web3_provider.make_request = counted_make_request
+    web3_provider._metrics_instrumented = True
+
+    return web3_provider
+
+
+def instrument_async_web3_provider(web3_provider, registry: Optional[MetricsRegistry] = None):
+    """
+    instrument_web3_provider() for async web3 providers (AsyncHTTPProvider), whose make_request is a coroutine
+    :param web3_provider: async web3 provider instance
+    :param registry: metrics registry, defaults to the module registry
+    :return: web3_provider
+    """
+    registry = registry or metrics
+    if getattr(web3_provider, "_metrics_instrumented", False):
+        return web3_provider
+    make_request = web3_provider.make_request
+
+    @functools.wraps(make_request)
+    async def counted_make_request(method, params):
+        labels = {"method": method}
+        registry.increment("rpc_requests_total", labels=labels)
+        with registry.timer("rpc_request_seconds", labels=labels):
+            response = await make_request(method, params)
+        if isinstance(response, dict) and response.get("error") is not None:
+            registry.increment("rpc_request_errors_total", labels=labels)
+
+        return response
+
+    web3_provider.make_request = counted_make_request
+    web3_provider._metrics_instrumented = True
+
+    return web3_provider
+
+
+# shared registry, run_jobs sets log_events from METRICS_JSON_LOGS in the .env config
+metrics = MetricsRegistry()
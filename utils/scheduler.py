@@ -0,0 +1,108 @@
+from typing import Dict, Optional
+import time
+import heapq
+import threading
+
+
+class DeadlineScheduler:
+    """
+    Priority queue of upcoming deadlines (unix timestamps). The job runner sleeps until the earliest
+    deadline instead of a fixed interval, bounded by min_sleep/max_sleep, and can be woken early.
+    Deadlines added while sleeping shorten the sleep, deadlines that stay past due are retried with
+    exponential backoff instead of every min_sleep.
+    """
+
+    def __init__(self, min_sleep=5.0, max_sleep=86400 / 12, grace_period=15.0, past_due_backoff=60.0,
+                 max_past_due_backoff=900.0):
+        self.min_sleep = min_sleep
+        self.max_sleep = max_sleep
+        # contracts compare against block.timestamp, so wake once a block past the deadline exists
+        self.grace_period = grace_period
+        self.past_due_backoff = past_due_backoff
+        self.max_past_due_backoff = max_past_due_backoff
+        self._deadlines = []
+        self._past_due_retries: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._wake_requested = False
+
+    def add_deadline(self, timestamp, label=""):
+        """
+        Schedule a wake-up at timestamp
+        :param timestamp: unix timestamp
+        :param label: description of the deadline for logging
+        :return:
+        """
+        with self._lock:
+            heapq.heappush(self._deadlines, (float(timestamp), label))
+        self._wake_event.set()
+
+    def add_past_due(self, label, now=None) -> float:
+        """
+        Schedule a retry for a deadline that passed without being resolved, ex. an expired event the
+        job could not close out yet. The retry delay doubles every time the same label is still past due.
+        :param label: description of the deadline, identifies it across passes
+        :param now: unix timestamp, defaults to current time
+        :return: retry timestamp
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            retries = self._past_due_retries.get(label, 0)
+            self._past_due_retries[label] = retries + 1
+        retry_at = now + min(self.max_past_due_backoff, self.past_due_backoff * 2 ** retries)
+        self.add_deadline(timestamp=retry_at, label=f"{label} past due retry")
+
+        return retry_at
+
+    def clear_past_due(self, label):
+        with self._lock:
+            self._past_due_retries.pop(label, None)
+
+    def clear(self):
+        with self._lock:
+            self._deadlines = []
+
+    def wake(self):
+        with self._lock:
+            self._wake_requested = True
+        self._wake_event.set()
+
+    def next_deadline(self) -> Optional[tuple]:
+        with self._lock:
+            return self._deadlines[0] if self._deadlines else None
+
+    def get_sleep_seconds(self, now=None) -> float:
+        """
+        Seconds until the earliest deadline (plus grace period), clamped to [min_sleep, max_sleep]
+        :param now: unix timestamp, defaults to current time
+        :return: seconds
+        """
+        now = time.time() if now is None else now
+        next_deadline = self.next_deadline()
+        if next_deadline is None:
+            return self.max_sleep
+
+        return min(self.max_sleep, max(self.min_sleep, next_deadline[0] + self.grace_period - now))
+
+    def sleep_until_next(self) -> float:
+        """
+        Sleep until the earliest deadline or until woken. A deadline added during the sleep recomputes it.
+        :return: seconds slept
+        """
+        with self._lock:
+            self._wake_requested = False
+        start = time.time()
+        while True:
+            self._wake_event.clear()
+            wake_at = start + self.get_sleep_seconds(now=start)
+            if not self._wake_event.wait(timeout=max(0.0, wake_at - time.time())):
+                break
+            with self._lock:
+                if self._wake_requested:
+                    break
+
+        with self._lock:
+            while self._deadlines and self._deadlines[0][0] + self.grace_period <= time.time():
+                heapq.heappop(self._deadlines)
+
+        return time.time() - start
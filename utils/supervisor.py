@@ -0,0 +1,97 @@
+from typing import Callable, Dict, Optional
+import time
+import signal
+import multiprocessing
+
+
+class WorkerSupervisor:
+    """
+    Runs each worker in its own process and restarts it with exponential backoff when it crashes.
+    A worker exiting with code 0 is considered finished and is not restarted.
+    """
+
+    def __init__(self, base_backoff=5.0, max_backoff=600.0, stable_uptime=600.0, poll_interval=1.0):
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.stable_uptime = stable_uptime
+        self.poll_interval = poll_interval
+        self.workers: Dict[str, Dict] = {}
+        self.shutting_down = False
+
+    def add_worker(self, name, target: Callable, kwargs: Optional[Dict] = None):
+        self.workers[name] = {"target": target, "kwargs": kwargs or {}, "process": None,
+                              "started_at": None, "restarts": 0, "restart_at": None, "finished": False}
+
+    def _start_worker(self, name):
+        worker = self.workers[name]
+        process = multiprocessing.Process(target=worker["target"], kwargs=worker["kwargs"], name=name)
+        process.start()
+        worker["process"] = process
+        worker["started_at"] = time.time()
+        worker["restart_at"] = None
+        print(f"Started worker {name} (pid {process.pid})")
+
+    def _handle_signal(self, signum, frame):
+        print(f"Received signal {signum}, shutting down workers...")
+        self.shutting_down = True
+
+    def run(self):
+        """
+        Start all workers and supervise them until they all finish or a shutdown signal is received
+        :return:
+        """
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+
+        for name in self.workers:
+            self._start_worker(name)
+
+        try:
+            while not self.shutting_down:
+                if all(worker["finished"] for worker in self.workers.values()):
+                    break
+
+                for name, worker in self.workers.items():
+                    if worker["finished"]:
+                        continue
+
+                    process = worker["process"]
+                    if worker["restart_at"] is not None:
+                        if time.time() >= worker["restart_at"]:
+                            self._start_worker(name)
+                        continue
+
+                    if process.is_alive():
+                        continue
+
+                    if process.exitcode == 0:
+                        print(f"Worker {name} finished")
+                        worker["finished"] = True
+                        continue
+
+                    if time.time() - worker["started_at"] >= self.stable_uptime:
+                        worker["restarts"] = 0
+                    backoff = min(self.max_backoff, self.base_backoff * 2 ** worker["restarts"])
+                    worker["restarts"] += 1
+                    worker["restart_at"] = time.time() + backoff
+                    print(f"Worker {name} exited with code {process.exitcode}, restarting in {backoff:.0f}s...")
+
+                time.sleep(self.poll_interval)
+        finally:
+            self.shutdown()
+
+    def shutdown(self, timeout=30.0):
+        for name, worker in self.workers.items():
+            process = worker["process"]
+            if process is not None and process.is_alive():
+                process.terminate()
+
+        for name, worker in self.workers.items():
+            process = worker["process"]
+            if process is None:
+                continue
+            process.join(timeout=timeout)
+            if process.is_alive():
+                print(f"Worker {name} did not exit, killing...")
+                process.kill()
+                process.join()